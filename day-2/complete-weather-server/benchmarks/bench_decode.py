@@ -0,0 +1,117 @@
+"""
+Micro-benchmark: decode and model build time for a 16-day hourly payload.
+
+Compares the original path (``json.loads`` into lists, then indexing each
+list per hour to build ``HourlyWeatherPoint`` objects) with the columnar path
+(fastest available decoder, typed columns, zipped model build).
+
+Run from the project root:
+
+    uv run python benchmarks/bench_decode.py
+"""
+
+import json
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mcp_open_meteo.columnar import JSON_DECODER, columnize, decode_json  # noqa: E402
+from mcp_open_meteo.constants import weather_code_to_description  # noqa: E402
+from mcp_open_meteo.models import HourlyWeatherPoint  # noqa: E402
+
+HOURS = 16 * 24
+REPEAT = 200
+
+
+def make_payload(hours: int = HOURS) -> bytes:
+    """Build an Open-Meteo style hourly response with realistic value types"""
+    rng = random.Random(42)
+    start = datetime(2025, 7, 1)
+    hourly = {
+        "time": [(start + timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M")
+                 for i in range(hours)],
+        "temperature_2m": [round(rng.uniform(-5, 35), 1) for _ in range(hours)],
+        "relative_humidity_2m": [rng.randint(20, 100) for _ in range(hours)],
+        "weather_code": [rng.choice([0, 1, 2, 3, 61, 63, 95]) for _ in range(hours)],
+        "precipitation": [round(rng.uniform(0, 5), 1) for _ in range(hours)],
+        "wind_speed_10m": [round(rng.uniform(0, 60), 1) for _ in range(hours)],
+        "wind_direction_10m": [rng.randint(0, 359) for _ in range(hours)],
+        "cloud_cover": [rng.randint(0, 100) for _ in range(hours)],
+    }
+    return json.dumps({
+        "latitude": 52.52, "longitude": 13.42, "timezone": "GMT",
+        "hourly_units": {name: "" for name in hourly},
+        "hourly": hourly,
+    }).encode()
+
+
+def build_indexed(hourly):
+    """Original model build: index every list once per hour"""
+    return [
+        HourlyWeatherPoint(
+            time=hourly["time"][i],
+            temperature=hourly["temperature_2m"][i],
+            humidity=hourly["relative_humidity_2m"][i],
+            weather_code=hourly["weather_code"][i],
+            weather_description=weather_code_to_description(hourly["weather_code"][i]),
+            precipitation=hourly["precipitation"][i],
+            wind_speed=hourly["wind_speed_10m"][i],
+            wind_direction=hourly["wind_direction_10m"][i],
+            cloud_cover=hourly["cloud_cover"][i]
+        )
+        for i in range(len(hourly["time"]))
+    ]
+
+
+def build_zipped(hourly):
+    """Columnar model build: walk the columns in step"""
+    return [
+        HourlyWeatherPoint(
+            time=time, temperature=temp, humidity=humidity, weather_code=code,
+            weather_description=weather_code_to_description(code), precipitation=precip,
+            wind_speed=speed, wind_direction=direction, cloud_cover=clouds
+        )
+        for time, temp, humidity, code, precip, speed, direction, clouds in zip(
+            hourly["time"], hourly["temperature_2m"], hourly["relative_humidity_2m"],
+            hourly["weather_code"], hourly["precipitation"], hourly["wind_speed_10m"],
+            hourly["wind_direction_10m"], hourly["cloud_cover"]
+        )
+    ]
+
+
+def per_call_ms(fn) -> float:
+    """Best-of-5 mean time per call in milliseconds"""
+    return min(timeit.repeat(fn, number=REPEAT, repeat=5)) / REPEAT * 1000
+
+
+def main():
+    payload = make_payload()
+    lists = json.loads(payload)["hourly"]
+    columns = columnize(decode_json(payload))["hourly"]
+    
+    results = {
+        "decode (json.loads, lists)": per_call_ms(lambda: json.loads(payload)),
+        f"decode ({JSON_DECODER} + columns)": per_call_ms(
+            lambda: columnize(decode_json(payload))
+        ),
+        "build (indexed lists)": per_call_ms(lambda: build_indexed(lists)),
+        "build (zipped columns)": per_call_ms(lambda: build_zipped(columns)),
+    }
+    list_bytes = sum(sys.getsizeof(v) + sum(sys.getsizeof(x) for x in v)
+                     for k, v in lists.items() if k != "time")
+    column_bytes = sum(sys.getsizeof(v) for k, v in columns.items() if k != "time")
+    
+    print(f"Payload: {HOURS} hours x {len(lists) - 1} variables,"
+          f" {len(payload):,} bytes")
+    for name, ms in results.items():
+        print(f"  {name:<32} {ms:8.3f} ms")
+    print(f"  numeric series memory: lists {list_bytes:,} B,"
+          f" columns {column_bytes:,} B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Benchmark: JSON vs FlatBuffers forecast transport on recorded fixtures.
+
+Compares bytes on the wire and decode time for the same 16-day hourly
+forecast in both formats. Record fixtures from the live API with
+
+    uv run python benchmarks/bench_transport.py --record
+
+which stores them in ``benchmarks/fixtures/``. Without recorded fixtures the
+benchmark synthesises an equivalent pair (same values in both encodings) so
+it can run offline. Requires the ``flatbuffers`` extra.
+"""
+
+import argparse
+import json
+import random
+import sys
+import timeit
+import urllib.parse
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mcp_open_meteo.columnar import JSON_DECODER, columnize, decode_json  # noqa: E402
+from mcp_open_meteo.config import WEATHER_API_URL  # noqa: E402
+from mcp_open_meteo.flatbuffers_transport import (  # noqa: E402
+    FLATBUFFERS_AVAILABLE,
+    decode_flatbuffers,
+    iter_messages,
+    variable_views,
+)
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+HOURLY = sorted([
+    "temperature_2m", "relative_humidity_2m", "weather_code", "precipitation",
+    "wind_speed_10m", "wind_direction_10m", "cloud_cover"
+])
+PARAMS = {
+    "latitude": 52.52, "longitude": 13.41, "forecast_days": 16,
+    "hourly": ",".join(HOURLY),
+}
+REPEAT = 200
+
+
+def record() -> None:
+    """Fetch the benchmark request from the live API in both formats"""
+    FIXTURES.mkdir(exist_ok=True)
+    for suffix, extra in (("json", {}), ("fb", {"format": "flatbuffers"})):
+        url = f"{WEATHER_API_URL}?{urllib.parse.urlencode({**PARAMS, **extra})}"
+        with urllib.request.urlopen(url, timeout=30) as response:
+            (FIXTURES / f"forecast_16d_hourly.{suffix}").write_bytes(response.read())
+
+
+def synthesize():
+    """Build a JSON/FlatBuffers pair carrying the same values"""
+    import flatbuffers
+    import numpy as np
+    from openmeteo_sdk.Unit import Unit
+    from openmeteo_sdk.Variable import Variable
+    
+    # name -> (variable, altitude, unit, JSON label, value generator)
+    rng = random.Random(42)
+    meta = {
+        "temperature_2m": (Variable.temperature, 2, Unit.celsius, "°C",
+                           lambda: round(rng.uniform(-5, 35), 1)),
+        "relative_humidity_2m": (Variable.relative_humidity, 2, Unit.percentage, "%",
+                                 lambda: rng.randint(20, 100)),
+        "weather_code": (Variable.weather_code, 0, Unit.wmo_code, "wmo code",
+                         lambda: rng.choice([0, 1, 2, 3, 61, 95])),
+        "precipitation": (Variable.precipitation, 0, Unit.millimetre, "mm",
+                          lambda: round(rng.uniform(0, 5), 1)),
+        "wind_speed_10m": (Variable.wind_speed, 10, Unit.kilometres_per_hour, "km/h",
+                           lambda: round(rng.uniform(0, 60), 1)),
+        "wind_direction_10m": (Variable.wind_direction, 10, Unit.degree_direction, "°",
+                               lambda: rng.randint(0, 359)),
+        "cloud_cover": (Variable.cloud_cover, 0, Unit.percentage, "%",
+                        lambda: rng.randint(0, 100)),
+    }
+    hours = PARAMS["forecast_days"] * 24
+    start = int(datetime(2025, 7, 1, tzinfo=timezone.utc).timestamp())
+    values = {name: [meta[name][4]() for _ in range(hours)] for name in HOURLY}
+    
+    times = [datetime.fromtimestamp(start + 3600 * i, timezone.utc)
+             .strftime("%Y-%m-%dT%H:%M") for i in range(hours)]
+    json_body = json.dumps({
+        "latitude": 52.52, "longitude": 13.419998, "generationtime_ms": 0.1,
+        "utc_offset_seconds": 0, "timezone": "GMT", "timezone_abbreviation": "GMT",
+        "elevation": 38.0,
+        "hourly_units": {"time": "iso8601", **{n: meta[n][3] for n in HOURLY}},
+        "hourly": {"time": times, **values},
+    }, separators=(",", ":")).encode()
+    
+    builder = flatbuffers.Builder(16 * 1024)
+    variables = []
+    for name in HOURLY:
+        variable, altitude, unit = meta[name][:3]
+        vector = builder.CreateNumpyVector(np.asarray(values[name], dtype=np.float32))
+        builder.StartObject(13)
+        builder.PrependUint8Slot(0, variable, 0)
+        builder.PrependUint8Slot(1, unit, 0)
+        builder.PrependUOffsetTRelativeSlot(3, vector, 0)
+        builder.PrependInt16Slot(5, altitude, 0)
+        variables.append(builder.EndObject())
+    builder.StartVector(4, len(variables), 4)
+    for offset in reversed(variables):
+        builder.PrependUOffsetTRelative(offset)
+    variables_vector = builder.EndVector()
+    builder.StartObject(4)
+    builder.PrependInt64Slot(0, start, 0)
+    builder.PrependInt64Slot(1, start + 3600 * hours, 0)
+    builder.PrependInt32Slot(2, 3600, 0)
+    builder.PrependUOffsetTRelativeSlot(3, variables_vector, 0)
+    hourly = builder.EndObject()
+    tz = builder.CreateString("GMT")
+    builder.StartObject(15)
+    builder.PrependFloat32Slot(0, 52.52, 0)
+    builder.PrependFloat32Slot(1, 13.419998, 0)
+    builder.PrependFloat32Slot(2, 38.0, 0)
+    builder.PrependUOffsetTRelativeSlot(7, tz, 0)
+    builder.PrependUOffsetTRelativeSlot(11, hourly, 0)
+    builder.FinishSizePrefixed(builder.EndObject())
+    return json_body, bytes(builder.Output())
+
+
+def per_call_ms(fn) -> float:
+    """Best-of-5 mean time per call in milliseconds"""
+    return min(timeit.repeat(fn, number=REPEAT, repeat=5)) / REPEAT * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--record", action="store_true",
+                        help="record fixtures from the live API first")
+    args = parser.parse_args()
+    if not FLATBUFFERS_AVAILABLE:
+        sys.exit("Install the `flatbuffers` extra (openmeteo-sdk, numpy)"
+                 " to run this benchmark.")
+    if args.record:
+        record()
+    
+    json_path = FIXTURES / "forecast_16d_hourly.json"
+    fb_path = FIXTURES / "forecast_16d_hourly.fb"
+    if json_path.exists() and fb_path.exists():
+        source = "recorded"
+        json_body, fb_body = json_path.read_bytes(), fb_path.read_bytes()
+    else:
+        source = "synthesized"
+        json_body, fb_body = synthesize()
+    
+    # Both paths must agree before timing them
+    from_json = columnize(decode_json(json_body))["hourly"]
+    from_fb = decode_flatbuffers(fb_body, hourly=HOURLY)[0]["hourly"]
+    assert list(from_json["time"]) == list(from_fb["time"])
+    assert all(list(from_json[n]) == list(from_fb[n]) for n in HOURLY)
+    
+    results = {
+        f"JSON ({JSON_DECODER}) -> columns": per_call_ms(
+            lambda: columnize(decode_json(json_body))
+        ),
+        "FlatBuffers -> columns": per_call_ms(
+            lambda: decode_flatbuffers(fb_body, hourly=HOURLY)
+        ),
+        "FlatBuffers raw views (not served)": per_call_ms(
+            lambda: [variable_views(m.Hourly(), HOURLY) for m in iter_messages(fb_body)]
+        ),
+    }
+    
+    print(f"Fixture ({source}): 16 days x {len(HOURLY)} hourly variables")
+    print(f"  bytes on the wire: JSON {len(json_body):,} B,"
+          f" FlatBuffers {len(fb_body):,} B "
+          f"({len(fb_body) / len(json_body):.0%})")
+    for name, ms in results.items():
+        print(f"  {name:<34} {ms:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
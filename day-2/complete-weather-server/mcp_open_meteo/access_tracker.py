@@ -0,0 +1,56 @@
+"""
+Access frequency tracking for cached forecasts.
+
+Each forecast request is counted under a key describing the location and
+what was requested. Counts decay exponentially, so the "hot" set follows
+what clients ask for now rather than what they asked for yesterday.
+"""
+
+import math
+import time
+from typing import Dict, Hashable, List, Tuple
+
+
+class AccessTracker:
+    """
+    Exponentially decaying access counts per key.
+
+    A count halves every `half_life_seconds` without accesses. At most
+    `max_keys` keys are tracked; the coldest are dropped first.
+    """
+
+    def __init__(self, half_life_seconds: float, max_keys: int = 1000):
+        self.half_life_seconds = half_life_seconds
+        self.max_keys = max_keys
+        # key -> (count, updated_at)
+        self._counts: Dict[Hashable, Tuple[float, float]] = {}
+
+    def _decayed(self, count: float, updated_at: float, now: float) -> float:
+        return count * math.pow(0.5, (now - updated_at) / self.half_life_seconds)
+
+    def record(self, key: Hashable) -> None:
+        """Count one access to `key`"""
+        now = time.monotonic()
+        count, updated_at = self._counts.get(key, (0.0, now))
+        self._counts[key] = (self._decayed(count, updated_at, now) + 1, now)
+        if len(self._counts) > self.max_keys:
+            self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        """Drop the coldest keys down to 90% of `max_keys`"""
+        ranked = sorted(self._counts,
+                        key=lambda k: self._decayed(*self._counts[k], now))
+        for key in ranked[:len(ranked) - int(self.max_keys * 0.9)]:
+            del self._counts[key]
+
+    def top(self, limit: int, min_count: float = 0.0) -> List[Tuple[Hashable, float]]:
+        """Return up to `limit` (key, decayed count) pairs, hottest first"""
+        now = time.monotonic()
+        counts = [(key, self._decayed(count, updated_at, now))
+                  for key, (count, updated_at) in self._counts.items()]
+        hot = [(key, count) for key, count in counts if count >= min_count]
+        hot.sort(key=lambda item: item[1], reverse=True)
+        return hot[:limit]
+
+    def __len__(self) -> int:
+        return len(self._counts)
@@ -0,0 +1,111 @@
+"""
+In-process response cache for Open-Meteo data.
+
+This module provides a small LRU cache with per-entry time-to-live, used to
+avoid re-fetching forecast data that cannot have changed since the last
+upstream model update. Expired entries can be kept for a grace period and
+served as stale data while a refresh is in flight.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class TTLCache:
+    """
+    LRU cache whose entries expire after a per-entry TTL.
+
+    All operations are synchronous and never await, so a lookup and the
+    following store cannot interleave with another coroutine on the same
+    event loop. Cached values are shared between callers and must be treated
+    as read-only.
+
+    Expired entries stay available to `get_stale` for `stale_seconds` after
+    their TTL before they are dropped.
+    """
+
+    def __init__(self, max_entries: int, stale_seconds: float = 0):
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for `key`, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        now = time.monotonic()
+        if expires_at <= now:
+            if expires_at + self.stale_seconds <= now:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def get_stale(self, key: Hashable) -> Optional[Any]:
+        """Return an expired value still within the stale grace period, or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        now = time.monotonic()
+        if expires_at > now or expires_at + self.stale_seconds <= now:
+            return None
+        self.stale_hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: float) -> None:
+        """
+        Store `value` under `key` for `ttl_seconds`, evicting the least
+        recently used entry if the cache is full
+        """
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def expires_in(self, key: Hashable) -> Optional[float]:
+        """Seconds until `key` expires (negative while stale), or None if not cached"""
+        entry = self._entries.get(key)
+        return entry[0] - time.monotonic() if entry is not None else None
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Return the fresh (key, value) pairs without touching LRU order or counters"""
+        now = time.monotonic()
+        return [(key, value) for key, (expires_at, value) in self._entries.items()
+                if expires_at > now]
+
+    def delete(self, key: Hashable) -> bool:
+        """Drop `key`; returns whether it was cached"""
+        return self._entries.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters"""
+        self._entries.clear()
+        self.hits = self.misses = self.stale_hits = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current hit ratio"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
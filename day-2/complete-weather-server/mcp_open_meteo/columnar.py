@@ -0,0 +1,89 @@
+"""
+Fast decoding and columnar storage of forecast payloads.
+
+Hourly and daily blocks arrive as parallel JSON arrays (up to 384 hours per
+variable for a 16-day forecast). This module decodes them with the fastest
+JSON library available and stores each numeric variable as a typed
+``array.array`` column instead of a list of boxed Python numbers. Columns
+take a fraction of the memory in the cache, convert in one pass, and can be
+zipped directly when building the tool models.
+"""
+
+import json
+import math
+from array import array
+from typing import Any, Callable, Dict, List, Sequence
+
+# Optional fast JSON decoders, in order of preference
+try:
+    import orjson
+    decode_json: Callable[[bytes], Any] = orjson.loads
+    JSON_DECODER = "orjson"
+except ImportError:
+    try:
+        import msgspec
+        decode_json = msgspec.json.decode
+        JSON_DECODER = "msgspec"
+    except ImportError:
+        decode_json = json.loads
+        JSON_DECODER = "json"
+
+# Blocks of a forecast response that hold time series
+SERIES_BLOCKS = ("hourly", "daily")
+
+
+def to_column(values: List[Any]) -> Sequence[Any]:
+    """
+    Convert one JSON array to a typed column.
+
+    All-integer arrays (weather codes, humidity, directions) become signed
+    64-bit integer arrays; other numeric arrays become float64 arrays with
+    missing values stored as NaN. Non-numeric arrays (e.g. `time`) are
+    returned unchanged.
+    """
+    # Let the C constructors do the type checking: each rejects the values
+    # it cannot hold with TypeError, which is much cheaper than scanning first
+    try:
+        return array("q", values)
+    except TypeError:
+        pass
+    try:
+        return array("d", values)
+    except TypeError:
+        pass
+    if all(v is None or type(v) in (int, float) for v in values):
+        return array("d", [math.nan if v is None else v for v in values])
+    return values
+
+
+def columnize(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a forecast response with its hourly/daily series stored as columns"""
+    columnar = dict(data)
+    for block in SERIES_BLOCKS:
+        series = data.get(block)
+        if series:
+            columnar[block] = {name: to_column(values)
+                               for name, values in series.items()}
+    return columnar
+
+
+def _column_to_list(value: Any) -> List[Any]:
+    """JSON fallback for columns (array.array or NumPy): a list with NaN as null"""
+    if isinstance(value, array) or hasattr(value, "__array_interface__"):
+        return [None if v != v else v for v in value.tolist()]
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def encode_json(value: Any) -> bytes:
+    """Encode a decoded (and possibly columnized) response back to JSON bytes"""
+    if JSON_DECODER == "orjson":
+        return orjson.dumps(value, default=_column_to_list)
+    if JSON_DECODER == "msgspec":
+        return msgspec.json.encode(value, enc_hook=_column_to_list)
+    return json.dumps(value, default=_column_to_list).encode()
+
+
+def is_series(value: Any) -> bool:
+    """Check whether a block value is a time series (list or column), not a scalar"""
+    # NumPy columns come from the optional FlatBuffers transport
+    return isinstance(value, (list, array)) or hasattr(value, "__array_interface__")
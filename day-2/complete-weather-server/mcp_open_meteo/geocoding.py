@@ -0,0 +1,50 @@
+"""
+Helpers for caching geocoding results.
+
+Place searches are cached under a normalized query: case-folded, with
+whitespace collapsed and diacritics removed, so "London", "  LONDON " and
+"london" share one cache entry, as do "Zürich" and "Zurich".
+
+Locations are turned into `LocationInfo` models through `location_info`,
+which interns them by geocoder id: resolving the same place again returns
+the model built the first time instead of allocating a new one. Interned
+models are shared between responses and must be treated as read-only.
+"""
+
+import unicodedata
+from typing import Any, Dict
+
+from .cache import TTLCache
+from .config import GEOCODING_CACHE_MAX_ENTRIES, GEOCODING_CACHE_TTL_SECONDS
+from .models import LocationInfo
+
+# LocationInfo models by geocoder id
+interned_locations = TTLCache(GEOCODING_CACHE_MAX_ENTRIES)
+
+
+def normalize_query(name: str) -> str:
+    """Fold case, whitespace and diacritics out of a place-name query"""
+    if not name.isascii():
+        decomposed = unicodedata.normalize("NFKD", name)
+        name = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(name.casefold().split())
+
+
+def location_info(loc: Dict[str, Any]) -> LocationInfo:
+    """The (shared) LocationInfo for a geocoding result"""
+    info = interned_locations.get(loc["id"])
+    if info is None:
+        info = LocationInfo(
+            id=loc["id"],
+            name=loc["name"],
+            latitude=loc["latitude"],
+            longitude=loc["longitude"],
+            country=loc.get("country", ""),
+            admin1=loc.get("admin1"),
+            admin2=loc.get("admin2"),
+            timezone=loc["timezone"],
+            population=loc.get("population"),
+            elevation=loc.get("elevation")
+        )
+        interned_locations.set(loc["id"], info, GEOCODING_CACHE_TTL_SECONDS)
+    return info
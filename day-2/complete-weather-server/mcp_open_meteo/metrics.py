@@ -0,0 +1,243 @@
+"""
+Server metrics: labelled counters and histograms, plus component stats.
+
+Code on the request path records upstream calls, response sizes, decode and
+model build times, cache lookups and tool latencies here. Long-lived
+components (caches, circuit breakers, the query planner, the refresh
+scheduler) register their `stats()` methods instead, and are read only when
+metrics are exported.
+
+Recording is a dict lookup and a few additions, cheap enough for every
+request. `Metrics.snapshot` returns everything as a dict (served as the
+``metrics://server`` resource) and `Metrics.prometheus` renders it in the
+Prometheus text format (served at ``/metrics`` on the HTTP transports).
+"""
+
+import bisect
+import functools
+import time
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS_SECONDS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                           0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Help text per metric name, used in the Prometheus output
+DESCRIPTIONS = {
+    "upstream_requests_total": (
+        "Upstream HTTP requests by endpoint and status"
+        " (error for transport failures, deadline when cut off)"
+    ),
+    "upstream_request_seconds": "Upstream HTTP request latency per attempt",
+    "upstream_response_bytes": "Size of successful upstream response bodies",
+    "upstream_hedges_total": (
+        "Hedged upstream requests by endpoint and which request answered first"
+    ),
+    "decode_seconds": "Time to decode upstream response bodies",
+    "cache_lookups_total": (
+        "Response cache lookups by kind and where they were answered"
+    ),
+    "cache_fallbacks_total": (
+        "Calls answered from expired cached data after an upstream timeout"
+    ),
+    "model_build_seconds": "Time to build the response models of a tool",
+    "tool_seconds": "Tool latency by outcome",
+    "location_resolve_seconds": "Time to resolve a location name to coordinates",
+    "elicitation_seconds": (
+        "Time spent waiting for the user to answer an elicitation, by action"
+    ),
+    "elicitation_fallbacks_total": (
+        "Elicitations that timed out and resolved to the best-ranked candidate"
+    ),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # The last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation within its bucket"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower  # Beyond the last bound: report the bound
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": round(self.quantile(0.50), 6),
+            "p95": round(self.quantile(0.95), 6),
+            "p99": round(self.quantile(0.99), 6),
+        }
+
+
+class Metrics:
+    """Registry of counters, histograms and component stats"""
+
+    def __init__(self, prefix: str = "open_meteo"):
+        self.prefix = prefix
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._components: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        """Add `value` to counter `name`"""
+        series = self._counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float,
+                buckets: Sequence[float] = LATENCY_BUCKETS_SECONDS,
+                **labels: str) -> None:
+        """Record `value` in histogram `name`"""
+        series = self._histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels: str) -> Iterator[None]:
+        """Record the duration of the block in histogram `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name: str, **labels: str) -> Callable[[F], F]:
+        """Decorate an async function to record its latency, labelled by outcome"""
+        def decorator(fn: F) -> F:
+            @functools.wraps(fn)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                start = time.perf_counter()
+                outcome = "error"
+                try:
+                    result = await fn(*args, **kwargs)
+                    outcome = "ok"
+                    return result
+                finally:
+                    self.observe(name, time.perf_counter() - start,
+                                 outcome=outcome, **labels)
+            return wrapper  # type: ignore[return-value]
+        return decorator
+
+    def register(self, component: str, stats: Callable[[], Dict[str, Any]]) -> None:
+        """Report a component's `stats()` with the metrics"""
+        self._components[component] = stats
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return all metrics as plain data"""
+        return {
+            "counters": {
+                name: {_label_key(key): value for key, value in series.items()}
+                for name, series in self._counters.items()
+            },
+            "histograms": {
+                name: {
+                    _label_key(key): histogram.snapshot()
+                    for key, histogram in series.items()
+                }
+                for name, series in self._histograms.items()
+            },
+            "components": {
+                component: stats() for component, stats in self._components.items()
+            },
+        }
+
+    def prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        for name, series in self._counters.items():
+            metric = f"{self.prefix}_{name}"
+            lines += _header(metric, DESCRIPTIONS.get(name, name), "counter")
+            lines += [f"{metric}{_label_text(key)} {_number(value)}"
+                      for key, value in series.items()]
+        for name, series in self._histograms.items():
+            metric = f"{self.prefix}_{name}"
+            lines += _header(metric, DESCRIPTIONS.get(name, name), "histogram")
+            for key, histogram in series.items():
+                cumulative = 0
+                bounds = histogram.buckets + (float("inf"),)
+                for bound, count in zip(bounds, histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _number(bound)
+                    bucket_labels = _label_text(key + (("le", le),))
+                    lines.append(f"{metric}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{metric}_sum{_label_text(key)} {_number(histogram.sum)}")
+                lines.append(f"{metric}_count{_label_text(key)} {histogram.count}")
+        # Component stats become gauges; text values become a labelled 1
+        for component, stats in self._components.items():
+            for field, value in stats().items():
+                metric = f"{self.prefix}_{component}_{field}"
+                if isinstance(value, str):
+                    lines += _header(metric, f"{component} {field}", "gauge")
+                    lines.append(f'{metric}{{{field}="{_escape(value)}"}} 1')
+                elif isinstance(value, (bool, int, float)):
+                    lines += _header(metric, f"{component} {field}", "gauge")
+                    lines.append(f"{metric} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _header(metric: str, description: str, kind: str) -> List[str]:
+    return [f"# HELP {metric} {description}", f"# TYPE {metric} {kind}"]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(labels: Labels) -> str:
+    if not labels:
+        return ""
+    pairs = (f'{name}="{_escape(str(value))}"' for name, value in labels)
+    return "{" + ",".join(pairs) + "}"
+
+
+def _label_key(labels: Labels) -> str:
+    """Compact series name for the snapshot, e.g. ``endpoint=weather,status=200``"""
+    return ",".join(f"{name}={value}" for name, value in labels) or "all"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+metrics = Metrics()
@@ -6,14 +6,20 @@ in a read-only format, accessible via URI-based resource requests.
 """
 
 from mcp.server.fastmcp import FastMCP
-from .api_client import search_locations, get_weather_data
+from .api_client import search_locations
+from .columnar import encode_json
+from .metrics import metrics
+from .resilience import within_budget
+from .snapshot import get_weather_snapshot, take
 from .constants import weather_code_to_description
+from .config import RESOURCE_BUDGET_SECONDS
 
 
 def register_resources(mcp: FastMCP):
     """Register all weather resources with the MCP server"""
     
     @mcp.resource("weather://current/{location_name}")
+    @within_budget(RESOURCE_BUDGET_SECONDS)
     async def current_weather_resource(location_name: str) -> str:
         """Get current weather as a resource"""
         # Use the first search result if multiple locations are found
@@ -22,15 +28,8 @@ def register_resources(mcp: FastMCP):
             return f"No location found for '{location_name}'"
         
         location = locations[0]
-        current_params = [
-            "temperature_2m", "relative_humidity_2m", "weather_code",
-            "wind_speed_10m", "wind_direction_10m", "pressure_msl", "cloud_cover"
-        ]
-        
-        weather_data = await get_weather_data(
-            location["latitude"], location["longitude"],
-            current=current_params
-        )
+        weather_data = await get_weather_snapshot(location["latitude"],
+                                                  location["longitude"])
         
         current = weather_data["current"]
         weather_desc = weather_code_to_description(current["weather_code"])
@@ -45,6 +44,7 @@ Cloud Cover: {current['cloud_cover']}%
 Last Updated: {current['time']}"""
 
     @mcp.resource("weather://forecast/{location_name}")
+    @within_budget(RESOURCE_BUDGET_SECONDS)
     async def forecast_resource(location_name: str) -> str:
         """Get weather forecast as a resource"""
         locations = await search_locations(location_name, limit=1)
@@ -52,17 +52,10 @@ Last Updated: {current['time']}"""
             return f"No location found for '{location_name}'"
         
         location = locations[0]
-        daily_params = [
-            "temperature_2m_max", "temperature_2m_min", "weather_code", "precipitation_sum"
-        ]
-        
-        weather_data = await get_weather_data(
-            location["latitude"], location["longitude"],
-            daily=daily_params,
-            forecast_days=7
-        )
+        weather_data = await get_weather_snapshot(location["latitude"],
+                                                  location["longitude"])
         
-        daily = weather_data["daily"]
+        daily = take(weather_data["daily"], 7)
         
         # Build forecast entries
         forecast_entries = []
@@ -78,3 +71,8 @@ Last Updated: {current['time']}"""
         return f"""7-Day Weather Forecast for {location['name']}, {location.get('country', '')}
 
 {chr(10).join(forecast_entries)}"""
+
+    @mcp.resource("metrics://server", mime_type="application/json")
+    async def metrics_resource() -> str:
+        """Server metrics: upstream calls, latencies, payload sizes and cache stats"""
+        return encode_json(metrics.snapshot()).decode()
@@ -0,0 +1,78 @@
+"""
+Coalescing of identical concurrent upstream requests.
+
+When an LLM fans out parallel tool calls for the same city, each one geocodes
+the same name and often fetches the same forecast at the same moment. This
+module lets such callers share a single in-flight request instead.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    """One in-flight upstream call and the number of callers waiting on it"""
+
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Share one in-flight call between concurrent callers using the same key.
+
+    The first caller for a key starts the call; later callers await the same
+    task until it finishes. Results and exceptions are delivered to every
+    waiter. If every waiter is cancelled, the shared call is cancelled too
+    and dropped, so the next caller starts afresh.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run `fn()` for `key`, or join the call already in flight for it"""
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _task: self._forget(key, call))
+            self.started += 1
+        else:
+            self.coalesced += 1
+        
+        call.waiters += 1
+        try:
+            # Shield so that one waiter being cancelled does not cancel the
+            # call for everyone else
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # The last waiter gave up: nobody needs the result any more
+                call.task.cancel()
+                self._forget(key, call)
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        """Remove `call` from the in-flight table unless it was already replaced"""
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return how many calls were started and how many callers joined one"""
+        return {
+            "in_flight": len(self._calls),
+            "started": self.started,
+            "coalesced": self.coalesced
+        }
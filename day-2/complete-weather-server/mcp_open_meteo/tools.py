@@ -13,12 +13,20 @@ from .models import (
     LocationInfo, CurrentWeather, WeatherForecast, DailyForecast,
     HourlyForecast, HourlyWeatherPoint
 )
-from .api_client import search_locations, get_weather_data
+from .api_client import search_locations
+from .query_planner import (
+    query_planner, plan_current_weather, plan_daily_forecast, plan_hourly_forecast,
+    plan_weather_alerts
+)
+from .geocoding import location_info
 from .location_resolver import resolve_location
+from .metrics import metrics
+from .resilience import within_budget
+from .tracing import span, traced
 from .constants import weather_code_to_description
 from .config import (
     MAX_FORECAST_DAYS, MAX_FORECAST_HOURS, HIGH_WIND_THRESHOLD_KMH,
-    SEVERE_WEATHER_CODES, FREEZING_RAIN_CODES, SNOW_CODES
+    SEVERE_WEATHER_CODES, FREEZING_RAIN_CODES, SNOW_CODES, TOOL_BUDGETS_SECONDS
 )
 
 
@@ -26,10 +34,16 @@ def register_tools(mcp: FastMCP):
     """Register all weather tools with the MCP server"""
     
     @mcp.tool()
+    @metrics.timed("tool_seconds", tool="search_locations_tool")
+    @traced("tool search_locations_tool")
+    @within_budget(TOOL_BUDGETS_SECONDS["search_locations_tool"])
     async def search_locations_tool(location_name: str, limit: int = 5) -> List[LocationInfo]:
         """
         Search for locations by name or postal code.
         
+        Misspelled names are matched to the closest known places, so there
+        is no need to retry with spelling variants.
+        
         Args:
             location_name: Name of city, region, or postal code to search for
             limit: Maximum number of results to return (1-10, default 5)
@@ -40,24 +54,16 @@ def register_tools(mcp: FastMCP):
         limit = max(1, min(limit, 10))  # Clamp between 1 and 10
         locations = await search_locations(location_name, limit)
         
-        result = []
-        for loc in locations:
-            result.append(LocationInfo(
-                id=loc["id"],
-                name=loc["name"],
-                latitude=loc["latitude"],
-                longitude=loc["longitude"],
-                country=loc.get("country", ""),
-                admin1=loc.get("admin1"),
-                admin2=loc.get("admin2"),
-                timezone=loc["timezone"],
-                population=loc.get("population"),
-                elevation=loc.get("elevation")
-            ))
+        with metrics.timer("model_build_seconds", tool="search_locations_tool"), \
+                span("build_models"):
+            result = [location_info(loc) for loc in locations]
         
         return result
 
     @mcp.tool()
+    @metrics.timed("tool_seconds", tool="get_current_weather")
+    @traced("tool get_current_weather")
+    @within_budget(TOOL_BUDGETS_SECONDS["get_current_weather"])
     async def get_current_weather(location_name: str, 
                                 temperature_unit: str = "celsius") -> CurrentWeather:
         """
@@ -69,35 +75,35 @@ def register_tools(mcp: FastMCP):
         """
         location = await resolve_location(location_name)
         
-        current_params = [
-            "temperature_2m", "relative_humidity_2m", "weather_code",
-            "wind_speed_10m", "wind_direction_10m", "pressure_msl", "cloud_cover"
-        ]
-        
-        weather_data = await get_weather_data(
-            location.latitude, location.longitude,
-            current=current_params,
+        weather_data = await query_planner.run(
+            plan_current_weather(), location.latitude, location.longitude,
             temperature_unit=temperature_unit
         )
         
         current = weather_data["current"]
         
-        return CurrentWeather(
-            location=location,
-            temperature=current["temperature_2m"],
-            temperature_unit=weather_data["current_units"]["temperature_2m"],
-            humidity=current["relative_humidity_2m"],
-            weather_description=weather_code_to_description(current["weather_code"]),
-            weather_code=current["weather_code"],
-            wind_speed=current["wind_speed_10m"],
-            wind_direction=current["wind_direction_10m"],
-            wind_speed_unit=weather_data["current_units"]["wind_speed_10m"],
-            pressure=current["pressure_msl"],
-            cloud_cover=current["cloud_cover"],
-            timestamp=current["time"]
-        )
+        with metrics.timer("model_build_seconds", tool="get_current_weather"), \
+                span("build_models"):
+            current_weather = CurrentWeather(
+                location=location,
+                temperature=current["temperature_2m"],
+                temperature_unit=weather_data["current_units"]["temperature_2m"],
+                humidity=current["relative_humidity_2m"],
+                weather_description=weather_code_to_description(current["weather_code"]),
+                weather_code=current["weather_code"],
+                wind_speed=current["wind_speed_10m"],
+                wind_direction=current["wind_direction_10m"],
+                wind_speed_unit=weather_data["current_units"]["wind_speed_10m"],
+                pressure=current["pressure_msl"],
+                cloud_cover=current["cloud_cover"],
+                timestamp=current["time"]
+            )
+        return current_weather
 
     @mcp.tool()
+    @metrics.timed("tool_seconds", tool="get_weather_forecast")
+    @traced("tool get_weather_forecast")
+    @within_budget(TOOL_BUDGETS_SECONDS["get_weather_forecast"])
     async def get_weather_forecast(location_name: str,
                                  forecast_days: int = 7,
                                  temperature_unit: str = "celsius") -> WeatherForecast:
@@ -112,44 +118,48 @@ def register_tools(mcp: FastMCP):
         location = await resolve_location(location_name)
         forecast_days = max(1, min(forecast_days, MAX_FORECAST_DAYS))
         
-        daily_params = [
-            "temperature_2m_max", "temperature_2m_min", "weather_code",
-            "precipitation_sum", "wind_speed_10m_max", "wind_direction_10m_dominant"
-        ]
-        
-        weather_data = await get_weather_data(
-            location.latitude, location.longitude,
-            daily=daily_params,
-            forecast_days=forecast_days,
+        weather_data = await query_planner.run(
+            plan_daily_forecast(forecast_days), location.latitude, location.longitude,
             temperature_unit=temperature_unit
         )
         
         daily = weather_data["daily"]
         daily_units = weather_data["daily_units"]
         
-        forecast_days_list = []
-        for i in range(len(daily["time"])):
-            forecast_days_list.append(DailyForecast(
-                date=daily["time"][i],
-                temperature_max=daily["temperature_2m_max"][i],
-                temperature_min=daily["temperature_2m_min"][i],
-                temperature_unit=daily_units["temperature_2m_max"],
-                weather_description=weather_code_to_description(daily["weather_code"][i]),
-                weather_code=daily["weather_code"][i],
-                precipitation_sum=daily["precipitation_sum"][i],
-                precipitation_unit=daily_units["precipitation_sum"],
-                wind_speed_max=daily["wind_speed_10m_max"][i],
-                wind_direction_dominant=daily["wind_direction_10m_dominant"][i],
-                wind_speed_unit=daily_units["wind_speed_10m_max"]
-            ))
+        with metrics.timer("model_build_seconds", tool="get_weather_forecast"), \
+                span("build_models"):
+            # Walk the daily columns in step rather than indexing each one per day
+            forecast_days_list = []
+            for date, temp_max, temp_min, code, precip, wind_max, wind_dir in zip(
+                daily["time"], daily["temperature_2m_max"], daily["temperature_2m_min"],
+                daily["weather_code"], daily["precipitation_sum"],
+                daily["wind_speed_10m_max"], daily["wind_direction_10m_dominant"]
+            ):
+                forecast_days_list.append(DailyForecast(
+                    date=date,
+                    temperature_max=temp_max,
+                    temperature_min=temp_min,
+                    temperature_unit=daily_units["temperature_2m_max"],
+                    weather_description=weather_code_to_description(code),
+                    weather_code=code,
+                    precipitation_sum=precip,
+                    precipitation_unit=daily_units["precipitation_sum"],
+                    wind_speed_max=wind_max,
+                    wind_direction_dominant=wind_dir,
+                    wind_speed_unit=daily_units["wind_speed_10m_max"]
+                ))
         
-        return WeatherForecast(
-            location=location,
-            forecast_days=forecast_days_list,
-            generated_at=datetime.now().isoformat()
-        )
+            forecast = WeatherForecast(
+                location=location,
+                forecast_days=forecast_days_list,
+                generated_at=datetime.now().isoformat()
+            )
+        return forecast
 
     @mcp.tool()
+    @metrics.timed("tool_seconds", tool="get_hourly_forecast")
+    @traced("tool get_hourly_forecast")
+    @within_budget(TOOL_BUDGETS_SECONDS["get_hourly_forecast"])
     async def get_hourly_forecast(location_name: str,
                                 forecast_hours: int = 24,
                                 temperature_unit: str = "celsius") -> HourlyForecast:
@@ -164,45 +174,53 @@ def register_tools(mcp: FastMCP):
         location = await resolve_location(location_name)
         forecast_hours = max(1, min(forecast_hours, MAX_FORECAST_HOURS))
         
-        hourly_params = [
-            "temperature_2m", "relative_humidity_2m", "weather_code",
-            "precipitation", "wind_speed_10m", "wind_direction_10m", "cloud_cover"
-        ]
-        
-        weather_data = await get_weather_data(
-            location.latitude, location.longitude,
-            hourly=hourly_params,
+        # Hourly data starts at the current hour
+        weather_data = await query_planner.run(
+            plan_hourly_forecast(forecast_hours), location.latitude, location.longitude,
             temperature_unit=temperature_unit
         )
         
+        # Walk the hourly columns in step
         hourly = weather_data["hourly"]
         hourly_units = weather_data["hourly_units"]
         
-        # Limit to requested hours
-        hourly_data = []
-        for i in range(min(forecast_hours, len(hourly["time"]))):
-            hourly_data.append(HourlyWeatherPoint(
-                time=hourly["time"][i],
-                temperature=hourly["temperature_2m"][i],
-                humidity=hourly["relative_humidity_2m"][i],
-                weather_code=hourly["weather_code"][i],
-                weather_description=weather_code_to_description(hourly["weather_code"][i]),
-                precipitation=hourly["precipitation"][i],
-                wind_speed=hourly["wind_speed_10m"][i],
-                wind_direction=hourly["wind_direction_10m"][i],
-                cloud_cover=hourly["cloud_cover"][i]
-            ))
+        with metrics.timer("model_build_seconds", tool="get_hourly_forecast"), \
+                span("build_models"):
+            hourly_data = []
+            columns = zip(
+                hourly["time"], hourly["temperature_2m"],
+                hourly["relative_humidity_2m"], hourly["weather_code"],
+                hourly["precipitation"], hourly["wind_speed_10m"],
+                hourly["wind_direction_10m"], hourly["cloud_cover"]
+            )
+            for (time, temperature, humidity, code, precip,
+                 wind_speed, wind_dir, clouds) in columns:
+                hourly_data.append(HourlyWeatherPoint(
+                    time=time,
+                    temperature=temperature,
+                    humidity=humidity,
+                    weather_code=code,
+                    weather_description=weather_code_to_description(code),
+                    precipitation=precip,
+                    wind_speed=wind_speed,
+                    wind_direction=wind_dir,
+                    cloud_cover=clouds
+                ))
         
-        return HourlyForecast(
-            location=location,
-            hourly_data=hourly_data,
-            temperature_unit=hourly_units["temperature_2m"],
-            precipitation_unit=hourly_units["precipitation"],
-            wind_speed_unit=hourly_units["wind_speed_10m"],
-            generated_at=datetime.now().isoformat()
-        )
+            hourly_forecast = HourlyForecast(
+                location=location,
+                hourly_data=hourly_data,
+                temperature_unit=hourly_units["temperature_2m"],
+                precipitation_unit=hourly_units["precipitation"],
+                wind_speed_unit=hourly_units["wind_speed_10m"],
+                generated_at=datetime.now().isoformat()
+            )
+        return hourly_forecast
 
     @mcp.tool()
+    @metrics.timed("tool_seconds", tool="get_weather_alerts")
+    @traced("tool get_weather_alerts")
+    @within_budget(TOOL_BUDGETS_SECONDS["get_weather_alerts"])
     async def get_weather_alerts(location_name: str) -> Dict[str, Any]:
         """
         Check for severe weather conditions and alerts for a location.
@@ -212,15 +230,9 @@ def register_tools(mcp: FastMCP):
         """
         location = await resolve_location(location_name)
         
-        # Get current and near-term forecast for alert analysis
-        current_params = ["temperature_2m", "weather_code", "wind_speed_10m", "precipitation"]
-        hourly_params = ["temperature_2m", "weather_code", "wind_speed_10m", "precipitation", "wind_gusts_10m"]
-        
-        weather_data = await get_weather_data(
-            location.latitude, location.longitude,
-            current=current_params,
-            hourly=hourly_params,
-            forecast_days=2  # Check next 48 hours
+        # Current conditions plus the next ALERT_LOOKAHEAD_HOURS hours
+        weather_data = await query_planner.run(
+            plan_weather_alerts(), location.latitude, location.longitude
         )
         
         alerts = []
@@ -265,8 +277,8 @@ def register_tools(mcp: FastMCP):
                 "time": "current"
             })
         
-        # Check for upcoming severe weather in next 24 hours
-        for i in range(min(24, len(hourly["time"]))):
+        # Check for upcoming severe weather in the next ALERT_LOOKAHEAD_HOURS hours
+        for i in range(len(hourly["time"])):
             weather_code = hourly["weather_code"][i]
             if weather_code in SEVERE_WEATHER_CODES and not any(alert["type"] == "severe_weather" for alert in alerts):
                 alerts.append({
@@ -0,0 +1,376 @@
+"""
+End-to-end benchmark: every tool, resource and prompt through an MCP session.
+
+Drives the FastMCP server from ``server.py`` over an in-memory client
+session (the full request path minus the stdio transport) against the local
+Open-Meteo stand-in (``benchmarks/standin.py``), which runs on a free port in
+this process. Reports p50/p95/p99 latency and throughput per item, for warm
+calls (the same places over and over) and cold ones (a new place every call,
+so geocoding and forecast caches always miss).
+
+The elicit mode calls the tools with a name that matches several equally
+likely places in the stand-in, and times each tool that asks the client to
+choose (choices are forgotten before every call). In "accept" the client answers
+after ``--elicitation-delay`` seconds, while the server prefetches the
+forecast for every candidate; in "timeout" it does not answer within
+``--elicitation-timeout`` seconds and the server falls back to the
+best-ranked candidate.
+
+    uv run python benchmarks/bench_e2e.py --output report.json
+    uv run python benchmarks/bench_e2e.py --save-baseline
+    uv run python benchmarks/bench_e2e.py --baseline benchmarks/baseline_e2e.json
+    uv run python benchmarks/bench_e2e.py --modes elicit --elicitation-delay 0.5
+
+With ``--baseline`` the run is compared with a stored report and exits with
+status 1 when an item's p95 latency grew or its throughput fell by more than
+``--tolerance``. Baselines are machine specific; record one on the machine
+that runs the comparison.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import socket
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+BENCHMARKS = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARKS.parent))
+sys.path.insert(0, str(BENCHMARKS))
+
+DEFAULT_BASELINE = BENCHMARKS / "baseline_e2e.json"
+# Warm calls rotate through these; "London" is ambiguous in the stand-in but
+# one place clearly leads, so it is resolved without asking
+WARM_PLACES = ["Berlin", "Tokyo", "Sydney", "London"]
+# Three places with similar rankings in the stand-in: always elicits
+ELICIT_PLACE = "Springfield"
+# Differences below this are noise whatever the tolerance
+MIN_REGRESSION_MS = 2.0
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_standin(port: int, latency: str, errors: str):
+    """Serve the stand-in from a background thread; returns the uvicorn server"""
+    import uvicorn
+    from standin import StandinOptions, create_app, parse_errors
+
+    app = create_app(StandinOptions(latency=latency, errors=parse_errors(errors)))
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = round(fraction * len(sorted_values) + 0.5)
+    index = max(0, min(len(sorted_values) - 1, rank - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], errors: int,
+              wall_seconds: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "calls": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        "throughput_per_second": (
+            round(len(latencies) / wall_seconds, 1) if wall_seconds else 0.0
+        ),
+    }
+
+
+def arguments_for(schema: Dict[str, Any], place: str) -> Dict[str, Any]:
+    """Fill the required arguments of a tool input schema"""
+    arguments: Dict[str, Any] = {}
+    for name in schema.get("required", []):
+        kind = schema.get("properties", {}).get(name, {}).get("type")
+        arguments[name] = 3 if kind in ("integer", "number") else place
+    return arguments
+
+
+def prompt_arguments_for(prompt, place: str) -> Dict[str, str]:
+    """Fill the required arguments of a prompt"""
+    values = {
+        "locations": f"{place}, Paris", "activity": "hiking", "weather_data": "{}"
+    }
+    return {argument.name: values.get(argument.name, place)
+            for argument in prompt.arguments or [] if argument.required}
+
+
+async def measure(call: Callable[[int], Awaitable[bool]], iterations: int,
+                  concurrency: int,
+                  prepare: Optional[Callable[[int], Awaitable[Any]]] = None
+                  ) -> Dict[str, Any]:
+    """
+    Run `call(i)` for i in range(iterations) on `concurrency` workers, after
+    the untimed `prepare(i)` if given
+    """
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal errors, next_index
+        while next_index < iterations:
+            index, next_index = next_index, next_index + 1
+            if prepare is not None:
+                await prepare(index)
+            start = time.perf_counter()
+            try:
+                ok = await call(index)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += 0 if ok else 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def run_suite(mcp, modes: List[str], iterations: int, concurrency: int,
+                    elicitations: Dict[str, int], elicitation_delay: float,
+                    elicitation_timeout: float) -> Dict[str, Dict[str, Any]]:
+    from mcp.shared.memory import create_connected_server_and_client_session
+    from mcp.types import ElicitResult
+
+    # How the client answers elicitations: at once outside the elicit mode
+    answering = {"action": "accept", "delay": 0.0, "asked": 0}
+
+    async def answer_elicitation(context, params):
+        action = answering["action"]
+        answering["asked"] += 1
+        elicitations[action] = elicitations.get(action, 0) + 1
+        if action == "timeout":
+            # Answers only once the server has stopped waiting and picked
+            await asyncio.sleep(elicitation_timeout + 0.05)
+            return ElicitResult(action="cancel")
+        await asyncio.sleep(answering["delay"])
+        return ElicitResult(action="accept", content={"selected_location_id": 1})
+
+    async def forget_choices(index: int) -> None:
+        await session.call_tool("forget_location_choices", {})
+
+    results: Dict[str, Dict[str, Any]] = {}
+    async with create_connected_server_and_client_session(
+        mcp._mcp_server, elicitation_callback=answer_elicitation
+    ) as session:
+        tools = (await session.list_tools()).tools
+        templates = (await session.list_resource_templates()).resourceTemplates
+        resources = (await session.list_resources()).resources
+        prompts = (await session.list_prompts()).prompts
+
+        for mode in modes:
+            if mode == "elicit":
+                results[mode] = await run_elicit_mode(
+                    session, tools, answering, forget_choices, iterations,
+                    concurrency, elicitation_delay
+                )
+                continue
+
+            def place(index: int, item: str) -> str:
+                if mode == "warm":
+                    return WARM_PLACES[index % len(WARM_PLACES)]
+                # Unknown names get fresh coordinates
+                return f"Bench{item.title().replace('_', '')}{index}"
+
+            items: List[Tuple[str, Callable[[int], Awaitable[bool]]]] = []
+            for tool in tools:
+                async def call_tool(index: int, tool=tool) -> bool:
+                    arguments = arguments_for(tool.inputSchema, place(index, tool.name))
+                    result = await session.call_tool(tool.name, arguments)
+                    return not result.isError
+                items.append((f"tool:{tool.name}", call_tool))
+            for template in templates:
+                async def read_template(index: int, template=template) -> bool:
+                    uri = template.uriTemplate.replace(
+                        "{location_name}", place(index, template.name)
+                    )
+                    return bool((await session.read_resource(uri)).contents)
+                items.append((f"resource:{template.uriTemplate}", read_template))
+            for resource in resources:
+                async def read_resource(index: int, resource=resource) -> bool:
+                    return bool((await session.read_resource(resource.uri)).contents)
+                items.append((f"resource:{resource.uri}", read_resource))
+            for prompt in prompts:
+                async def get_prompt(index: int, prompt=prompt) -> bool:
+                    arguments = prompt_arguments_for(prompt, place(index, prompt.name))
+                    prompt_result = await session.get_prompt(prompt.name, arguments)
+                    return bool(prompt_result.messages)
+                items.append((f"prompt:{prompt.name}", get_prompt))
+
+            results[mode] = {}
+            for name, call in items:
+                if mode == "warm":
+                    await call(0)  # Fill the caches before timing
+                results[mode][name] = await measure(call, iterations, concurrency)
+                print(f"{mode:5} {name:45} {results[mode][name]}")
+    return results
+
+
+async def run_elicit_mode(session, tools, answering: Dict[str, Any],
+                          forget_choices: Callable[[int], Awaitable[None]],
+                          iterations: int, concurrency: int,
+                          elicitation_delay: float) -> Dict[str, Any]:
+    """Time every tool that elicits for ELICIT_PLACE, answered and unanswered"""
+    results: Dict[str, Any] = {}
+    eliciting = []
+    answering.update(action="accept", delay=0.0)
+    for tool in tools:
+        if "location_name" not in tool.inputSchema.get("required", []):
+            continue
+        # Also fills the caches before timing
+        await forget_choices(0)
+        before = answering["asked"]
+        await session.call_tool(tool.name,
+                                arguments_for(tool.inputSchema, ELICIT_PLACE))
+        if answering["asked"] > before:
+            eliciting.append(tool)
+
+    for action, delay in (("accept", elicitation_delay), ("timeout", 0.0)):
+        answering.update(action=action, delay=delay)
+        for tool in eliciting:
+            async def call_tool(index: int, tool=tool) -> bool:
+                arguments = arguments_for(tool.inputSchema, ELICIT_PLACE)
+                result = await session.call_tool(tool.name, arguments)
+                return not result.isError
+
+            name = f"tool:{tool.name} {action}"
+            results[name] = await measure(call_tool, iterations, concurrency,
+                                          prepare=forget_choices)
+            print(f"elicit {name:44} {results[name]}")
+    answering.update(action="accept", delay=0.0)
+    return results
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any],
+            tolerance: float) -> List[str]:
+    """Describe every item that regressed against the baseline"""
+    regressions = []
+    for mode, items in report["results"].items():
+        for name, current in items.items():
+            previous = baseline.get("results", {}).get(mode, {}).get(name)
+            if previous is None:
+                continue
+            label = f"{mode} {name}"
+            if (current["p95_ms"] > previous["p95_ms"] * (1 + tolerance)
+                    and current["p95_ms"] - previous["p95_ms"] > MIN_REGRESSION_MS):
+                regressions.append(f"{label}: p95 {previous['p95_ms']}"
+                                   f" -> {current['p95_ms']} ms")
+            throughput = current["throughput_per_second"]
+            previous_throughput = previous["throughput_per_second"]
+            if throughput < previous_throughput * (1 - tolerance):
+                regressions.append(f"{label}: throughput {previous_throughput}"
+                                   f" -> {throughput}/s")
+            if current["errors"] > previous["errors"]:
+                regressions.append(f"{label}: errors {previous['errors']}"
+                                   f" -> {current['errors']}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=50,
+                        help="timed calls per item and mode")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="concurrent calls in the session")
+    parser.add_argument("--modes", default="warm,cold,elicit",
+                        help="comma-separated: warm, cold, elicit")
+    parser.add_argument("--upstream-latency", default="fixed:5",
+                        help="stand-in latency, see standin.py")
+    parser.add_argument("--upstream-errors", default="",
+                        help="stand-in error injection, see standin.py")
+    parser.add_argument("--elicitation-delay", type=float, default=0.05,
+                        help="seconds the client takes to answer in the elicit mode")
+    parser.add_argument("--elicitation-timeout", type=float, default=0.2,
+                        help="server elicitation timeout in seconds for the"
+                             " elicit mode")
+    parser.add_argument("--output", type=Path, help="write the JSON report here")
+    parser.add_argument("--baseline", type=Path, help="compare with this report")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help=f"also write the report to {DEFAULT_BASELINE.name}")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative regression")
+    args = parser.parse_args()
+
+    # Point the server at the stand-in, with a private persistent cache,
+    # before its configuration is imported
+    port = free_port()
+    os.environ["OPEN_METEO_STANDIN_URL"] = f"http://127.0.0.1:{port}"
+    os.environ["XDG_CACHE_HOME"] = tempfile.mkdtemp(prefix="bench-e2e-")
+    from mcp_open_meteo_elicit import location_resolver  # noqa: E402
+    from mcp_open_meteo_elicit.server import mcp  # noqa: E402
+    location_resolver.ELICITATION_TIMEOUT_SECONDS = args.elicitation_timeout
+    logging.disable(logging.INFO)  # Per-request logs would dominate the timings
+
+    standin = start_standin(port, args.upstream_latency, args.upstream_errors)
+    elicitations: Dict[str, int] = {}
+    try:
+        results = asyncio.run(run_suite(
+            mcp, args.modes.split(","), args.iterations, args.concurrency,
+            elicitations, args.elicitation_delay, args.elicitation_timeout
+        ))
+    finally:
+        standin.should_exit = True
+
+    report = {
+        "meta": {
+            "server": mcp.name,
+            "package": "mcp_open_meteo_elicit",
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "upstream_latency": args.upstream_latency,
+            "upstream_errors": args.upstream_errors,
+            "elicitation_delay": args.elicitation_delay,
+            "elicitation_timeout": args.elicitation_timeout,
+            "elicitations": elicitations,
+        },
+        "results": results,
+    }
+    paths = [args.output, DEFAULT_BASELINE if args.save_baseline else None]
+    for path in filter(None, paths):
+        path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Report written to {path}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        for setting in ("concurrency", "upstream_latency", "upstream_errors",
+                        "elicitation_delay", "elicitation_timeout"):
+            if baseline["meta"].get(setting) != report["meta"][setting]:
+                recorded = baseline["meta"].get(setting)
+                print(f"WARNING baseline was recorded with {setting}={recorded!r}")
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Micro-benchmark: offline gazetteer open time and lookups of real city names.
+
+Looks up a fixed list of city names (large and mid-sized cities, names with
+diacritics, ambiguous names and a few small towns a cities extract may not
+include) in a gazetteer file and reports the time to open it, the lookup
+latency percentiles, the hit rate and the names it missed. Pass a built
+gazetteer, or a GeoNames cities extract to build one into a temporary file:
+
+    uv run python benchmarks/bench_gazetteer.py gazetteer.bin
+    uv run python benchmarks/bench_gazetteer.py --geonames cities15000.txt \\
+        --countries countryInfo.txt --admin1 admin1CodesASCII.txt
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mcp_open_meteo_elicit.gazetteer import Gazetteer, build_gazetteer  # noqa: E402
+from mcp_open_meteo_elicit.geocoding import interned_locations, location_info  # noqa: E402
+
+CITY_NAMES = [
+    "London", "Paris", "Berlin", "Madrid", "Rome", "Vienna", "Warsaw", "Prague",
+    "Budapest", "Amsterdam", "Brussels", "Copenhagen", "Stockholm", "Oslo", "Helsinki",
+    "Dublin", "Lisbon", "Athens", "Istanbul", "Moscow", "Kyiv", "Bucharest", "Sofia",
+    "Belgrade", "Zagreb", "Munich", "Hamburg", "Frankfurt am Main", "Milan", "Naples",
+    "Barcelona", "Valencia", "Seville", "Porto", "Lyon", "Marseille", "Manchester",
+    "Birmingham", "Glasgow", "Edinburgh", "New York City", "Los Angeles", "Chicago",
+    "Houston", "Phoenix", "Philadelphia", "San Antonio", "San Diego", "Dallas",
+    "San Francisco", "Seattle", "Boston", "Denver", "Miami", "Atlanta", "Toronto",
+    "Montreal", "Vancouver", "Mexico City", "Guadalajara", "Bogota", "Lima", "Santiago",
+    "Buenos Aires", "Rio de Janeiro", "Caracas", "Havana", "Cairo", "Lagos", "Nairobi",
+    "Johannesburg", "Cape Town", "Casablanca", "Addis Ababa", "Accra", "Tokyo", "Osaka",
+    "Seoul", "Beijing", "Shanghai", "Hong Kong", "Taipei", "Bangkok", "Hanoi",
+    "Singapore", "Kuala Lumpur", "Jakarta", "Manila", "Mumbai", "Delhi", "Bengaluru",
+    "Karachi", "Dhaka", "Tehran", "Baghdad", "Riyadh", "Dubai", "Tel Aviv", "Sydney",
+    "Melbourne", "Brisbane", "Perth", "Auckland", "Wellington",
+    # Diacritics and case variations
+    "São Paulo", "Zürich", "Kraków", "Málaga", "Köln", "Reykjavík", "Göteborg",
+    "Düsseldorf", "Montréal", "Bogotá", "Ciudad de México", "ZURICH", "sao paulo",
+    # Ambiguous names
+    "Springfield", "Portland", "Cambridge", "Richmond", "Victoria", "Alexandria",
+    # Small places a cities extract may leave out
+    "Hallstatt", "Giethoorn", "Portmeirion", "Bibury", "Rothenburg ob der Tauber",
+]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    rank = round(fraction * len(sorted_values) + 0.5)
+    index = max(0, min(len(sorted_values) - 1, rank - 1))
+    return sorted_values[index]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("gazetteer", nargs="?", help="gazetteer file to benchmark")
+    parser.add_argument("--geonames",
+                        help="build the gazetteer from this GeoNames cities file")
+    parser.add_argument("--countries", help="GeoNames countryInfo.txt, when building")
+    parser.add_argument("--admin1", help="GeoNames admin1CodesASCII.txt, when building")
+    parser.add_argument("--repeat", type=int, default=200, help="lookups per name")
+    args = parser.parse_args()
+    if not args.gazetteer and not args.geonames:
+        parser.error("pass a gazetteer file or --geonames")
+
+    path = args.gazetteer
+    if args.geonames:
+        directory = tempfile.mkdtemp(prefix="bench-gazetteer-")
+        path = os.path.join(directory, "gazetteer.bin")
+        start = time.perf_counter()
+        places, keys = build_gazetteer(args.geonames, path, args.countries, args.admin1)
+        print(f"built {places} places under {keys} names"
+              f" in {time.perf_counter() - start:.2f} s")
+    print(f"file size {os.path.getsize(path) / 1024:.0f} KiB")
+
+    start = time.perf_counter()
+    gazetteer = Gazetteer(path)
+    print(f"open {(time.perf_counter() - start) * 1e6:.0f} us")
+
+    latencies: List[float] = []
+    misses = []
+    for name in CITY_NAMES:
+        if not gazetteer.lookup(name):
+            misses.append(name)
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            gazetteer.lookup(name)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    hits = len(CITY_NAMES) - len(misses)
+    print(f"lookups {len(latencies)}: p50 {percentile(latencies, 0.50) * 1e6:.1f} us,"
+          f" p95 {percentile(latencies, 0.95) * 1e6:.1f} us,"
+          f" p99 {percentile(latencies, 0.99) * 1e6:.1f} us,"
+          f" {len(latencies) / sum(latencies):,.0f}/s")
+    print(f"hit rate {hits}/{len(CITY_NAMES)} ({hits / len(CITY_NAMES):.0%})")
+    if misses:
+        print("missed: " + ", ".join(misses))
+
+    # Resolution as resolve_location does it: the first place, as an interned model
+    interned_locations.clear()
+    found = [name for name in CITY_NAMES if name not in misses]
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for name in found:
+            location_info(gazetteer.lookup(name, limit=10)[0])
+    elapsed = time.perf_counter() - start
+    per_name = elapsed / (args.repeat * len(found))
+    print(f"resolve to LocationInfo {per_name * 1e6:.1f} us per name")
+
+
+if __name__ == "__main__":
+    main()
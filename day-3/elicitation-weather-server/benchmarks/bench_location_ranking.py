@@ -0,0 +1,131 @@
+"""
+Replay benchmark: elicitation rate and resolution latency of location ranking.
+
+Replays a query log written by the server with MCP_OPEN_METEO_QUERY_LOG set
+(see ``location_ranking``): every resolution of a name with several
+candidates, in order and per session. "Before" is the server without
+ranking, which asks the user about every such name; "after" ranks the
+candidates with ``LocationRanker`` and asks only when no candidate leads by
+the margin. For each margin the report gives the elicitation rate, how many
+automatic picks differ from the place the user chose, and the mean and p95
+resolution latency, counting each elicitation at the time the user took to
+answer it in the log (or ``--elicitation-seconds`` when not recorded) plus
+the measured ranking time.
+
+    uv run python benchmarks/bench_location_ranking.py
+    MCP_OPEN_METEO_QUERY_LOG=queries.jsonl uv run mcp-open-meteo-elicit
+    uv run python benchmarks/bench_location_ranking.py queries.jsonl \\
+        --margin 0.05 --margin 0.1
+
+Without a log, ``benchmarks/query_log_sample.jsonl`` is used: a small
+hand-written log in the same format with the usual ambiguous names
+("Paris", "Springfield", "Portland", ...) asked by travellers and by users
+in the US and the UK.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+BENCHMARKS = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARKS.parent))
+
+from mcp_open_meteo_elicit.config import AUTO_RESOLVE_MARGIN  # noqa: E402
+from mcp_open_meteo_elicit.location_ranking import LocationRanker  # noqa: E402
+
+DEFAULT_LOG = BENCHMARKS / "query_log_sample.jsonl"
+
+
+class _Session:
+    """Stands in for an MCP session, which the ranker tracks by identity"""
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    rank = round(fraction * len(sorted_values) + 0.5)
+    index = max(0, min(len(sorted_values) - 1, rank - 1))
+    return sorted_values[index]
+
+
+def replay(entries: List[Dict[str, Any]], margin: float,
+           elicitation_seconds: float) -> Dict[str, Any]:
+    """Resolve every logged query with a fresh ranker; returns counts and latencies"""
+    ranker = LocationRanker(margin=margin)
+    sessions: Dict[str, _Session] = {}
+    latencies: List[float] = []
+    elicited = 0
+    wrong = []
+    for entry in entries:
+        session = sessions.setdefault(entry["session"], _Session())
+        candidates = entry["candidates"]
+        chosen = next(place for place in candidates if place["id"] == entry["chosen"])
+        start = time.perf_counter()
+        best = ranker.pick(ranker.rank(session, entry["query"], candidates))
+        latency = time.perf_counter() - start
+        if best is None:
+            elicited += 1
+            latency += entry.get("elicitation_seconds") or elicitation_seconds
+        elif best["id"] != chosen["id"] and entry.get("elicited", True):
+            wrong.append(f"{entry['query']} -> {best.get('admin1') or best['country']}"
+                         f" (wanted {chosen.get('admin1') or chosen['country']})")
+        latencies.append(latency)
+        # The session goes on with the place the user wanted
+        ranker.note(session, entry["query"], chosen)
+    latencies.sort()
+    return {"elicited": elicited, "wrong": wrong, "latencies": latencies}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("log", nargs="?", default=str(DEFAULT_LOG),
+                        help="query log to replay")
+    parser.add_argument("--margin", type=float, action="append",
+                        help="auto-resolution margin(s) to compare"
+                             f" (default: {AUTO_RESOLVE_MARGIN} and neighbours)")
+    parser.add_argument("--elicitation-seconds", type=float,
+                        help="time to answer an elicitation when the log has none"
+                             " (default: median of the log)")
+    args = parser.parse_args()
+
+    with open(args.log, encoding="utf-8") as log:
+        entries = [json.loads(line) for line in log if line.strip()]
+    entries = [entry for entry in entries if len(entry["candidates"]) > 1]
+    recorded = [entry["elicitation_seconds"] for entry in entries
+                if entry.get("elicitation_seconds")]
+    elicitation_seconds = args.elicitation_seconds or (
+        statistics.median(recorded) if recorded else 10.0
+    )
+    margins = args.margin or [
+        AUTO_RESOLVE_MARGIN / 2, AUTO_RESOLVE_MARGIN, AUTO_RESOLVE_MARGIN * 1.5
+    ]
+    sessions = len({entry["session"] for entry in entries})
+    print(f"{len(entries)} ambiguous resolutions in {sessions} sessions"
+          f" from {args.log}")
+
+    before = [entry.get("elicitation_seconds") or elicitation_seconds
+              for entry in entries]
+    before.sort()
+    print(f"before: elicited {len(entries)}/{len(entries)} (100%),"
+          f" latency mean {statistics.mean(before):.2f} s,"
+          f" p95 {percentile(before, 0.95):.2f} s")
+    for margin in margins:
+        result = replay(entries, margin, elicitation_seconds)
+        latencies = result["latencies"]
+        ranking = sorted(latency for latency in latencies if latency < 1)
+        print(f"margin {margin:.3f}: elicited {result['elicited']}/{len(entries)}"
+              f" ({result['elicited'] / len(entries):.0%}),"
+              f" wrong picks {len(result['wrong'])},"
+              f" latency mean {statistics.mean(latencies):.2f} s,"
+              f" p95 {percentile(latencies, 0.95):.2f} s"
+              + (f", ranking p50 {percentile(ranking, 0.5) * 1e6:.0f} us"
+                 if ranking else ""))
+        for pick in result["wrong"]:
+            print(f"    {pick}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Micro-benchmark: typo-tolerant place search over the trigram index.
+
+Indexes the names in a gazetteer file, then searches misspellings of the
+city names in ``bench_gazetteer`` (one letter dropped, doubled or swapped
+with the next) and reports the index build time, the search latency
+percentiles and how often the intended city is the best match at
+FUZZY_MIN_SIMILARITY (as used when the geocoding API finds nothing):
+
+    uv run python benchmarks/bench_place_index.py gazetteer.bin
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_gazetteer import CITY_NAMES, percentile  # noqa: E402
+
+from mcp_open_meteo_elicit import gazetteer as gazetteer_module  # noqa: E402
+from mcp_open_meteo_elicit.config import FUZZY_MIN_SIMILARITY  # noqa: E402
+from mcp_open_meteo_elicit.geocoding import normalize_query  # noqa: E402
+from mcp_open_meteo_elicit.place_index import PlaceIndex  # noqa: E402
+
+
+def misspellings(name: str, rng: random.Random) -> List[str]:
+    """The name with a letter dropped, one doubled and two swapped"""
+    i = rng.randrange(1, len(name) - 1)
+    return [name[:i] + name[i + 1:], name[:i] + name[i] + name[i:],
+            name[:i] + name[i + 1] + name[i] + name[i + 2:]]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("gazetteer", help="gazetteer file whose names are indexed")
+    parser.add_argument("--repeat", type=int, default=50,
+                        help="searches per misspelling")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    gazetteer_module.gazetteer = gazetteer_module.Gazetteer(args.gazetteer)
+    index = PlaceIndex(index_gazetteer=True)
+    start = time.perf_counter()
+    index.search("warm up")
+    print(f"indexed {len(index)} names in {time.perf_counter() - start:.2f} s")
+
+    rng = random.Random(args.seed)
+    queries: List[Tuple[str, str]] = [
+        (normalize_query(name), typo)
+        for name in CITY_NAMES if gazetteer_module.gazetteer.lookup(name)
+        for typo in misspellings(name, rng)
+    ]
+    latencies: List[float] = []
+    found = 0
+    for intended, typo in queries:
+        matches = index.search(typo, 10, FUZZY_MIN_SIMILARITY)
+        found += bool(matches) and normalize_query(matches[0][1]["name"]) == intended
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            index.search(typo, 10, FUZZY_MIN_SIMILARITY)
+            latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(f"similarity >= {FUZZY_MIN_SIMILARITY}:"
+          f" p50 {percentile(latencies, 0.50) * 1e6:.1f} us,"
+          f" p95 {percentile(latencies, 0.95) * 1e6:.1f} us,"
+          f" p99 {percentile(latencies, 0.99) * 1e6:.1f} us;"
+          f" intended city first for {found}/{len(queries)}"
+          f" ({found / len(queries):.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+"""
+Local stand-in for the Open-Meteo geocoding and forecast APIs.
+
+Serves ``/v1/search`` and ``/v1/forecast`` with the same request parameters
+and response shape as Open-Meteo, so the server can be benchmarked and load
+tested without touching the public endpoints. Responses come from recorded
+fixtures when available and are otherwise generated: deterministic per grid
+cell and day, for any variable list, multi-coordinate requests,
+forecast_days/forecast_hours and units. FlatBuffers responses are not
+supported.
+
+    uv run python benchmarks/standin.py --port 8089 \\
+        --latency lognormal:40,0.5 --errors 429:0.02,500:0.01,timeout:0.005
+
+    OPEN_METEO_STANDIN_URL=http://127.0.0.1:8089 uv run mcp-open-meteo
+
+Latency is one of ``fixed:MS``, ``uniform:LOW,HIGH``, ``normal:MEAN,SD`` or
+``lognormal:MEDIAN,SIGMA`` (milliseconds). ``--errors`` injects 429, 500,
+502, 503 or 504 responses and timeouts (the response is held for
+``--timeout-seconds``) with the given probabilities. ``--pad-bytes`` inflates
+every response. ``GET /stats`` reports what was served.
+
+With ``--fixtures DIR`` a response recorded for the exact request is served
+as is; add ``--record`` to fetch missing ones from the live API and save
+them. ``create_app`` builds the ASGI app for in-process use (e.g. with
+``httpx.ASGITransport``).
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+LIVE_URLS = {
+    "/v1/search": "https://geocoding-api.open-meteo.com/v1/search",
+    "/v1/forecast": "https://api.open-meteo.com/v1/forecast",
+}
+
+# A few real places, including ambiguous names for the elicitation flow
+GAZETTEER = [
+    dict(id=2643743, name="London", latitude=51.50853, longitude=-0.12574,
+         elevation=25.0, country="United Kingdom", country_code="GB", admin1="England",
+         timezone="Europe/London", population=8961989, feature_code="PPLC"),
+    dict(id=6058560, name="London", latitude=42.98339, longitude=-81.23304,
+         elevation=251.0, country="Canada", country_code="CA", admin1="Ontario",
+         timezone="America/Toronto", population=346765, feature_code="PPL"),
+    dict(id=2950159, name="Berlin", latitude=52.52437, longitude=13.41053,
+         elevation=74.0, country="Germany", country_code="DE", admin1="Land Berlin",
+         timezone="Europe/Berlin", population=3426354, feature_code="PPLC"),
+    dict(id=2988507, name="Paris", latitude=48.85341, longitude=2.3488, elevation=42.0,
+         country="France", country_code="FR", admin1="Île-de-France",
+         timezone="Europe/Paris", population=2138551, feature_code="PPLC"),
+    dict(id=4717560, name="Paris", latitude=33.66094, longitude=-95.55551,
+         elevation=183.0, country="United States", country_code="US", admin1="Texas",
+         timezone="America/Chicago", population=24782, feature_code="PPLA2"),
+    dict(id=5128581, name="New York", latitude=40.71427, longitude=-74.00597,
+         elevation=10.0, country="United States", country_code="US", admin1="New York",
+         timezone="America/New_York", population=8804190, feature_code="PPL"),
+    dict(id=1850147, name="Tokyo", latitude=35.6895, longitude=139.69171,
+         elevation=44.0, country="Japan", country_code="JP", admin1="Tokyo",
+         timezone="Asia/Tokyo", population=8336599, feature_code="PPLC"),
+    dict(id=2147714, name="Sydney", latitude=-33.86785, longitude=151.20732,
+         elevation=58.0,
+         country="Australia", country_code="AU", admin1="New South Wales",
+         timezone="Australia/Sydney", population=4627345, feature_code="PPLA"),
+    dict(id=1275339, name="Mumbai", latitude=19.07283, longitude=72.88261,
+         elevation=14.0, country="India", country_code="IN", admin1="Maharashtra",
+         timezone="Asia/Kolkata", population=12691836, feature_code="PPLA"),
+    dict(id=4409896, name="Springfield", latitude=37.21533, longitude=-93.29824,
+         elevation=398.0, country="United States", country_code="US", admin1="Missouri",
+         timezone="America/Chicago", population=166810, feature_code="PPLA2"),
+    dict(id=4250542, name="Springfield", latitude=39.80172, longitude=-89.64371,
+         elevation=180.0, country="United States", country_code="US", admin1="Illinois",
+         timezone="America/Chicago", population=114230, feature_code="PPLA"),
+    dict(id=4951788, name="Springfield", latitude=42.10148, longitude=-72.58981,
+         elevation=21.0,
+         country="United States", country_code="US", admin1="Massachusetts",
+         timezone="America/New_York", population=153606, feature_code="PPLA2"),
+]
+
+WEATHER_CODES = [0, 0, 0, 1, 1, 2, 2, 3, 3, 45, 51, 61, 63, 71, 80, 95]
+TEMPERATURE_UNITS = {"celsius": ("°C", 1.0, 0.0), "fahrenheit": ("°F", 1.8, 32.0)}
+WIND_SPEED_UNITS = {
+    "kmh": ("km/h", 1.0), "ms": ("m/s", 1 / 3.6), "mph": ("mp/h", 1 / 1.609344),
+    "kn": ("kn", 1 / 1.852),
+}
+PRECIPITATION_UNITS = {"mm": ("mm", 1.0), "inch": ("inch", 1 / 25.4)}
+
+
+@dataclass
+class StandinOptions:
+    """How the stand-in behaves; see the module docstring for the CLI equivalents"""
+    latency: str = "fixed:0"
+    errors: Dict[str, float] = field(default_factory=dict)
+    timeout_seconds: float = 30.0
+    pad_bytes: int = 0
+    html_errors: bool = False  # Send error bodies as HTML instead of Open-Meteo's JSON
+    unknown_places: str = "synthesize"  # or "empty"
+    fixtures: Optional[Path] = None
+    record: bool = False
+    seed: int = 0
+
+
+def parse_latency(spec: str):
+    """Turn a latency spec into a function drawing a delay in seconds"""
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        return lambda rng: values[0] / 1000
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1])) / 1000
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1]) / 1000
+    raise ValueError(f"Unknown latency distribution '{spec}'")
+
+
+def parse_errors(spec: str) -> Dict[str, float]:
+    """Parse ``429:0.02,500:0.01,timeout:0.005`` into {kind: probability}"""
+    errors = {}
+    for item in filter(None, spec.split(",")):
+        kind, _, probability = item.partition(":")
+        if kind not in ("429", "500", "502", "503", "504", "timeout"):
+            raise ValueError(f"Unknown error kind '{kind}'")
+        errors[kind] = float(probability)
+    return errors
+
+
+def _cell_rng(*parts: Any) -> random.Random:
+    """Deterministic generator for one grid cell (and day)"""
+    digest = hashlib.sha1(repr(parts).encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _series(name: str, count: int, rng: random.Random, latitude: float,
+            start: datetime, step: timedelta) -> List[Any]:
+    """Plausible values for one variable, chosen by its name"""
+    if "weather_code" in name:
+        return [rng.choice(WEATHER_CODES) for _ in range(count)]
+    if "direction" in name:
+        return [rng.randrange(360) for _ in range(count)]
+    if "humidity" in name or "cloud" in name or "probability" in name:
+        return [rng.randrange(101) for _ in range(count)]
+    if "temperature" in name:
+        shift = 4 if "max" in name else -4 if "min" in name else 0
+        base = 25 - abs(latitude) * 0.35 + shift
+        values = []
+        hourly = step < timedelta(days=1)
+        for i in range(count):
+            hour = (start + step * i).hour
+            diurnal = 5 * math.sin(2 * math.pi * (hour - 9) / 24) if hourly else 0
+            values.append(round(base + diurnal + rng.gauss(0, 1.5), 1))
+        return values
+    if any(word in name for word in ("precipitation", "rain", "showers", "snowfall")):
+        return [round(rng.expovariate(1.5), 1) if rng.random() < 0.2 else 0.0
+                for _ in range(count)]
+    if "wind" in name:
+        top = 45 if "gusts" in name else 30
+        return [round(rng.uniform(2, top), 1) for _ in range(count)]
+    if "pressure" in name:
+        return [round(rng.uniform(995, 1030), 1) for _ in range(count)]
+    return [round(rng.uniform(0, 10), 1) for _ in range(count)]
+
+
+def _unit(name: str, query: Dict[str, str]) -> Tuple[str, float, float]:
+    """(label, scale, offset) for a variable in the requested units"""
+    if "weather_code" in name:
+        return "wmo code", 1.0, 0.0
+    if "direction" in name:
+        return "°", 1.0, 0.0
+    if "humidity" in name or "cloud" in name or "probability" in name:
+        return "%", 1.0, 0.0
+    if "temperature" in name:
+        return TEMPERATURE_UNITS[query.get("temperature_unit", "celsius")]
+    if "snowfall" in name:
+        return "cm", 1.0, 0.0
+    if any(word in name for word in ("precipitation", "rain", "showers")):
+        label, scale = PRECIPITATION_UNITS[query.get("precipitation_unit", "mm")]
+        return label, scale, 0.0
+    if "wind" in name:
+        label, scale = WIND_SPEED_UNITS[query.get("wind_speed_unit", "kmh")]
+        return label, scale, 0.0
+    if "pressure" in name:
+        return "hPa", 1.0, 0.0
+    return "", 1.0, 0.0
+
+
+def _convert(values: List[Any], scale: float, offset: float) -> List[Any]:
+    if scale == 1.0 and offset == 0.0:
+        return values
+    return [round(v * scale + offset, 1) for v in values]
+
+
+def synthesize_forecast(latitude: float, longitude: float, query: Dict[str, str],
+                        now: datetime) -> Dict[str, Any]:
+    """Generate one location's forecast response for the query"""
+    days = int(query.get("forecast_days", 7))
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    cell = (round(latitude, 2), round(longitude, 2), midnight.date().isoformat())
+    data: Dict[str, Any] = {
+        "latitude": round(latitude, 4), "longitude": round(longitude, 4),
+        "generationtime_ms": 0.1, "utc_offset_seconds": 0,
+        "timezone": "GMT", "timezone_abbreviation": "GMT",
+        "elevation": round(_cell_rng(*cell[:2]).uniform(0, 500)),
+    }
+
+    if query.get("current"):
+        names = query["current"].split(",")
+        stamp = now.replace(minute=now.minute - now.minute % 15,
+                            second=0, microsecond=0)
+        data["current_units"] = {"time": "iso8601", "interval": "seconds"}
+        data["current"] = {"time": stamp.strftime("%Y-%m-%dT%H:%M"), "interval": 900}
+        for name in names:
+            label, scale, offset = _unit(name, query)
+            cell_rng = _cell_rng(*cell, "current", stamp.isoformat(), name)
+            value = _series(name, 1, cell_rng, latitude, stamp, timedelta(minutes=15))
+            data["current_units"][name] = label
+            data["current"][name] = _convert(value, scale, offset)[0]
+
+    blocks = []
+    if query.get("hourly"):
+        if "forecast_hours" in query:
+            start = now.replace(minute=0, second=0, microsecond=0)
+            count = int(query["forecast_hours"])
+        else:
+            start, count = midnight, days * 24
+        blocks.append(("hourly", query["hourly"], start, timedelta(hours=1), count,
+                       "%Y-%m-%dT%H:%M"))
+    if query.get("daily"):
+        blocks.append(("daily", query["daily"], midnight, timedelta(days=1), days,
+                       "%Y-%m-%d"))
+    for block, names, start, step, count, time_format in blocks:
+        data[f"{block}_units"] = {"time": "iso8601"}
+        data[block] = {
+            "time": [(start + step * i).strftime(time_format) for i in range(count)]
+        }
+        for name in names.split(","):
+            label, scale, offset = _unit(name, query)
+            cell_rng = _cell_rng(*cell, block, name)
+            values = _series(name, count, cell_rng, latitude, start, step)
+            data[f"{block}_units"][name] = label
+            data[block][name] = _convert(values, scale, offset)
+    return data
+
+
+def search_places(name: str, count: int, unknown_places: str) -> List[Dict[str, Any]]:
+    """Lookup by case-insensitive name prefix, optionally inventing unknown places"""
+    needle = name.strip().lower()
+    matches = [place for place in GAZETTEER if place["name"].lower().startswith(needle)]
+    matches.sort(key=lambda place: -place["population"])
+    if not matches and unknown_places == "synthesize" and needle:
+        rng = _cell_rng("place", needle)
+        matches = [dict(
+            id=100000000 + rng.randrange(10 ** 8), name=name.strip().title(),
+            latitude=round(rng.uniform(-60, 70), 5),
+            longitude=round(rng.uniform(-180, 180), 5),
+            elevation=float(rng.randrange(0, 1500)),
+            country="Standinland", country_code="SL",
+            admin1="Synthetic", timezone="GMT", population=rng.randrange(1000, 2000000),
+            feature_code="PPL",
+        )]
+    return matches[:count]
+
+
+def create_app(options: Optional[StandinOptions] = None) -> Starlette:
+    """Build the stand-in ASGI app"""
+    options = options or StandinOptions()
+    rng = random.Random(options.seed)
+    draw_latency = parse_latency(options.latency)
+    stats: Counter = Counter()
+
+    def error(status: int, reason: str,
+              headers: Optional[Dict[str, str]] = None) -> Response:
+        stats[f"status_{status}"] += 1
+        if options.html_errors:
+            html = f"<html><body><h1>{status}</h1>{reason}</body></html>"
+            return Response(html, status, headers=headers, media_type="text/html")
+        return JSONResponse({"error": True, "reason": reason}, status, headers=headers)
+
+    def respond(body: Any) -> Response:
+        if options.pad_bytes and isinstance(body, dict):
+            body = dict(body, padding="x" * options.pad_bytes)
+        elif options.pad_bytes and isinstance(body, list):
+            body = [dict(body[0], padding="x" * options.pad_bytes)] + body[1:]
+        if isinstance(body, bytes):
+            content = body
+        else:
+            content = json.dumps(body, ensure_ascii=False).encode()
+        stats["status_200"] += 1
+        stats["bytes_sent"] += len(content)
+        return Response(content, 200, media_type="application/json")
+
+    async def fixture_or(request: Request, generate) -> Response:
+        """Serve the recorded fixture for this exact request, or call `generate`"""
+        if options.fixtures is None:
+            return generate()
+        params = sorted(request.query_params.multi_items())
+        query = "&".join(f"{k}={v}" for k, v in params)
+        key = hashlib.sha1(f"{request.url.path}?{query}".encode()).hexdigest()[:16]
+        endpoint = request.url.path.strip("/").replace("/", "_")
+        path = options.fixtures / f"{endpoint}-{key}.json"
+        if path.exists():
+            stats["fixture_hits"] += 1
+            return respond(path.read_bytes())
+        if options.record:
+            import httpx
+            async with httpx.AsyncClient(timeout=30) as client:
+                live = await client.get(LIVE_URLS[request.url.path],
+                                        params=request.query_params)
+            if live.status_code == 200:
+                options.fixtures.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(live.content)
+                stats["fixtures_recorded"] += 1
+            return Response(live.content, live.status_code,
+                            media_type="application/json")
+        return generate()
+
+    async def inject(request: Request) -> Optional[Response]:
+        """Apply latency and maybe return an injected failure"""
+        stats[f"requests{request.url.path.replace('/', '_')}"] += 1
+        await asyncio.sleep(draw_latency(rng))
+        roll = rng.random()
+        for kind, probability in options.errors.items():
+            if roll < probability:
+                if kind == "timeout":
+                    stats["timeouts"] += 1
+                    await asyncio.sleep(options.timeout_seconds)
+                    return error(504, "Gateway timeout (injected)")
+                headers = {"Retry-After": "1"} if kind == "429" else None
+                return error(int(kind), f"Injected {kind} error", headers)
+            roll -= probability
+        return None
+
+    async def search(request: Request) -> Response:
+        failure = await inject(request)
+        if failure is not None:
+            return failure
+        name = request.query_params.get("name", "")
+        count = int(request.query_params.get("count", 10))
+
+        def generate() -> Response:
+            results = search_places(name, count, options.unknown_places)
+            body: Dict[str, Any] = {"generationtime_ms": 0.1}
+            if results:
+                body = {"results": results, **body}
+            return respond(body)
+        return await fixture_or(request, generate)
+
+    async def forecast(request: Request) -> Response:
+        failure = await inject(request)
+        if failure is not None:
+            return failure
+        query = dict(request.query_params)
+        if query.get("format") == "flatbuffers":
+            return error(400, "The stand-in only serves JSON")
+        try:
+            latitudes = [float(v) for v in query["latitude"].split(",")]
+            longitudes = [float(v) for v in query["longitude"].split(",")]
+        except (KeyError, ValueError):
+            return error(400, "Parameter 'latitude' and 'longitude' must be set"
+                              " and numeric")
+        if len(latitudes) != len(longitudes):
+            return error(400, "Parameter 'latitude' and 'longitude' must have the same"
+                              " number of elements")
+        if not 0 <= int(query.get("forecast_days", 7)) <= 16:
+            return error(400, "Forecast days is invalid. Allowed range 0 to 16.")
+        for parameter, units in (("temperature_unit", TEMPERATURE_UNITS),
+                                 ("wind_speed_unit", WIND_SPEED_UNITS),
+                                 ("precipitation_unit", PRECIPITATION_UNITS)):
+            if query.get(parameter, next(iter(units))) not in units:
+                return error(400, f"Cannot initialize {parameter} from invalid String"
+                                  f" value {query[parameter]}")
+
+        def generate() -> Response:
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            points = [synthesize_forecast(lat, lon, query, now)
+                      for lat, lon in zip(latitudes, longitudes)]
+            return respond(points[0] if len(points) == 1 else points)
+        return await fixture_or(request, generate)
+
+    async def stats_endpoint(request: Request) -> Response:
+        return JSONResponse(dict(stats))
+
+    return Starlette(routes=[
+        Route("/v1/search", search),
+        Route("/v1/forecast", forecast),
+        Route("/stats", stats_endpoint),
+    ])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="fixed:0",
+                        help="latency distribution in ms, e.g. lognormal:40,0.5")
+    parser.add_argument("--errors", default="",
+                        help="error probabilities,"
+                             " e.g. 429:0.02,500:0.01,timeout:0.005")
+    parser.add_argument("--timeout-seconds", type=float, default=30.0,
+                        help="how long injected timeouts hang")
+    parser.add_argument("--pad-bytes", type=int, default=0,
+                        help="extra bytes added to every response")
+    parser.add_argument("--html-errors", action="store_true",
+                        help="send error bodies as HTML")
+    parser.add_argument("--unknown-places", choices=["synthesize", "empty"],
+                        default="synthesize")
+    parser.add_argument("--fixtures", type=Path, help="directory of recorded responses")
+    parser.add_argument("--record", action="store_true",
+                        help="record missing fixtures from the live API")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    parse_latency(args.latency)  # Fail fast on a bad spec
+
+    import uvicorn
+    app = create_app(StandinOptions(
+        latency=args.latency, errors=parse_errors(args.errors),
+        timeout_seconds=args.timeout_seconds, pad_bytes=args.pad_bytes,
+        html_errors=args.html_errors, unknown_places=args.unknown_places,
+        fixtures=args.fixtures, record=args.record, seed=args.seed,
+    ))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
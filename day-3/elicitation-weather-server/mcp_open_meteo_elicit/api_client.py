@@ -3,60 +3,640 @@ API client for interacting with Open-Meteo services.
 
 This module handles all HTTP communication with the Open-Meteo geocoding
 and weather forecast APIs, including error handling and response parsing.
+
+All requests go through one long-lived, pooled ``httpx.AsyncClient`` so that
+DNS, TCP and TLS setup is paid once per upstream host instead of once per
+tool call. The server lifespan owns that client (see ``http_client_lifespan``);
+callers may also pass their own client explicitly.
+
+Forecast responses are kept in an in-process TTL cache keyed on the model
+grid cell and the requested variables; ``cached_weather_data`` lists them per
+cell for the query planner. They are always fetched in metric units and
+converted locally (see ``units``), so callers asking for different units
+share upstream requests and cache entries. Identical requests that
+are already in flight are coalesced so concurrent callers share one
+upstream round-trip. Several points can be fetched in one multi-coordinate
+request with ``get_weather_data_many``, and an optional dispatcher merges
+concurrent single-point requests the same way.
+
+Responses are decoded with the fastest available JSON library and hourly/daily
+series are returned as typed columns (see ``columnar``). Forecasts can
+optionally be fetched in Open-Meteo's FlatBuffers format instead (see
+``flatbuffers_transport``), falling back to JSON when that is unavailable.
+
+Geocoding results are cached in memory under a normalized query, with
+empty results cached for a shorter time (see ``geocoding``). They and
+forecasts are also written to a persistent SQLite cache shared by all server
+processes on the host (see ``persistent_cache``) and looked up there on a
+memory cache miss. Every place found is also added to a trigram index (see
+``place_index``), which matches misspelled names the geocoding API finds
+nothing for.
+
+Upstream requests, payload sizes, decode times and cache lookups are
+recorded in ``metrics``, where the caches, breakers and request coalescing
+also report their stats, and traced as spans when ``tracing`` is enabled.
+
+Every upstream request goes through ``resilience``: transient failures are
+retried with backoff and each endpoint has a circuit breaker. Forecasts that
+have just expired are served stale while a background request refreshes
+them, so a slow or failing upstream does not hold up callers that have
+recent data.
+
+With HEDGE_ENABLED, requests that are slow compared with the endpoint's
+recent latencies are sent a second time and the first answer is used (see
+``hedging``).
+
+Under a tool's latency budget (see ``resilience.within_budget``) requests
+are cut off when the budget runs out. Geocoding results and forecasts that
+time out are then answered from expired cached data when there is any, up
+to TIMEOUT_FALLBACK_MAX_AGE_SECONDS past expiry. Cancelled callers cancel
+the upstream requests nobody else is waiting for.
 """
 
+import asyncio
+import logging
+import time
 import httpx
-from typing import List, Dict, Any, Optional
-from .config import GEOCODING_API_URL, WEATHER_API_URL, MAX_LOCATION_SEARCH_RESULTS
+from contextlib import asynccontextmanager
+from typing import (
+    List, Dict, Any, Optional, AsyncIterator, Awaitable, Callable, Set, Tuple
+)
+from .access_tracker import AccessTracker
+from .batching import BatchDispatcher
+from .cache import TTLCache
+from .columnar import columnize, decode_json
+from .flatbuffers_transport import FLATBUFFERS_AVAILABLE, decode_flatbuffers
+from .geocoding import interned_locations, normalize_query
+from .hedging import Hedger
+from .metrics import metrics
+from .persistent_cache import PersistentCache
+from .place_index import PlaceIndex
+from .resilience import CircuitBreaker, UpstreamTimeoutError, request_with_retry
+from .singleflight import SingleFlight
+from .tracing import annotate, span, traced
+from .units import convert_weather_data, validate_units
+from .config import (
+    GEOCODING_API_URL, WEATHER_API_URL, MAX_LOCATION_SEARCH_RESULTS,
+    DEFAULT_TEMPERATURE_UNIT, DEFAULT_WIND_SPEED_UNIT, DEFAULT_PRECIPITATION_UNIT,
+    HTTP_CONNECT_TIMEOUT_SECONDS, HTTP_READ_TIMEOUT_SECONDS,
+    HTTP_WRITE_TIMEOUT_SECONDS, HTTP_POOL_TIMEOUT_SECONDS,
+    HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY_SECONDS, HTTP2_ENABLED,
+    FORECAST_CACHE_MAX_ENTRIES, FORECAST_CACHE_TTL_CURRENT_SECONDS,
+    FORECAST_CACHE_TTL_HOURLY_SECONDS, FORECAST_CACHE_TTL_DAILY_SECONDS,
+    FORECAST_CACHE_COORDINATE_DECIMALS, FORECAST_CACHE_STALE_SECONDS,
+    FORECAST_BATCH_WINDOW_MS, FORECAST_BATCH_MAX_POINTS, WEATHER_API_FORMAT,
+    PERSISTENT_CACHE_ENABLED,
+    PERSISTENT_CACHE_PATH, GEOCODING_CACHE_MAX_ENTRIES, GEOCODING_CACHE_TTL_SECONDS,
+    GEOCODING_NEGATIVE_CACHE_TTL_SECONDS, GEOCODING_MIN_RESULTS,
+    REFRESH_ACCESS_HALF_LIFE_SECONDS,
+    TIMEOUT_FALLBACK_MAX_AGE_SECONDS, HEDGE_ENABLED, FUZZY_INDEX_ENABLED
+)
 
 
-async def search_locations(location_name: str, limit: int = 10) -> List[Dict[str, Any]]:
-    """Search for locations using the geocoding API"""
-    params = {
-        "name": location_name,
-        "count": min(limit, MAX_LOCATION_SEARCH_RESULTS),
-        "format": "json"
-    }
+logger = logging.getLogger(__name__)
+
+# Shared client installed by the server lifespan, plus the number of
+# lifespans currently holding it (one per running MCP session).
+_shared_client: Optional[httpx.AsyncClient] = None
+_shared_client_users = 0
+
+forecast_cache = TTLCache(FORECAST_CACHE_MAX_ENTRIES, FORECAST_CACHE_STALE_SECONDS)
+geocoding_cache = TTLCache(GEOCODING_CACHE_MAX_ENTRIES)
+inflight_requests = SingleFlight()
+
+# How often each forecast request is made, for the background refresher
+forecast_access = AccessTracker(REFRESH_ACCESS_HALF_LIFE_SECONDS)
+
+# Second-level cache shared with the other server processes on this host
+persistent_cache: Optional[PersistentCache] = (
+    PersistentCache(PERSISTENT_CACHE_PATH,
+                    retain_expired_seconds=TIMEOUT_FALLBACK_MAX_AGE_SECONDS)
+    if PERSISTENT_CACHE_ENABLED else None
+)
+
+# Typo-tolerant index of every place the geocoding API has returned
+place_index: Optional[PlaceIndex] = (
+    PlaceIndex(persistent_cache) if FUZZY_INDEX_ENABLED else None
+)
+
+# One circuit breaker per upstream endpoint
+geocoding_breaker = CircuitBreaker("Geocoding")
+forecast_breaker = CircuitBreaker("Weather")
+
+# Optional hedging of slow requests, per endpoint
+geocoding_hedger: Optional[Hedger] = Hedger("geocoding") if HEDGE_ENABLED else None
+forecast_hedger: Optional[Hedger] = Hedger("weather") if HEDGE_ENABLED else None
+
+# Background refreshes of stale forecasts (referenced so they are not collected)
+_background_refreshes: Set["asyncio.Task[Any]"] = set()
+
+# Optional micro-batching of concurrent single-point forecast requests
+forecast_batcher: Optional[BatchDispatcher] = (
+    BatchDispatcher(
+        lambda shape, coordinates: _fetch_weather_points(coordinates, shape),
+        FORECAST_BATCH_WINDOW_MS / 1000, FORECAST_BATCH_MAX_POINTS
+    )
+    if FORECAST_BATCH_WINDOW_MS > 0 else None
+)
+
+metrics.register("forecast_cache", forecast_cache.stats)
+metrics.register("geocoding_cache", geocoding_cache.stats)
+metrics.register("interned_locations", interned_locations.stats)
+metrics.register("inflight_requests", inflight_requests.stats)
+metrics.register("geocoding_breaker", geocoding_breaker.stats)
+metrics.register("forecast_breaker", forecast_breaker.stats)
+if persistent_cache is not None:
+    metrics.register("persistent_cache", persistent_cache.stats)
+if place_index is not None:
+    metrics.register("place_index", place_index.stats)
+if geocoding_hedger is not None and forecast_hedger is not None:
+    metrics.register("geocoding_hedger", geocoding_hedger.stats)
+    metrics.register("forecast_hedger", forecast_hedger.stats)
+if forecast_batcher is not None:
+    metrics.register("forecast_batcher", forecast_batcher.stats)
+
+
+def _http2_available() -> bool:
+    """Check whether the optional `h2` package needed for HTTP/2 is installed"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create a pooled HTTP client with keep-alive limits and explicit timeouts"""
+    return httpx.AsyncClient(
+        http2=HTTP2_ENABLED and _http2_available(),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS
+        ),
+        timeout=httpx.Timeout(
+            connect=HTTP_CONNECT_TIMEOUT_SECONDS,
+            read=HTTP_READ_TIMEOUT_SECONDS,
+            write=HTTP_WRITE_TIMEOUT_SECONDS,
+            pool=HTTP_POOL_TIMEOUT_SECONDS
+        )
+    )
+
+
+@asynccontextmanager
+async def http_client_lifespan() -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Install the shared HTTP client for the duration of the context. Every
+    API function uses it unless given an explicit `client`.
+
+    Overlapping lifespans (e.g. several sessions on the HTTP transport) share
+    one client; it is closed when the last of them exits.
+    """
+    global _shared_client, _shared_client_users
+    if _shared_client is None:
+        _shared_client = create_http_client()
+    client = _shared_client
+    _shared_client_users += 1
+    try:
+        yield client
+    finally:
+        _shared_client_users -= 1
+        if _shared_client_users == 0:
+            _shared_client = None
+            await client.aclose()
+
+
+@asynccontextmanager
+async def _client_for(
+    client: Optional[httpx.AsyncClient]
+) -> AsyncIterator[httpx.AsyncClient]:
+    """Resolve which client to use: explicit, shared, or a one-off fallback"""
+    if client is not None:
+        yield client
+    elif _shared_client is not None:
+        yield _shared_client
+    else:
+        # No lifespan running (e.g. called from a script): use a short-lived client
+        async with create_http_client() as one_off_client:
+            yield one_off_client
+
+
+def _hedged(hedger: Optional[Hedger],
+            send: Callable[[], Awaitable[httpx.Response]]
+            ) -> Callable[[], Awaitable[httpx.Response]]:
+    """Route each attempt of a request through `hedger`, when hedging is enabled"""
+    if hedger is None:
+        return send
+    return lambda: hedger.send(send)
+
+
+@traced("search_locations")
+async def search_locations(
+    location_name: str, limit: int = 10, client: Optional[httpx.AsyncClient] = None
+) -> List[Dict[str, Any]]:
+    """
+    Search for locations using the geocoding API.
+
+    Results, including empty ones, are cached under the normalized query
+    (see ``geocoding``). The returned list may be shared with the cache and
+    must not be modified.
+
+    Queries the geocoding API finds nothing for get the closest matches in
+    ``place_index`` instead, if any. The index is never asked first: a name
+    in it may have been indexed from a search for another name and lack
+    places the geocoding API would return for it.
+    """
+    count = min(max(limit, GEOCODING_MIN_RESULTS), MAX_LOCATION_SEARCH_RESULTS)
+    cache_key = (normalize_query(location_name), count)
+    results = geocoding_cache.get(cache_key)
+    source = "memory"
+    if results is None and persistent_cache is not None:
+        entry = persistent_cache.get("search", cache_key)
+        if entry is not None:
+            results, remaining_ttl = entry
+            geocoding_cache.set(cache_key, results, remaining_ttl)
+            source = "persistent"
+    if results is None:
+        source = "miss"
+        params = {"name": " ".join(location_name.split()), "count": count,
+                  "format": "json"}
+        try:
+            results = await inflight_requests.do(
+                ("search",) + cache_key,
+                lambda: _fetch_locations(params, cache_key, client)
+            )
+        except UpstreamTimeoutError as exc:
+            entry = (persistent_cache.get("search", cache_key,
+                                          TIMEOUT_FALLBACK_MAX_AGE_SECONDS)
+                     if persistent_cache is not None else None)
+            if entry is None:
+                raise
+            _note_fallback("geocoding", exc)
+            results = entry[0]
+            source = "fallback"
+    if not results and place_index is not None:
+        matches = place_index.search(location_name, limit)
+        if matches:
+            results = [place for _, place in matches]
+            source = "fuzzy"
     
-    async with httpx.AsyncClient() as client:
-        response = await client.get(GEOCODING_API_URL, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            return data.get("results", [])
-        else:
-            error_data = response.json()
-            raise ValueError(f"Geocoding API error: {error_data.get('reason', 'Unknown error')}")
+    metrics.inc("cache_lookups_total", kind="geocoding", result=source)
+    annotate({"location.query": location_name, "cache.result": source,
+              "location.results": len(results)})
+    return results if len(results) <= limit else results[:limit]
 
 
-async def get_weather_data(latitude: float, longitude: float, 
-                          current: Optional[List[str]] = None,
-                          hourly: Optional[List[str]] = None,
-                          daily: Optional[List[str]] = None,
-                          forecast_days: int = 7,
-                          temperature_unit: str = "celsius",
-                          wind_speed_unit: str = "kmh",
-                          precipitation_unit: str = "mm") -> Dict[str, Any]:
-    """Get weather data from Open-Meteo forecast API"""
-    params = {
-        "latitude": latitude,
-        "longitude": longitude,
-        "temperature_unit": temperature_unit,
-        "wind_speed_unit": wind_speed_unit,
-        "precipitation_unit": precipitation_unit,
-        "forecast_days": forecast_days
+async def _fetch_locations(params: Dict[str, Any], cache_key: Tuple,
+                           client: Optional[httpx.AsyncClient]) -> List[Dict[str, Any]]:
+    """Perform the geocoding request and cache the results, briefly if there are none"""
+    async with _client_for(client) as http:
+        response = await request_with_retry(
+            _hedged(geocoding_hedger,
+                    lambda: http.get(GEOCODING_API_URL, params=params)),
+            geocoding_breaker
+        )
+        with metrics.timer("decode_seconds", endpoint="geocoding", format="json"), \
+                span("decode", {"open_meteo.format": "json"}):
+            data = decode_json(response.content)
+    
+    results = data.get("results", [])
+    ttl = (GEOCODING_CACHE_TTL_SECONDS if results
+           else GEOCODING_NEGATIVE_CACHE_TTL_SECONDS)
+    geocoding_cache.set(cache_key, results, ttl)
+    if persistent_cache is not None:
+        persistent_cache.set("search", cache_key, results, ttl)
+    if place_index is not None:
+        place_index.add(results)
+    return results
+
+
+def _weather_shape(current: Optional[List[str]], hourly: Optional[List[str]],
+                   daily: Optional[List[str]], forecast_days: Optional[int],
+                   forecast_hours: Optional[int] = None) -> Tuple:
+    """Describe everything about a forecast request except its coordinates"""
+    # With forecast_hours the hourly series starts at the current (UTC) hour,
+    # so the response is only reusable within that hour
+    start_hour = (time.strftime("%Y-%m-%dT%H:00", time.gmtime())
+                  if forecast_hours else None)
+    return (
+        tuple(sorted(current or ())),
+        tuple(sorted(hourly or ())),
+        tuple(sorted(daily or ())),
+        forecast_days,
+        forecast_hours,
+        start_hour
+    )
+
+
+def _weather_cache_key(latitude: float, longitude: float, shape: Tuple) -> Tuple:
+    """Build the forecast cache key from grid cell and variable lists"""
+    return (
+        round(latitude, FORECAST_CACHE_COORDINATE_DECIMALS),
+        round(longitude, FORECAST_CACHE_COORDINATE_DECIMALS)
+    ) + shape
+
+
+def _weather_cache_ttl(shape: Tuple) -> float:
+    """Use the shortest TTL among the data kinds in the request"""
+    current, hourly, daily = shape[:3]
+    ttls = []
+    if current:
+        ttls.append(FORECAST_CACHE_TTL_CURRENT_SECONDS)
+    if hourly:
+        ttls.append(FORECAST_CACHE_TTL_HOURLY_SECONDS)
+    if daily:
+        ttls.append(FORECAST_CACHE_TTL_DAILY_SECONDS)
+    return min(ttls, default=FORECAST_CACHE_TTL_CURRENT_SECONDS)
+
+
+def _weather_params(shape: Tuple) -> Dict[str, Any]:
+    """Build the forecast API query parameters (without coordinates) for a shape"""
+    current, hourly, daily, forecast_days, forecast_hours = shape[:5]
+    # Always fetch canonical metric units; conversion happens locally
+    params: Dict[str, Any] = {
+        "temperature_unit": DEFAULT_TEMPERATURE_UNIT,
+        "wind_speed_unit": DEFAULT_WIND_SPEED_UNIT,
+        "precipitation_unit": DEFAULT_PRECIPITATION_UNIT
     }
     
+    if forecast_days:
+        params["forecast_days"] = forecast_days
+    if forecast_hours:
+        params["forecast_hours"] = forecast_hours
     if current:
         params["current"] = ",".join(current)
     if hourly:
         params["hourly"] = ",".join(hourly)
     if daily:
         params["daily"] = ",".join(daily)
-    
-    async with httpx.AsyncClient() as client:
-        response = await client.get(WEATHER_API_URL, params=params)
-        if response.status_code == 200:
-            return response.json()
+    return params
+
+
+@traced("get_weather_data")
+async def get_weather_data(latitude: float, longitude: float, 
+                          current: Optional[List[str]] = None,
+                          hourly: Optional[List[str]] = None,
+                          daily: Optional[List[str]] = None,
+                          forecast_days: Optional[int] = 7,
+                          temperature_unit: str = "celsius",
+                          wind_speed_unit: str = "kmh",
+                          precipitation_unit: str = "mm",
+                          forecast_hours: Optional[int] = None,
+                          client: Optional[httpx.AsyncClient] = None) -> Dict[str, Any]:
+    """
+    Get weather data from Open-Meteo forecast API, served from cache when fresh.
+
+    `forecast_days` limits the daily series (and the hourly one unless
+    `forecast_hours` is given, in which case hourly data starts at the current
+    hour); pass None to leave it to the API default.
+    """
+    validate_units(temperature_unit, wind_speed_unit, precipitation_unit)
+    shape = _weather_shape(current, hourly, daily, forecast_days, forecast_hours)
+    cache_key = _weather_cache_key(latitude, longitude, shape)
+    note_weather_access(latitude, longitude, shape)
+    data = forecast_cache.get(cache_key)
+    source = "memory"
+    if data is None:
+        data = _load_persisted_forecast(cache_key)
+        source = "persistent"
+    if data is None:
+        flight_key = ("forecast",) + cache_key
+        fetch = lambda: _fetch_weather_point(latitude, longitude, shape, client)  # noqa: E731
+        # Refresh in the background only on our own client: a caller's
+        # client may be closed by the time the refresh runs
+        stale = forecast_cache.get_stale(cache_key) if client is None else None
+        if stale is not None:
+            _refresh_in_background(flight_key, fetch)
+            data = stale
+            source = "stale"
         else:
-            error_data = response.json()
-            raise ValueError(f"Weather API error: {error_data.get('reason', 'Unknown error')}")
+            source = "miss"
+            try:
+                data = await inflight_requests.do(flight_key, fetch)
+            except UpstreamTimeoutError as exc:
+                data = _expired_forecast(cache_key)
+                if data is None:
+                    raise
+                _note_fallback("forecast", exc)
+                source = "fallback"
+    metrics.inc("cache_lookups_total", kind="forecast", result=source)
+    annotate({"cache.result": source,
+              "http.response.body.size": data.get("response_bytes")})
+    return convert_weather_data(data, temperature_unit, wind_speed_unit,
+                                precipitation_unit)
+
+
+def _expired_forecast(cache_key: Tuple) -> Optional[Dict[str, Any]]:
+    """An expired forecast young enough to answer a call whose request timed out"""
+    data = forecast_cache.get_stale(cache_key)
+    if data is None and persistent_cache is not None:
+        entry = persistent_cache.get("forecast", cache_key,
+                                     TIMEOUT_FALLBACK_MAX_AGE_SECONDS)
+        data = columnize(entry[0]) if entry is not None else None
+    return data
+
+
+def _note_fallback(kind: str, error: Exception) -> None:
+    logger.warning("Answering from expired %s data: %s", kind, error)
+    metrics.inc("cache_fallbacks_total", kind=kind)
+    annotate({"cache.result": "fallback"})
+
+
+def _refresh_in_background(flight_key: Tuple,
+                           fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> None:
+    """Start refreshing a stale forecast unless a request for it is already in flight"""
+    if flight_key in inflight_requests:
+        return
+    task = asyncio.ensure_future(inflight_requests.do(flight_key, fetch))
+    _background_refreshes.add(task)
+    task.add_done_callback(_refresh_done)
+
+
+def _refresh_done(task: "asyncio.Task[Any]") -> None:
+    _background_refreshes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Background forecast refresh failed: %s", task.exception())
+
+
+async def get_weather_data_many(coordinates: List[Tuple[float, float]],
+                                current: Optional[List[str]] = None,
+                                hourly: Optional[List[str]] = None,
+                                daily: Optional[List[str]] = None,
+                                forecast_days: Optional[int] = 7,
+                                temperature_unit: str = "celsius",
+                                wind_speed_unit: str = "kmh",
+                                precipitation_unit: str = "mm",
+                                forecast_hours: Optional[int] = None,
+                                client: Optional[httpx.AsyncClient] = None
+                                ) -> List[Dict[str, Any]]:
+    """
+    Get weather data for several (latitude, longitude) points at once.
+
+    Points already in the cache are served from it; the rest are fetched in
+    multi-coordinate requests of at most FORECAST_BATCH_MAX_POINTS points.
+    Results are returned in the order of `coordinates`.
+    """
+    validate_units(temperature_unit, wind_speed_unit, precipitation_unit)
+    shape = _weather_shape(current, hourly, daily, forecast_days, forecast_hours)
+    results: List[Optional[Dict[str, Any]]] = []
+    for lat, lon in coordinates:
+        cache_key = _weather_cache_key(lat, lon, shape)
+        data = forecast_cache.get(cache_key)
+        if data is None:
+            data = _load_persisted_forecast(cache_key)
+        results.append(data)
+    missing = [i for i, result in enumerate(results) if result is None]
+    chunks = [missing[i:i + FORECAST_BATCH_MAX_POINTS]
+              for i in range(0, len(missing), FORECAST_BATCH_MAX_POINTS)]
+    fetched = await asyncio.gather(*[
+        _fetch_weather_points([coordinates[i] for i in chunk], shape, client)
+        for chunk in chunks
+    ])
+    for chunk, chunk_results in zip(chunks, fetched):
+        for i, data in zip(chunk, chunk_results):
+            results[i] = data
+    return [
+        convert_weather_data(
+            data,  # type: ignore[arg-type]
+            temperature_unit, wind_speed_unit, precipitation_unit
+        )
+        for data in results
+    ]
+
+
+async def _fetch_weather_point(latitude: float, longitude: float, shape: Tuple,
+                               client: Optional[httpx.AsyncClient]) -> Dict[str, Any]:
+    """Fetch one point, through the micro-batching dispatcher when enabled"""
+    if forecast_batcher is not None and client is None:
+        return await forecast_batcher.submit(shape, (latitude, longitude))
+    results = await _fetch_weather_points([(latitude, longitude)], shape, client)
+    return results[0]
+
+
+@traced("fetch_forecast")
+async def _fetch_weather_points(coordinates: List[Tuple[float, float]], shape: Tuple,
+                                client: Optional[httpx.AsyncClient] = None
+                                ) -> List[Dict[str, Any]]:
+    """Perform one (multi-coordinate) forecast request and cache each point"""
+    params = _weather_params(shape)
+    params["latitude"] = ",".join(str(lat) for lat, _ in coordinates)
+    params["longitude"] = ",".join(str(lon) for _, lon in coordinates)
+    
+    points, size = await _request_weather_points(params, shape, client)
+    annotate({"open_meteo.points": len(coordinates), "http.response.body.size": size})
+    if len(points) != len(coordinates):
+        raise ValueError(f"Weather API error: expected {len(coordinates)} locations,"
+                         f" got {len(points)}")
+    
+    ttl = _weather_cache_ttl(shape)
+    for (lat, lon), point in zip(coordinates, points):
+        # Each point's share of the response body, for payload size reporting
+        point["response_bytes"] = size // len(points)
+        cache_key = _weather_cache_key(lat, lon, shape)
+        forecast_cache.set(cache_key, point, ttl)
+        if persistent_cache is not None:
+            persistent_cache.set("forecast", cache_key, point, ttl)
+    return points
+
+
+def _load_persisted_forecast(cache_key: Tuple) -> Optional[Dict[str, Any]]:
+    """Load a forecast stored by another process or an earlier run into memory"""
+    if persistent_cache is None:
+        return None
+    entry = persistent_cache.get("forecast", cache_key)
+    if entry is None:
+        return None
+    data, remaining_ttl = entry
+    data = columnize(data)
+    forecast_cache.set(cache_key, data, remaining_ttl)
+    return data
+
+
+def note_weather_access(latitude: float, longitude: float, shape: Tuple) -> None:
+    """Count a use of a forecast, keyed on what would be requested to refresh it"""
+    # Drop the start hour: a refresh requests the current one
+    forecast_access.record(_weather_cache_key(latitude, longitude, shape)[:-1])
+
+
+def weather_expires_in(request_key: Tuple) -> Optional[float]:
+    """Seconds until the cached forecast for a tracked request expires, or None"""
+    latitude, longitude = request_key[:2]
+    shape = _weather_shape(*request_key[2:])
+    return forecast_cache.expires_in(_weather_cache_key(latitude, longitude, shape))
+
+
+async def refresh_weather_data(request_keys: List[Tuple],
+                               client: Optional[httpx.AsyncClient] = None
+                               ) -> Tuple[int, int]:
+    """
+    Re-fetch tracked forecasts (see `forecast_access`), ignoring the cache.
+
+    Requests for the same variables are merged into multi-coordinate requests
+    of at most FORECAST_BATCH_MAX_POINTS points. Returns the number of
+    upstream requests sent and how many of them failed.
+    """
+    groups: Dict[Tuple, List[Tuple[float, float]]] = {}
+    for key in request_keys:
+        groups.setdefault(key[2:], []).append(key[:2])
+    
+    requests = []
+    for request, coordinates in groups.items():
+        shape = _weather_shape(*request)
+        for i in range(0, len(coordinates), FORECAST_BATCH_MAX_POINTS):
+            chunk = coordinates[i:i + FORECAST_BATCH_MAX_POINTS]
+            requests.append(_fetch_weather_points(chunk, shape, client))
+    results = await asyncio.gather(*requests, return_exceptions=True)
+    
+    failed = [result for result in results if isinstance(result, BaseException)]
+    for error in failed:
+        logger.warning("Forecast refresh failed: %s", error)
+    return len(results), len(failed)
+
+
+def cached_weather_data(latitude: float,
+                        longitude: float) -> List[Tuple[Tuple, Dict[str, Any]]]:
+    """Return (shape, metric data) of every fresh cached forecast of the point's cell"""
+    cell = _weather_cache_key(latitude, longitude, ())
+    return [(key[2:], data) for key, data in forecast_cache.items() if key[:2] == cell]
+
+
+async def _request_weather_points(params: Dict[str, Any], shape: Tuple,
+                                  client: Optional[httpx.AsyncClient]
+                                  ) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Send a forecast request, over FlatBuffers when enabled, and decode one
+    result per point. Also returns the size of the response body in bytes.
+    """
+    if WEATHER_API_FORMAT == "flatbuffers" and FLATBUFFERS_AVAILABLE:
+        content = await _get_weather_content(dict(params, format="flatbuffers"), client)
+        try:
+            current, hourly, daily = shape[:3]
+            decode_timer = metrics.timer("decode_seconds", endpoint="weather",
+                                         format="flatbuffers")
+            with decode_timer, span("decode", {"open_meteo.format": "flatbuffers"}):
+                points = decode_flatbuffers(content, current, hourly, daily)
+            return points, len(content)
+        except Exception:
+            logger.warning("Could not decode FlatBuffers forecast, retrying as JSON",
+                           exc_info=True)
+    
+    content = await _get_weather_content(params, client)
+    with metrics.timer("decode_seconds", endpoint="weather", format="json"), \
+            span("decode", {"open_meteo.format": "json"}):
+        data = decode_json(content)
+        # A single point comes back as an object, several points as a list
+        points = [columnize(point)
+                  for point in (data if isinstance(data, list) else [data])]
+    return points, len(content)
+
+
+async def _get_weather_content(params: Dict[str, Any],
+                               client: Optional[httpx.AsyncClient]) -> bytes:
+    """Perform the forecast request and return the raw response body"""
+    async with _client_for(client) as http:
+        response = await request_with_retry(
+            _hedged(forecast_hedger, lambda: http.get(WEATHER_API_URL, params=params)),
+            forecast_breaker
+        )
+        return response.content
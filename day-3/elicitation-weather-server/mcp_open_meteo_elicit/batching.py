@@ -0,0 +1,122 @@
+"""
+Micro-batching of concurrent single-point forecast requests.
+
+Open-Meteo accepts comma-separated latitude/longitude lists and answers with
+one result per point. This module holds concurrent requests that share the
+same variables and units for a few milliseconds, sends them upstream as one
+multi-point request and hands each caller its own result.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Set
+
+
+class _Batch:
+    """Requests collected for one group during the batching window"""
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.futures: List["asyncio.Future[Any]"] = []
+        self.full = asyncio.Event()
+
+
+class BatchDispatcher:
+    """
+    Collect concurrent requests per group and fetch them in one call.
+
+    `fetch_many(group, items)` must return one result per item, in order.
+    A batch is sent when the window expires or when it reaches
+    `max_batch_size`, whichever comes first. Callers that are cancelled
+    while waiting are left out of the upstream request, and the request is
+    cancelled if every caller in it is.
+    """
+
+    def __init__(self,
+                 fetch_many: Callable[[Hashable, List[Any]], Awaitable[List[Any]]],
+                 window_seconds: float, max_batch_size: int):
+        self._fetch_many = fetch_many
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[Hashable, _Batch] = {}
+        self._runners: Set["asyncio.Task[None]"] = set()
+        self.batches_sent = 0
+        self.items_sent = 0
+        self.batches_abandoned = 0
+
+    async def submit(self, group: Hashable, item: Any) -> Any:
+        """Queue `item` with others in `group` and wait for its own result"""
+        batch = self._pending.get(group)
+        if batch is None:
+            batch = _Batch()
+            self._pending[group] = batch
+            runner = asyncio.ensure_future(self._run(group, batch))
+            self._runners.add(runner)
+            runner.add_done_callback(self._runners.discard)
+        
+        future = asyncio.get_running_loop().create_future()
+        batch.items.append(item)
+        batch.futures.append(future)
+        if len(batch.items) >= self.max_batch_size:
+            self._close(group, batch)
+        return await future
+
+    def _close(self, group: Hashable, batch: _Batch) -> None:
+        """Stop accepting requests into `batch` and release its runner"""
+        if self._pending.get(group) is batch:
+            del self._pending[group]
+        batch.full.set()
+
+    async def _run(self, group: Hashable, batch: _Batch) -> None:
+        """Wait out the batching window, then fetch and distribute results"""
+        try:
+            await asyncio.wait_for(batch.full.wait(), self.window_seconds)
+        except asyncio.TimeoutError:
+            pass
+        self._close(group, batch)
+        
+        waiting = [(item, future) for item, future in zip(batch.items, batch.futures)
+                   if not future.done()]
+        if not waiting:
+            return
+        
+        items = [item for item, _ in waiting]
+        fetch = asyncio.ensure_future(self._fetch_many(group, items))
+
+        def abandon_if_unwanted(_future: "asyncio.Future[Any]") -> None:
+            if all(future.cancelled() for _, future in waiting):
+                fetch.cancel()
+
+        for _, future in waiting:
+            future.add_done_callback(abandon_if_unwanted)
+        try:
+            results = await fetch
+        except asyncio.CancelledError:
+            if all(future.cancelled() for _, future in waiting):
+                self.batches_abandoned += 1
+                return
+            for _, future in waiting:
+                future.cancel()
+            raise
+        except Exception as exc:
+            for _, future in waiting:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        
+        self.batches_sent += 1
+        self.items_sent += len(waiting)
+        for (_, future), result in zip(waiting, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batch counters and the average batch size"""
+        return {
+            "pending_batches": len(self._pending),
+            "batches_sent": self.batches_sent,
+            "items_sent": self.items_sent,
+            "batches_abandoned": self.batches_abandoned,
+            "mean_batch_size": (
+                self.items_sent / self.batches_sent if self.batches_sent else 0.0
+            )
+        }
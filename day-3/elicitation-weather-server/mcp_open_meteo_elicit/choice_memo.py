@@ -0,0 +1,132 @@
+"""
+Memo of the places users picked for ambiguous location names.
+
+Without it, every tool call naming "Springfield" asks the user to choose
+again. The place chosen for a (normalized) name is remembered for the rest of
+the MCP session, so repeat calls resolve without elicitation or geocoding.
+Session memos are dropped with their session.
+
+With ELICITATION_MEMO_PER_CLIENT_APP, choices are also kept in the
+persistent cache under the client application's name (from its initialize
+request) and reused by its later sessions, in this or another server
+process. MCP clients identify the software, not the user, so these choices
+are shared by everyone using the same client application with servers that
+share the cache: every stdio server started by one OS user, or everyone
+connected to one HTTP server.
+
+Choices expire after ELICITATION_MEMO_TTL_SECONDS and can be forgotten
+earlier with the ``forget_location_choices`` tool.
+"""
+
+from typing import Any, Dict, Optional
+from weakref import WeakKeyDictionary
+
+from .api_client import persistent_cache
+from .cache import TTLCache
+from .config import (
+    ELICITATION_MEMO_MAX_ENTRIES,
+    ELICITATION_MEMO_PER_CLIENT_APP,
+    ELICITATION_MEMO_TTL_SECONDS,
+)
+from .geocoding import normalize_query
+from .metrics import metrics
+from .persistent_cache import PersistentCache
+
+
+class ChoiceMemo:
+    """Chosen places by session (and optionally client app) and normalized name"""
+
+    def __init__(self, persistent_cache: Optional[PersistentCache] = None,
+                 per_client_app: bool = ELICITATION_MEMO_PER_CLIENT_APP,
+                 ttl_seconds: float = ELICITATION_MEMO_TTL_SECONDS,
+                 max_entries: int = ELICITATION_MEMO_MAX_ENTRIES):
+        self.persistent_cache = persistent_cache if per_client_app else None
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._sessions: "WeakKeyDictionary[Any, TTLCache]" = WeakKeyDictionary()
+        self.session_hits = 0
+        self.client_app_hits = 0
+        self.misses = 0
+        self.remembered = 0
+        self.forgotten = 0
+
+    def _namespace(self, session: Any) -> Optional[str]:
+        """Persistent cache namespace of the session's client app, if kept per app"""
+        if self.persistent_cache is None:
+            return None
+        params = getattr(session, "client_params", None)
+        return f"choice:{params.clientInfo.name}" if params is not None else None
+
+    def _choices(self, session: Any) -> TTLCache:
+        choices = self._sessions.get(session)
+        if choices is None:
+            choices = self._sessions[session] = TTLCache(self.max_entries)
+        return choices
+
+    def get(self, session: Any, location_name: str) -> Optional[Dict[str, Any]]:
+        """The place chosen for `location_name` in this session or its client app"""
+        query = normalize_query(location_name)
+        choices = self._sessions.get(session)
+        place = choices.get(query) if choices is not None else None
+        if place is not None:
+            self.session_hits += 1
+            return place
+        namespace = self._namespace(session)
+        entry = (self.persistent_cache.get(namespace, query)
+                 if namespace is not None else None)
+        if entry is None:
+            self.misses += 1
+            return None
+        place, remaining_ttl = entry
+        self._choices(session).set(query, place, remaining_ttl)
+        self.client_app_hits += 1
+        return place
+
+    def remember(self, session: Any, location_name: str, place: Dict[str, Any]) -> None:
+        """Record the place chosen for `location_name`"""
+        query = normalize_query(location_name)
+        self._choices(session).set(query, place, self.ttl_seconds)
+        namespace = self._namespace(session)
+        if namespace is not None:
+            self.persistent_cache.set(namespace, query, place, self.ttl_seconds)
+        self.remembered += 1
+
+    def forget(self, session: Any, location_name: Optional[str] = None) -> int:
+        """
+        Forget the choice for `location_name`, or every choice, of this session
+        and its client app. Returns how many session choices were dropped.
+        """
+        choices = self._sessions.get(session)
+        namespace = self._namespace(session)
+        if location_name is None:
+            dropped = len(choices.items()) if choices is not None else 0
+            self._sessions.pop(session, None)
+            if namespace is not None:
+                self.persistent_cache.delete(namespace)
+        else:
+            query = normalize_query(location_name)
+            dropped = int(choices is not None and choices.delete(query))
+            if namespace is not None:
+                self.persistent_cache.delete(namespace, query)
+        self.forgotten += dropped
+        return dropped
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of sessions with choices and the memo hit counters"""
+        lookups = self.session_hits + self.client_app_hits + self.misses
+        return {
+            "sessions": len(self._sessions),
+            "per_client_app": self.persistent_cache is not None,
+            "session_hits": self.session_hits,
+            "client_app_hits": self.client_app_hits,
+            "misses": self.misses,
+            "hit_ratio": (
+                (self.session_hits + self.client_app_hits) / lookups if lookups else 0.0
+            ),
+            "remembered": self.remembered,
+            "forgotten": self.forgotten
+        }
+
+
+choice_memo = ChoiceMemo(persistent_cache)
+metrics.register("choice_memo", choice_memo.stats)
@@ -5,9 +5,23 @@ This module contains API endpoints, default parameters, and other
 configuration constants used throughout the application.
 """
 
+import os
+
 # API Endpoints
-GEOCODING_API_URL = "https://geocoding-api.open-meteo.com/v1/search"
-WEATHER_API_URL = "https://api.open-meteo.com/v1/forecast"
+# Set OPEN_METEO_STANDIN_URL (e.g. http://127.0.0.1:8089) to send all requests
+# to the local stand-in in benchmarks/standin.py instead
+OPEN_METEO_STANDIN_URL = os.environ.get("OPEN_METEO_STANDIN_URL", "").rstrip("/")
+if OPEN_METEO_STANDIN_URL:
+    GEOCODING_API_URL = f"{OPEN_METEO_STANDIN_URL}/v1/search"
+    WEATHER_API_URL = f"{OPEN_METEO_STANDIN_URL}/v1/forecast"
+else:
+    GEOCODING_API_URL = "https://geocoding-api.open-meteo.com/v1/search"
+    WEATHER_API_URL = "https://api.open-meteo.com/v1/forecast"
+
+# Forecast response format: "json", or "flatbuffers" for smaller responses
+# decoded from binary arrays rather than parsed from text (needs the optional
+# `flatbuffers` extra, otherwise JSON is used)
+WEATHER_API_FORMAT = "json"
 
 # Default Parameters
 DEFAULT_TEMPERATURE_UNIT = "celsius"
@@ -19,9 +33,179 @@ MAX_FORECAST_DAYS = 16
 MAX_FORECAST_HOURS = 168
 MAX_LOCATION_SEARCH_RESULTS = 100
 MAX_LOCATION_ELICITATION_OPTIONS = 5
+# Unanswered location elicitations resolve to the best-ranked candidate after
+# this long, which bounds tool latency (0 waits for the user indefinitely)
+ELICITATION_TIMEOUT_SECONDS = 120.0
+
+# HTTP Client (shared, pooled connection to the Open-Meteo APIs)
+HTTP_CONNECT_TIMEOUT_SECONDS = 5.0
+HTTP_READ_TIMEOUT_SECONDS = 10.0
+HTTP_WRITE_TIMEOUT_SECONDS = 5.0
+HTTP_POOL_TIMEOUT_SECONDS = 5.0
+HTTP_MAX_CONNECTIONS = 20
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 10
+HTTP_KEEPALIVE_EXPIRY_SECONDS = 30.0
+HTTP2_ENABLED = True  # Only takes effect when the optional `h2` package is installed
+
+# Forecast Cache
+# Open-Meteo refreshes current conditions every 15 minutes and model runs
+# hourly at best, so short TTLs lose nothing while absorbing repeat calls.
+FORECAST_CACHE_MAX_ENTRIES = 512
+FORECAST_CACHE_TTL_CURRENT_SECONDS = 10 * 60
+FORECAST_CACHE_TTL_HOURLY_SECONDS = 30 * 60
+FORECAST_CACHE_TTL_DAILY_SECONDS = 60 * 60
+FORECAST_CACHE_COORDINATE_DECIMALS = 2  # ~1 km, finer than the forecast model grid
+# Expired forecasts are still served for this long while a background request
+# refreshes them, so callers never wait on a refresh (0 disables)
+FORECAST_CACHE_STALE_SECONDS = 5 * 60
+
+# Persistent Cache
+# Forecast and geocoding responses are also kept in a SQLite database shared
+# by every server process on the host, so new processes start warm.
+PERSISTENT_CACHE_ENABLED = True
+PERSISTENT_CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "mcp-open-meteo",
+    # Never mix stand-in responses with real ones
+    "responses-standin.sqlite3" if OPEN_METEO_STANDIN_URL else "responses.sqlite3"
+)
+
+# Geocoding Cache
+# Place searches are cached in memory and in the persistent cache under a
+# normalized query (case, whitespace and diacritics folded). Searches that
+# found nothing are cached too, for a shorter time.
+GEOCODING_CACHE_MAX_ENTRIES = 2048
+# Place names and coordinates rarely change
+GEOCODING_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+GEOCODING_NEGATIVE_CACHE_TTL_SECONDS = 60 * 60
+# Searches fetch at least this many, so smaller limits share an entry
+GEOCODING_MIN_RESULTS = 10
+
+# Offline Gazetteer
+# Optional local place index built from a GeoNames cities extract with
+# `mcp-open-meteo-elicit-gazetteer`. Location names are looked up there
+# first and sent to the geocoding API only when it has no match. Empty
+# disables it.
+GAZETTEER_PATH = os.environ.get("MCP_OPEN_METEO_GAZETTEER", "")
+
+# Fuzzy Location Search
+# Every place the geocoding API returns is kept in a trigram index of place
+# names (stored in the persistent cache between runs). Searches the geocoding
+# API finds nothing for get the names at least FUZZY_MIN_SIMILARITY like them
+# (Dice coefficient of their trigrams) instead.
+FUZZY_INDEX_ENABLED = True
+FUZZY_INDEX_MAX_NAMES = 50000
+FUZZY_INDEX_GAZETTEER = False  # Also index the gazetteer's names (read on first search)
+FUZZY_MIN_SIMILARITY = 0.5
+PLACE_INDEX_TTL_SECONDS = 30 * 24 * 60 * 60
+
+# Elicitation Memo
+# The place a user picks for an ambiguous name is remembered for the rest of
+# the session, so later tool calls naming it resolve without asking again.
+# With ELICITATION_MEMO_PER_CLIENT_APP choices are also kept in the persistent
+# cache under the client application's name and reused by its later sessions.
+# Clients report no user, so everyone using the same client application with
+# servers sharing the cache shares these choices. The forget_location_choices
+# tool clears them.
+ELICITATION_MEMO_TTL_SECONDS = 24 * 60 * 60
+ELICITATION_MEMO_MAX_ENTRIES = 256  # Per session
+ELICITATION_MEMO_PER_CLIENT_APP = False
+
+# Location Ranking
+# Candidates for an ambiguous name are scored between 0 and 1 on population,
+# feature class, name match and proximity to the places recently resolved in
+# the session. The user is asked to choose only when the best candidate
+# leads the next by less than AUTO_RESOLVE_MARGIN (above 1 always asks); a
+# place picked without asking is named in the tool result with the others.
+# 0.2 is the smallest round margin with no wrong picks in the sample log
+# replayed by the benchmark (0.1 picked Paris, France for Paris, Texas).
+# Set MCP_OPEN_METEO_QUERY_LOG to a file to record each ranked resolution
+# for benchmarks/bench_location_ranking.py.
+RANKING_WEIGHTS = {"population": 0.4, "feature": 0.2, "name": 0.2, "proximity": 0.2}
+AUTO_RESOLVE_MARGIN = 0.2
+RANKING_RECENT_LOCATIONS = 5  # Per session
+RANKING_PROXIMITY_KM = 500.0  # Distance at which the proximity score falls to 1/e
+QUERY_LOG_PATH = os.environ.get("MCP_OPEN_METEO_QUERY_LOG", "")
+
+# Background Refresh
+# The most requested forecasts are re-fetched shortly before they expire, in
+# multi-coordinate requests, so hot locations are always served from cache.
+REFRESH_ENABLED = True
+REFRESH_INTERVAL_SECONDS = 15.0
+REFRESH_AHEAD_SECONDS = 60.0  # Refresh this long before expiry; above the interval
+REFRESH_TOP_N = 20
+REFRESH_MIN_ACCESSES = 2.0  # Decayed access count for a forecast to count as hot
+REFRESH_ACCESS_HALF_LIFE_SECONDS = 30 * 60
+REFRESH_MAX_REQUESTS_PER_MINUTE = 20  # Upstream request budget for refreshes
+REFRESH_ACTIVE_HOURS = None  # e.g. (7, 19) to refresh only between these local hours
+
+# Upstream Resilience
+# Transient failures (timeouts, connection errors, 429/5xx) are retried with
+# jittered exponential backoff. After CIRCUIT_BREAKER_FAILURE_THRESHOLD
+# consecutive failures an endpoint fails fast for CIRCUIT_BREAKER_RESET_SECONDS.
+UPSTREAM_RETRY_ATTEMPTS = 3  # Total attempts per request
+UPSTREAM_RETRY_BASE_DELAY_SECONDS = 0.2
+UPSTREAM_RETRY_MAX_DELAY_SECONDS = 2.0  # Also the longest Retry-After we wait for
+UPSTREAM_RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+CIRCUIT_BREAKER_RESET_SECONDS = 30.0
+
+# Request Hedging
+# When enabled, a request still unanswered after HEDGE_PERCENTILE of the
+# endpoint's recent latencies is sent a second time and the first answer
+# wins. Hedges are capped at HEDGE_MAX_EXTRA_RATIO of upstream requests.
+HEDGE_ENABLED = False
+HEDGE_PERCENTILE = 0.95
+HEDGE_WINDOW = 200  # Recent latencies per endpoint
+HEDGE_MIN_SAMPLES = 20  # No hedging until this many latencies are known
+HEDGE_MIN_DELAY_SECONDS = 0.05
+HEDGE_MAX_EXTRA_RATIO = 0.05
+
+# Latency Budgets
+# Each tool call (and resource read) must finish within its budget: upstream
+# requests are cut off when it runs out and not retried past it. Calls that
+# time out are answered from expired cached data instead when it is at most
+# TIMEOUT_FALLBACK_MAX_AGE_SECONDS past its expiry.
+TOOL_BUDGETS_SECONDS = {
+    "search_locations_tool": 8.0,
+    "get_current_weather": 12.0,
+    "get_weather_forecast": 12.0,
+    "get_hourly_forecast": 12.0,
+    "get_weather_alerts": 12.0,
+}
+RESOURCE_BUDGET_SECONDS = 12.0
+# Forecasts prefetched while the user picks a location run under their own
+# budget, since the tool's is paused for the elicitation
+PREFETCH_BUDGET_SECONDS = 12.0
+TIMEOUT_FALLBACK_MAX_AGE_SECONDS = 6 * 60 * 60
+
+# Tracing
+# Optional OpenTelemetry spans for each stage of a tool call (needs the
+# `tracing` extra): "console" writes them to stderr, "otlp" sends them over
+# OTLP/HTTP to TRACING_OTLP_ENDPOINT. Empty disables tracing.
+TRACING_EXPORTER = os.environ.get("MCP_OPEN_METEO_TRACING", "")
+TRACING_OTLP_ENDPOINT = os.environ.get(
+    "OTEL_EXPORTER_OTLP_TRACES_ENDPOINT", "http://localhost:4318/v1/traces"
+)
+TRACING_SERVICE_NAME = "mcp-open-meteo-elicit"
+
+# Forecast Batching
+# Concurrent single-point requests with the same variables and units are held
+# for this many milliseconds and sent as one multi-coordinate request.
+FORECAST_BATCH_WINDOW_MS = 0  # 0 disables the dispatcher
+FORECAST_BATCH_MAX_POINTS = 50  # Keeps the request URL well under server limits
+
+# Query Planning
+# Tool calls not covered by cached data are fetched either as a full
+# per-location snapshot that later tool calls for the same place can reuse
+# ("snapshot") or with the smallest request that answers them ("minimal").
+# Analysing one place with every tool takes one upstream request as a
+# snapshot and four with "minimal".
+QUERY_PLAN_FETCH = "snapshot"
 
 # Weather Alert Thresholds
 HIGH_WIND_THRESHOLD_KMH = 50  # km/h
 SEVERE_WEATHER_CODES = [95, 96, 99]  # Thunderstorms
 FREEZING_RAIN_CODES = [66, 67]
 SNOW_CODES = [71, 73, 75]
+ALERT_LOOKAHEAD_HOURS = 48  # Upcoming severe weather is checked this far ahead
@@ -0,0 +1,176 @@
+"""
+Optional FlatBuffers transport for the Open-Meteo forecast API.
+
+With ``format=flatbuffers`` Open-Meteo answers with one size-prefixed
+FlatBuffers message per location instead of JSON. Variable arrays are raw
+float32 vectors, so the payload is smaller on the wire and each series is
+converted from a NumPy view in one vectorized step instead of being parsed
+number by number. The conversion to the JSON path's column types (integers,
+or floats rounded to one decimal place) copies each series once.
+
+This needs the optional `openmeteo-sdk` and `numpy` packages (the
+``flatbuffers`` extra). When they are missing, or a response cannot be
+decoded, ``api_client`` falls back to the JSON transport.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    from openmeteo_sdk.Unit import Unit
+    from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
+    FLATBUFFERS_AVAILABLE = True
+except ImportError:
+    FLATBUFFERS_AVAILABLE = False
+
+# Open-Meteo sends a plain-text error instead of a message when a request
+# fails after streaming started; its first four bytes read as this length.
+_ERROR_MARKER = 0x78656E55
+
+if FLATBUFFERS_AVAILABLE:
+    # Labels matching the `*_units` blocks of the JSON responses
+    UNIT_LABELS = {
+        Unit.celsius: "°C",
+        Unit.fahrenheit: "°F",
+        Unit.kilometres_per_hour: "km/h",
+        Unit.metre_per_second: "m/s",
+        Unit.miles_per_hour: "mp/h",
+        Unit.knots: "kn",
+        Unit.millimetre: "mm",
+        Unit.centimetre: "cm",
+        Unit.inch: "inch",
+        Unit.percentage: "%",
+        Unit.hectopascal: "hPa",
+        Unit.degree_direction: "°",
+        Unit.wmo_code: "wmo code",
+    }
+    # Units whose values are whole numbers in the JSON responses
+    INTEGER_UNITS = {Unit.percentage, Unit.degree_direction, Unit.wmo_code}
+
+
+def iter_messages(content: bytes) -> List["WeatherApiResponse"]:
+    """Split a response body into its per-location messages"""
+    messages = []
+    pos, total = 0, len(content)
+    while pos < total:
+        length = int.from_bytes(content[pos:pos + 4], byteorder="little")
+        if length == _ERROR_MARKER:
+            reason = content[pos:].decode("utf-8", "replace")
+            raise ValueError(f"Weather API error: {reason}")
+        if length == 0 or pos + 4 + length > total:
+            raise ValueError("Weather API error: truncated FlatBuffers response")
+        messages.append(WeatherApiResponse.GetRootAs(content, pos + 4))
+        pos += 4 + length
+    return messages
+
+
+def _variables(section: Any, names: Sequence[str]) -> List[Any]:
+    """
+    Return the variable tables of a section, one per requested name.
+
+    Open-Meteo returns variables in the order they were requested, so they
+    are matched to `names` by position.
+    """
+    if section is None or section.VariablesLength() != len(names):
+        raise ValueError("Weather API error: FlatBuffers variables do not match"
+                         " the request")
+    return [section.Variables(i) for i in range(len(names))]
+
+
+def variable_views(section: Any, names: Sequence[str]) -> Dict[str, "np.ndarray"]:
+    """
+    Map requested variable names to float32 views of their values, without
+    the copy ``decode_flatbuffers`` makes to match the JSON column types
+    """
+    variables = _variables(section, names)
+    return {name: v.ValuesAsNumpy() for name, v in zip(names, variables)}
+
+
+@lru_cache(maxsize=64)
+def _time_axis(start: int, end: int, interval: int, unit: str) -> Tuple[str, ...]:
+    """
+    Rebuild the ISO time strings the JSON responses carry.
+
+    Locations in the same timezone share the same axis for a model run, so
+    the strings are built once and reused.
+    """
+    stamps = np.arange(start, end, interval, dtype=np.int64).astype("datetime64[s]")
+    return tuple(np.datetime_as_string(stamps, unit=unit).tolist())
+
+
+def _as_column(view: "np.ndarray", unit: int) -> "np.ndarray":
+    """Turn a float32 view into the column types used by the JSON path"""
+    if unit in INTEGER_UNITS and not np.isnan(view).any():
+        return view.astype(np.int64)
+    # float32 -> float64 and back to Open-Meteo's one decimal place
+    return np.round(view.astype(np.float64), 1)
+
+
+def _as_scalar(value: float, unit: int) -> Any:
+    if unit in INTEGER_UNITS:
+        return int(round(value))
+    return round(value, 1)
+
+
+def decode_flatbuffers(content: bytes,
+                       current: Optional[Sequence[str]] = None,
+                       hourly: Optional[Sequence[str]] = None,
+                       daily: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Decode a FlatBuffers forecast response into the same shape as the JSON one.
+
+    The variable name lists must be in the order they were sent upstream.
+    Hourly/daily series become NumPy columns (int64 for codes, percentages and
+    directions, float64 otherwise); one dict is returned per location.
+    """
+    results = []
+    for message in iter_messages(content):
+        utc_offset = message.UtcOffsetSeconds()
+        data: Dict[str, Any] = {
+            "latitude": message.Latitude(),
+            "longitude": message.Longitude(),
+            "elevation": message.Elevation(),
+            "utc_offset_seconds": utc_offset,
+            "timezone": message.Timezone().decode() if message.Timezone() else "GMT",
+        }
+        
+        if current:
+            section = message.Current()
+            variables = _variables(section, current)
+            data["current_units"] = {"time": "iso8601", "interval": "seconds"}
+            data["current_units"].update(
+                {name: UNIT_LABELS.get(v.Unit(), "")
+                 for name, v in zip(current, variables)}
+            )
+            data["current"] = {
+                "time": str(np.datetime_as_string(
+                    np.datetime64(section.Time() + utc_offset, "s"), unit="m"
+                )),
+                "interval": section.Interval(),
+            }
+            data["current"].update(
+                {name: _as_scalar(v.Value(), v.Unit())
+                 for name, v in zip(current, variables)}
+            )
+        
+        for block, names, time_unit in (("hourly", hourly, "m"), ("daily", daily, "D")):
+            if not names:
+                continue
+            section = message.Hourly() if block == "hourly" else message.Daily()
+            variables = _variables(section, names)
+            units = [v.Unit() for v in variables]
+            data[f"{block}_units"] = {"time": "iso8601"}
+            data[f"{block}_units"].update(
+                {name: UNIT_LABELS.get(unit, "") for name, unit in zip(names, units)}
+            )
+            data[block] = {"time": _time_axis(
+                section.Time() + utc_offset, section.TimeEnd() + utc_offset,
+                section.Interval(), time_unit
+            )}
+            data[block].update(
+                {name: _as_column(v.ValuesAsNumpy(), unit)
+                 for name, v, unit in zip(names, variables, units)}
+            )
+        results.append(data)
+    return results
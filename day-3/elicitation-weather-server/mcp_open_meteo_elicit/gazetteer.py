@@ -0,0 +1,365 @@
+"""
+Offline gazetteer: a local place index consulted before the geocoding API.
+
+The gazetteer is a single file built from a GeoNames cities extract (e.g.
+``cities15000.txt`` from https://download.geonames.org/export/dump/) and
+memory-mapped when the server starts. Nothing is loaded into Python objects
+up front; a lookup binary-searches the key index in the mapping and decodes
+only the places it returns, so opening it takes microseconds and a lookup
+a few more.
+
+File layout (little-endian):
+
+- header: magic, version and the offsets and sizes of the sections below
+- block index: one u32 offset per block of BLOCK_SIZE keys
+- keys: normalized place names (see ``geocoding.normalize_query``) in
+  sorted order, front-coded within each block: the first key of a block is
+  stored whole, the others as the length of the prefix they share with the
+  previous key plus the rest. Each key carries the range of its postings.
+- postings: u32 record numbers per key, most populous place first
+- records: one fixed-size record per place with its id, coordinates,
+  population and elevation and the pool offsets of its strings
+- string pool: UTF-8 names, countries, regions, time zones and GeoNames
+  feature codes, each stored once
+
+Places are keyed on their name and ASCII name. Results use the geocoding
+API's format, and the GeoNames ids are the ids that API returns.
+
+Build a gazetteer with::
+
+    uv run mcp-open-meteo-elicit-gazetteer cities15000.txt -o gazetteer.bin \\
+        --countries countryInfo.txt --admin1 admin1CodesASCII.txt \\
+        --admin2 admin2Codes.txt
+"""
+
+import argparse
+import logging
+import math
+import mmap
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .config import GAZETTEER_PATH
+from .geocoding import normalize_query
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"OMGAZ\x00\x00\x00"
+VERSION = 2
+BLOCK_SIZE = 16  # Keys per front-coded block
+MAX_KEY_BYTES = 255
+
+# magic, version, key count, block count, record count, then the offsets of
+# the block index, keys, postings, records and string pool sections
+_HEADER = struct.Struct("<8sIIIIIIIII")
+# id, latitude, longitude, population, elevation (NO_ELEVATION if unknown),
+# then (offset, length) in the string pool of name, country, admin1, admin2,
+# timezone and feature code
+_RECORD = struct.Struct("<IffIhIHIHIHIHIHIH")
+_U32 = struct.Struct("<I")
+# First key of a block: length, then the key; the postings range follows
+_FIRST_KEY = struct.Struct("<B")
+# Other keys: shared prefix length and suffix length, then the suffix
+_NEXT_KEY = struct.Struct("<BB")
+# Postings range of a key: first posting and count
+_POSTINGS = struct.Struct("<IH")
+NO_ELEVATION = -32768
+
+
+class Gazetteer:
+    """Read-only view of a gazetteer file; lookups decode only what they return"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.key_count, self.block_count, self.record_count,
+         self._blocks_offset, self._keys_offset, self._postings_offset,
+         self._records_offset, self._pool_offset) = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a version {VERSION} gazetteer file")
+        # Read the block index in place; it is the hot part of every lookup
+        self._block_offsets = memoryview(self._map)[
+            self._blocks_offset:self._blocks_offset + 4 * self.block_count
+        ].cast("I")
+        if sys.byteorder == "big":
+            self._block_offsets = array("I", self._block_offsets)
+            self._block_offsets.byteswap()
+        self.lookups = 0
+        self.hits = 0
+
+    def _first_key(self, block: int) -> bytes:
+        offset = self._keys_offset + self._block_offsets[block]
+        return self._map[offset + 1:offset + 1 + self._map[offset]]
+
+    def _postings(self, key: bytes) -> Optional[Tuple[int, int]]:
+        """(first posting, count) for `key`, or None if it is not in the index"""
+        # The last block whose first key is <= key
+        low, high = 0, self.block_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._first_key(middle) <= key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == 0:
+            return None
+        block = low - 1
+
+        data = self._map
+        offset = self._keys_offset + self._block_offsets[block]
+        length = data[offset]
+        current = data[offset + 1:offset + 1 + length]
+        offset += 1 + length
+        keys_in_block = min(BLOCK_SIZE, self.key_count - block * BLOCK_SIZE)
+        for i in range(keys_in_block):
+            if i:
+                shared, length = data[offset], data[offset + 1]
+                current = current[:shared] + data[offset + 2:offset + 2 + length]
+                offset += 2 + length
+            if current == key:
+                return _POSTINGS.unpack_from(self._map, offset)
+            if current > key:
+                return None
+            offset += _POSTINGS.size
+        return None
+
+    def _string(self, offset: int, length: int) -> Optional[str]:
+        if not length:
+            return None
+        start = self._pool_offset + offset
+        return self._map[start:start + length].decode("utf-8")
+
+    def _place(self, record: int) -> Dict[str, Any]:
+        (place_id, latitude, longitude, population, elevation,
+         name, name_length, country, country_length, admin1, admin1_length,
+         admin2, admin2_length, timezone, timezone_length,
+         feature_code, feature_code_length
+         ) = _RECORD.unpack_from(self._map,
+                                 self._records_offset + record * _RECORD.size)
+        return {
+            "id": place_id,
+            "name": self._string(name, name_length),
+            "latitude": round(latitude, 5),
+            "longitude": round(longitude, 5),
+            "feature_code": self._string(feature_code, feature_code_length),
+            "country": self._string(country, country_length) or "",
+            "admin1": self._string(admin1, admin1_length),
+            "admin2": self._string(admin2, admin2_length),
+            "timezone": self._string(timezone, timezone_length),
+            "population": population or None,
+            "elevation": float(elevation) if elevation != NO_ELEVATION else None
+        }
+
+    def lookup(self, name: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Places named `name` (normalized), most populous first"""
+        self.lookups += 1
+        key = normalize_query(name).encode("utf-8")
+        postings = self._postings(key) if key else None
+        if postings is None:
+            return []
+        self.hits += 1
+        first, count = postings
+        start = self._postings_offset + 4 * first
+        return [
+            self._place(_U32.unpack_from(self._map, start + 4 * i)[0])
+            for i in range(min(count, limit))
+        ]
+
+    def names(self) -> Iterator[str]:
+        """Every key in the index, in sorted order"""
+        data = self._map
+        for block in range(self.block_count):
+            offset = self._keys_offset + self._block_offsets[block]
+            length = data[offset]
+            current = data[offset + 1:offset + 1 + length]
+            offset += 1 + length + _POSTINGS.size
+            yield current.decode("utf-8")
+            for _ in range(1, min(BLOCK_SIZE, self.key_count - block * BLOCK_SIZE)):
+                shared, length = data[offset], data[offset + 1]
+                current = current[:shared] + data[offset + 2:offset + 2 + length]
+                offset += 2 + length + _POSTINGS.size
+                yield current.decode("utf-8")
+
+    def close(self) -> None:
+        if isinstance(self._block_offsets, memoryview):
+            self._block_offsets.release()
+        self._map.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the index size and the lookup hit ratio"""
+        return {
+            "path": self.path,
+            "keys": self.key_count,
+            "places": self.record_count,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_ratio": self.hits / self.lookups if self.lookups else 0.0
+        }
+
+
+def open_gazetteer(path: str = GAZETTEER_PATH) -> Optional[Gazetteer]:
+    """Open the configured gazetteer, or return None if it is missing or unusable"""
+    if not path:
+        return None
+    try:
+        return Gazetteer(path)
+    except (OSError, ValueError, struct.error) as exc:
+        logger.warning("Gazetteer at %s not used: %s", path, exc)
+        return None
+
+
+gazetteer = open_gazetteer()
+if gazetteer is not None:
+    metrics.register("gazetteer", gazetteer.stats)
+
+
+def local_places(name: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Places named `name` in the gazetteer; empty if there is none or no match"""
+    if gazetteer is None:
+        return []
+    places = gazetteer.lookup(name, limit)
+    if places:
+        metrics.inc("cache_lookups_total", kind="geocoding", result="gazetteer")
+    return places
+
+
+def _read_names(path: Optional[str], key_column: int,
+                name_column: int) -> Dict[str, str]:
+    """Read a GeoNames code table (countryInfo.txt, admin1CodesASCII.txt, ...)"""
+    names: Dict[str, str] = {}
+    if path is None:
+        return names
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if line.startswith("#"):
+                continue
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) > max(key_column, name_column):
+                names[fields[key_column]] = fields[name_column]
+    return names
+
+
+def build_gazetteer(cities_path: str, output_path: str,
+                    countries_path: Optional[str] = None,
+                    admin1_path: Optional[str] = None,
+                    admin2_path: Optional[str] = None,
+                    min_population: int = 0) -> Tuple[int, int]:
+    """
+    Build a gazetteer file from a GeoNames cities extract.
+
+    Country and region codes are turned into names with the optional
+    GeoNames code tables; without them countries are left as codes and
+    regions empty. Returns the number of places and of keys.
+    """
+    countries = _read_names(countries_path, 0, 4)
+    admin1_names = _read_names(admin1_path, 0, 1)
+    admin2_names = _read_names(admin2_path, 0, 1)
+
+    pool = bytearray()
+    pool_offsets: Dict[str, Tuple[int, int]] = {}
+
+    def pooled(text: Optional[str]) -> Tuple[int, int]:
+        if not text:
+            return 0, 0
+        if text not in pool_offsets:
+            data = text.encode("utf-8")[:0xFFFF]
+            pool_offsets[text] = (len(pool), len(data))
+            pool.extend(data)
+        return pool_offsets[text]
+
+    places: List[Tuple[int, bytes]] = []  # (population, packed record)
+    keys: Dict[bytes, List[int]] = {}
+    with open(cities_path, encoding="utf-8") as file:
+        for line in file:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 19:
+                continue
+            population = int(fields[14] or 0)
+            if population < min_population:
+                continue
+            country_code, admin1_code, admin2_code = fields[8], fields[10], fields[11]
+            elevation = fields[15] or fields[16]  # Elevation, else the DEM value
+            elevation_m = NO_ELEVATION
+            if elevation and elevation != "-9999":
+                elevation_m = max(-32767, min(32767, round(float(elevation))))
+            strings = [
+                pooled(fields[1]),
+                pooled(countries.get(country_code, country_code)),
+                pooled(admin1_names.get(f"{country_code}.{admin1_code}")),
+                pooled(admin2_names.get(f"{country_code}.{admin1_code}.{admin2_code}")),
+                pooled(fields[17]),
+                pooled(fields[7])
+            ]
+            record = _RECORD.pack(
+                int(fields[0]), float(fields[4]), float(fields[5]),
+                min(population, 0xFFFFFFFF), elevation_m,
+                *[value for pair in strings for value in pair]
+            )
+            number = len(places)
+            places.append((population, record))
+            for name in {fields[1], fields[2]}:
+                key = normalize_query(name).encode("utf-8")
+                if key and len(key) <= MAX_KEY_BYTES:
+                    keys.setdefault(key, []).append(number)
+
+    sorted_keys = sorted(keys)
+    blocks = bytearray()
+    key_section = bytearray()
+    postings = bytearray()
+    posting_count = 0
+    previous = b""
+    for i, key in enumerate(sorted_keys):
+        if i % BLOCK_SIZE == 0:
+            blocks += _U32.pack(len(key_section))
+            key_section += _FIRST_KEY.pack(len(key)) + key
+        else:
+            shared = 0
+            common = min(len(key), len(previous))
+            while shared < common and key[shared] == previous[shared]:
+                shared += 1
+            key_section += _NEXT_KEY.pack(shared, len(key) - shared) + key[shared:]
+        numbers = sorted(set(keys[key]), key=lambda number: -places[number][0])[:0xFFFF]
+        key_section += _POSTINGS.pack(posting_count, len(numbers))
+        postings += b"".join(_U32.pack(number) for number in numbers)
+        posting_count += len(numbers)
+        previous = key
+
+    records = b"".join(record for _, record in places)
+    blocks_offset = _HEADER.size
+    keys_offset = blocks_offset + len(blocks)
+    postings_offset = keys_offset + len(key_section)
+    records_offset = postings_offset + len(postings)
+    pool_offset = records_offset + len(records)
+    header = _HEADER.pack(MAGIC, VERSION, len(sorted_keys),
+                          math.ceil(len(sorted_keys) / BLOCK_SIZE),
+                          len(places), blocks_offset, keys_offset, postings_offset,
+                          records_offset, pool_offset)
+    with open(output_path, "wb") as file:
+        for section in (header, blocks, key_section, postings, records, pool):
+            file.write(section)
+    return len(places), len(sorted_keys)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Build an offline gazetteer from a GeoNames cities extract"
+    )
+    parser.add_argument("cities", help="GeoNames cities file, e.g. cities15000.txt")
+    parser.add_argument("-o", "--output", required=True, help="gazetteer file to write")
+    parser.add_argument("--countries",
+                        help="GeoNames countryInfo.txt, for country names")
+    parser.add_argument("--admin1",
+                        help="GeoNames admin1CodesASCII.txt, for region names")
+    parser.add_argument("--admin2", help="GeoNames admin2Codes.txt, for district names")
+    parser.add_argument("--min-population", type=int, default=0,
+                        help="leave out smaller places")
+    args = parser.parse_args()
+    places, keys = build_gazetteer(args.cities, args.output, args.countries,
+                                   args.admin1, args.admin2, args.min_population)
+    print(f"Wrote {places} places under {keys} names to {args.output}")
+
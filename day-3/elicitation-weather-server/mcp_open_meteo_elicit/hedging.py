@@ -0,0 +1,127 @@
+"""
+Hedged upstream requests.
+
+Most Open-Meteo responses arrive quickly, but now and then one takes many
+times longer, and those dominate the tail latency of the tools. A `Hedger`
+keeps a rolling window of recent latencies for its endpoint. When a request
+is still unanswered after the chosen percentile of them, it sends a second,
+identical request and returns whichever response arrives first; the other
+request is cancelled. A response that would be retried (429 or 5xx) only
+wins when the other request fails too.
+
+Extra requests are capped by a token budget: every request earns
+`max_extra_ratio` of a hedge, up to a small burst, so hedging adds at most
+that share of upstream traffic even when the upstream slows down as a whole.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+from .config import (
+    HEDGE_MAX_EXTRA_RATIO,
+    HEDGE_MIN_DELAY_SECONDS,
+    HEDGE_MIN_SAMPLES,
+    HEDGE_PERCENTILE,
+    HEDGE_WINDOW,
+    UPSTREAM_RETRY_STATUS_CODES,
+)
+from .metrics import metrics
+
+T = TypeVar("T")
+
+
+def _answered(task: "asyncio.Future[Any]") -> bool:
+    """Whether a finished task has a response that is not worth retrying"""
+    if task.exception() is not None:
+        return False
+    status_code = getattr(task.result(), "status_code", None)
+    return status_code not in UPSTREAM_RETRY_STATUS_CODES
+
+
+class Hedger:
+    """Send a duplicate of slow requests to one endpoint and use the first answer"""
+
+    def __init__(self, name: str,
+                 percentile: float = HEDGE_PERCENTILE,
+                 window: int = HEDGE_WINDOW,
+                 min_samples: int = HEDGE_MIN_SAMPLES,
+                 min_delay_seconds: float = HEDGE_MIN_DELAY_SECONDS,
+                 max_extra_ratio: float = HEDGE_MAX_EXTRA_RATIO,
+                 burst: float = 10.0):
+        self.name = name
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay_seconds = min_delay_seconds
+        self.max_extra_ratio = max_extra_ratio
+        self.burst = burst
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._tokens = burst
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.over_budget = 0
+
+    def delay(self) -> Optional[float]:
+        """How long to wait before hedging, or None until enough latencies are known"""
+        if len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(self.percentile * len(ordered)))
+        return max(self.min_delay_seconds, ordered[index])
+
+    async def send(self, send: Callable[[], Awaitable[T]]) -> T:
+        """Run `send()`, hedging it with a second call if it is slow"""
+        self.requests += 1
+        self._tokens = min(self.burst, self._tokens + self.max_extra_ratio)
+        start = time.monotonic()
+        original = asyncio.ensure_future(send())
+        tasks = [original]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.delay())
+            if not done:
+                if self._tokens < 1:
+                    self.over_budget += 1
+                else:
+                    self._tokens -= 1
+                    self.hedged += 1
+                    tasks.append(asyncio.ensure_future(send()))
+            winner = await self._first_answer(tasks)
+            if _answered(winner):
+                self._latencies.append(time.monotonic() - start)
+            if len(tasks) > 1:
+                won = "hedge" if winner is tasks[1] else "original"
+                self.hedge_wins += won == "hedge"
+                metrics.inc("upstream_hedges_total", endpoint=self.name, winner=won)
+            return winner.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    async def _first_answer(tasks: List["asyncio.Future[T]"]) -> "asyncio.Future[T]":
+        """The first task to answer, or the first to finish if none does"""
+        pending = set(tasks)
+        failed = None
+        while pending:
+            done, pending = await asyncio.wait(pending,
+                                               return_when=asyncio.FIRST_COMPLETED)
+            answered = [task for task in sorted(done, key=tasks.index)
+                        if _answered(task)]
+            if answered:
+                return answered[0]
+            failed = failed or min(done, key=tasks.index)
+        return failed  # type: ignore[return-value]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hedge counters, the hedge win rate and the current hedging delay"""
+        delay = self.delay()
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "hedge_win_rate": self.hedge_wins / self.hedged if self.hedged else 0.0,
+            "over_budget": self.over_budget,
+            "hedge_delay_seconds": round(delay, 4) if delay is not None else None
+        }
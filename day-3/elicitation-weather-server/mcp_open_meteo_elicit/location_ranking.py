@@ -0,0 +1,202 @@
+"""
+Ranking of geocoding candidates for ambiguous location names.
+
+The geocoding API returns every place with a matching name, so "Paris" yields
+the French capital and a handful of small towns. Rather than asking the user
+whenever there is more than one candidate, each candidate gets a score
+between 0 and 1, a weighted sum (RANKING_WEIGHTS) of:
+
+- population, on a log scale up to ten million
+- feature class: capitals and administrative seats over other settlements
+  (GeoNames feature codes; candidates without one score 0)
+- name match: 1 for an exact (normalized) match, trigram similarity otherwise
+- proximity to the places most recently resolved in the same session
+
+The best candidate is used directly when it leads the next by at least
+AUTO_RESOLVE_MARGIN; otherwise the user is asked, with the candidates in
+rank order.
+
+With QUERY_LOG_PATH every ranked resolution is appended to a JSON-lines log
+(query, candidates, the place used, whether the user was asked and how long
+they took), which ``benchmarks/bench_location_ranking.py`` replays to
+measure the elicitation rate and latency of a ranking configuration.
+"""
+
+import json
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+from .config import (
+    AUTO_RESOLVE_MARGIN,
+    QUERY_LOG_PATH,
+    RANKING_PROXIMITY_KM,
+    RANKING_RECENT_LOCATIONS,
+    RANKING_WEIGHTS,
+)
+from .geocoding import normalize_query
+from .metrics import metrics
+from .place_index import trigrams
+
+logger = logging.getLogger(__name__)
+
+# Score of each GeoNames populated-place feature code
+FEATURE_SCORES = {
+    "PPLC": 1.0,   # Capital of a country
+    "PPLG": 0.9,   # Seat of government
+    "PPLA": 0.8,   # Seat of a first-order administrative division
+    "PPLA2": 0.6,
+    "PPLA3": 0.5,
+    "PPLA4": 0.4,
+    "PPL": 0.3,    # Populated place
+    "PPLX": 0.1,   # Section of a populated place
+}
+EARTH_RADIUS_KM = 6371.0
+
+
+def distance_km(latitude1: float, longitude1: float,
+                latitude2: float, longitude2: float) -> float:
+    """Great-circle distance between two points"""
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    delta_lambda = math.radians(longitude2 - longitude1)
+    half_chord = (math.sin((phi2 - phi1) / 2) ** 2
+                  + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(half_chord)))
+
+
+class LocationRanker:
+    """Score candidates and decide whether the best one is clear enough to use"""
+
+    def __init__(self, weights: Dict[str, float] = RANKING_WEIGHTS,
+                 margin: float = AUTO_RESOLVE_MARGIN,
+                 recent_locations: int = RANKING_RECENT_LOCATIONS,
+                 proximity_km: float = RANKING_PROXIMITY_KM):
+        self.weights = weights
+        self.margin = margin
+        self.recent_locations = recent_locations
+        self.proximity_km = proximity_km
+        # (normalized name, latitude, longitude) of recent places by session
+        self._recent: "WeakKeyDictionary[Any, Deque[Tuple[str, float, float]]]" = (
+            WeakKeyDictionary()
+        )
+        self.ranked = 0
+        self.auto_resolved = 0
+
+    def score(self, query: str, place: Dict[str, Any],
+              recent: Optional[Deque[Tuple[str, float, float]]] = None) -> float:
+        """Score of one candidate for a normalized query"""
+        population = min(1.0, math.log10((place.get("population") or 0) + 1) / 7)
+        feature = FEATURE_SCORES.get(place.get("feature_code") or "", 0.0)
+        name = normalize_query(place.get("name") or "")
+        if name == query:
+            name_match = 1.0
+        else:
+            query_grams, name_grams = trigrams(query), trigrams(name)
+            name_match = (2 * len(query_grams & name_grams)
+                          / (len(query_grams) + len(name_grams)))
+        proximity = max(
+            (math.exp(-distance_km(latitude, longitude,
+                                   place["latitude"], place["longitude"])
+                      / self.proximity_km)
+             for _, latitude, longitude in recent or ()),
+            default=0.0
+        )
+        return (self.weights["population"] * population
+                + self.weights["feature"] * feature
+                + self.weights["name"] * name_match
+                + self.weights["proximity"] * proximity)
+
+    def rank(self, session: Any, location_name: str,
+             places: List[Dict[str, Any]]) -> List[Tuple[float, Dict[str, Any]]]:
+        """(score, place) for each candidate, best first"""
+        self.ranked += 1
+        query = normalize_query(location_name)
+        recent = self._recent.get(session)
+        scored = [(self.score(query, place, recent), place) for place in places]
+        scored.sort(key=lambda candidate: -candidate[0])
+        return scored
+
+    def pick(self, ranked: List[Tuple[float, Dict[str, Any]]]
+             ) -> Optional[Dict[str, Any]]:
+        """The best candidate if it leads the next by at least the margin, else None"""
+        if len(ranked) > 1 and ranked[0][0] - ranked[1][0] < self.margin:
+            return None
+        self.auto_resolved += 1
+        return ranked[0][1]
+
+    def note(self, session: Any, location_name: str, place: Dict[str, Any]) -> None:
+        """Record the place `location_name` resolved to in `session`, for proximity"""
+        recent = self._recent.get(session)
+        if recent is None:
+            recent = self._recent[session] = deque(maxlen=self.recent_locations)
+        recent.append((normalize_query(location_name),
+                       place["latitude"], place["longitude"]))
+
+    def forget(self, session: Any, location_name: Optional[str] = None) -> int:
+        """
+        Forget the places `location_name`, or every name, resolved to in
+        `session`. Returns how many recent places were dropped.
+        """
+        recent = self._recent.get(session)
+        if recent is None:
+            return 0
+        if location_name is None:
+            del self._recent[session]
+            return len(recent)
+        query = normalize_query(location_name)
+        kept = [entry for entry in recent if entry[0] != query]
+        dropped = len(recent) - len(kept)
+        recent.clear()
+        recent.extend(kept)
+        return dropped
+
+    def stats(self) -> Dict[str, Any]:
+        """Return how many ambiguous names were ranked and how many were not asked"""
+        return {
+            "ranked": self.ranked,
+            "auto_resolved": self.auto_resolved,
+            "auto_resolve_rate": (
+                self.auto_resolved / self.ranked if self.ranked else 0.0
+            ),
+            "margin": self.margin
+        }
+
+
+def _logged_place(place: Dict[str, Any]) -> Dict[str, Any]:
+    """The fields of a candidate the ranking uses, plus enough to recognize it"""
+    return {key: place.get(key) for key in
+            ("id", "name", "latitude", "longitude", "feature_code", "population",
+             "country", "admin1")}
+
+
+def record_resolution(session: Any, location_name: str,
+                      candidates: List[Dict[str, Any]],
+                      chosen: Dict[str, Any], elicited: bool,
+                      elicitation_seconds: Optional[float] = None,
+                      path: str = QUERY_LOG_PATH) -> None:
+    """Append a ranked resolution to the query log, if one is configured"""
+    if not path:
+        return
+    entry = {
+        "time": round(time.time(), 3),
+        "session": f"{id(session):x}",
+        "query": location_name,
+        "candidates": [_logged_place(place) for place in candidates],
+        "chosen": chosen["id"],
+        "elicited": elicited,
+        "elicitation_seconds": (
+            round(elicitation_seconds, 3) if elicitation_seconds is not None else None
+        )
+    }
+    try:
+        with open(path, "a", encoding="utf-8") as log:
+            log.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    except OSError as exc:
+        logger.warning("Could not write query log %s: %s", path, exc)
+
+
+location_ranker = LocationRanker()
+metrics.register("location_ranker", location_ranker.stats)
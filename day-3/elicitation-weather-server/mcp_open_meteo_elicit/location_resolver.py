@@ -1,48 +1,126 @@
 """
 Location resolution and disambiguation logic.
 
-This module handles resolving location names to coordinates, including
-managing ambiguous location results through MCP elicitation when multiple
-locations are found for a given search term.
+This module handles resolving location names to coordinates, from the
+offline gazetteer when one is configured and the geocoding API otherwise,
+including managing ambiguous location results through MCP elicitation when
+multiple locations are found for a given search term. Candidates are ranked
+first (see ``location_ranking``) and the user is only asked when no candidate
+is a clear favourite. The place chosen for a name is remembered (see
+``choice_memo``), so it is asked for only once. While the user chooses, the
+caller's forecast can be prefetched for every candidate, so the tool result
+is ready as soon as the answer arrives. Unanswered elicitations time out
+and fall back to the best-ranked candidate.
 
 MCP specification: https://modelcontextprotocol.io/specification/draft/client/elicitation
 SDK documentation: https://github.com/modelcontextprotocol/python-sdk?tab=readme-ov-file#elicitation
 """
 
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
 from mcp.server.fastmcp import Context # 
 from .models import LocationInfo, LocationChoice
 from .api_client import search_locations
-from .config import MAX_LOCATION_ELICITATION_OPTIONS
+from .choice_memo import choice_memo
+from .location_ranking import location_ranker, record_resolution
+from .gazetteer import local_places
+from .geocoding import location_info
+from .config import (
+    MAX_LOCATION_ELICITATION_OPTIONS, ELICITATION_TIMEOUT_SECONDS,
+    PREFETCH_BUDGET_SECONDS
+)
+from .metrics import metrics
+from .query_planner import QueryPlan, query_planner
+from .resilience import deadline, deadline_paused
+from .tracing import annotate, span, traced
 
+logger = logging.getLogger(__name__)
 
-async def resolve_location(location_name: str, ctx: Context) -> LocationInfo:
+
+def _place_label(place: Dict[str, Any]) -> str:
+    """Name, region and country of a candidate place"""
+    admin_str = f", {place['admin1']}" if place.get("admin1") else ""
+    return f"{place['name']}{admin_str}, {place['country']}"
+
+
+def _unconfirmed_note(reason: str, selected: Dict[str, Any],
+                      others: List[Dict[str, Any]]) -> str:
+    """Note naming the place used without the user's confirmation, and the others"""
+    note = f"{reason}: {_place_label(selected)}."
+    if others:
+        note += f" Other matches: {'; '.join(map(_place_label, others))}."
+    return note + " Name the place more precisely if this is not the one meant."
+
+
+async def _prefetch(plan: QueryPlan, coordinates: List[Tuple[float, float]]) -> None:
+    """Prefetch `plan` for the candidates, not bound by the waiting tool's deadline"""
+    with deadline(PREFETCH_BUDGET_SECONDS, detached=True):
+        await query_planner.prefetch(plan, coordinates)
+
+
+def _log_prefetch_failure(task: "asyncio.Future[None]") -> None:
+    """Log why a prefetch failed; the tool call fetches its own data instead"""
+    if not task.cancelled() and task.exception() is not None:
+        logger.debug("Prefetch of location candidates failed",
+                     exc_info=task.exception())
+
+
+@metrics.timed("location_resolve_seconds")
+@traced("resolve_location")
+async def resolve_location(location_name: str, ctx: Context,
+                           prefetch: Optional[QueryPlan] = None
+                           ) -> Tuple[LocationInfo, Optional[str]]:
     """
-    Resolve a location name to coordinates, handling ambiguous results with elicitation
+    Resolve a location name to coordinates, handling ambiguous results with elicitation.
+
+    Returns the location and a note for the user when it was picked without
+    their confirmation, naming the other candidates: a candidate leading the
+    others by AUTO_RESOLVE_MARGIN is used without asking, and an elicitation
+    left unanswered for ELICITATION_TIMEOUT_SECONDS resolves to the
+    best-ranked candidate (the next call for the name asks again).
+
+    With `prefetch`, that query plan is fetched for all candidates while the
+    user is asked to choose; it is cancelled if they decline.
     """
-    locations = await search_locations(location_name, limit=10)
+    chosen = choice_memo.get(ctx.session, location_name)
+    if chosen is not None:
+        annotate({"elicitation.remembered": True})
+        location_ranker.note(ctx.session, location_name, chosen)
+        return location_info(chosen), None
+    
+    locations = (local_places(location_name, limit=10)
+                 or await search_locations(location_name, limit=10))
     
     if not locations:
         raise ValueError(f"No locations found for '{location_name}'. Please try a different search term.")
     
     if len(locations) == 1:
         # Single result, use it directly
-        loc = locations[0]
-        return LocationInfo(
-            id=loc["id"],
-            name=loc["name"],
-            latitude=loc["latitude"],
-            longitude=loc["longitude"],
-            country=loc.get("country", ""),
-            admin1=loc.get("admin1"),
-            admin2=loc.get("admin2"),
-            timezone=loc["timezone"],
-            population=loc.get("population"),
-            elevation=loc.get("elevation")
+        location_ranker.note(ctx.session, location_name, locations[0])
+        return location_info(locations[0]), None
+    
+    # Multiple results - use the best one if it clearly stands out
+    ranked = location_ranker.rank(ctx.session, location_name, locations)
+    best = location_ranker.pick(ranked)
+    annotate({"location.candidates": len(ranked),
+              "location.auto_resolved": best is not None})
+    if best is not None:
+        record_resolution(ctx.session, location_name, locations, best, elicited=False)
+        location_ranker.note(ctx.session, location_name, best)
+        others = [place for _, place in ranked[1:MAX_LOCATION_ELICITATION_OPTIONS]]
+        note = _unconfirmed_note(
+            f"'{location_name}' matches several places, so the most likely one"
+            " was used", best, others
         )
+        return location_info(best), note
     
-    # Multiple results - use elicitation to let user choose
+    # Otherwise use elicitation to let user choose, best candidates first
+    # Limit to top 5 for usability
+    candidates = [place for _, place in ranked[:MAX_LOCATION_ELICITATION_OPTIONS]]
     location_options = []
-    for i, loc in enumerate(locations[:MAX_LOCATION_ELICITATION_OPTIONS]):  # Limit to top 5 for usability
+    for i, loc in enumerate(candidates):
         admin_parts = []
         if loc.get("admin1"):
             admin_parts.append(loc["admin1"])
@@ -61,30 +139,75 @@ async def resolve_location(location_name: str, ctx: Context) -> LocationInfo:
     # Create elicitation message
     message = f"Multiple locations found for '{location_name}':\n\n{options_text}\n\nPlease select the correct location:"
     
-    # Use elicitation to get user choice
-    # @link https://github.com/modelcontextprotocol/python-sdk?tab=readme-ov-file#elicitation
-    result = await ctx.elicit(
-        message=message,
-        schema=LocationChoice
-    )
+    # Fetch the caller's forecast for every candidate in one request while
+    # the user chooses; the run for the chosen one then hits the cache
+    prefetching = None
+    if prefetch is not None:
+        prefetching = asyncio.ensure_future(_prefetch(
+            prefetch, [(loc["latitude"], loc["longitude"]) for loc in candidates]
+        ))
+        prefetching.add_done_callback(_log_prefetch_failure)
     
-    if result.action != "accept" or not result.data:
-        raise ValueError("Location selection was cancelled or invalid.")
+    start = time.perf_counter()
+    try:
+        # Use elicitation to get user choice
+        # @link https://github.com/modelcontextprotocol/python-sdk?tab=readme-ov-file#elicitation
+        # The wait for the user gets its own span so it is not mistaken for server
+        # time, and does not count against the tool's latency budget
+        with span("elicitation", {"elicitation.options": len(location_options)}), \
+                deadline_paused():
+            try:
+                result = await asyncio.wait_for(
+                    ctx.elicit(message=message, schema=LocationChoice),
+                    ELICITATION_TIMEOUT_SECONDS or None
+                )
+            except asyncio.TimeoutError:
+                result = None
+            action = result.action if result is not None else "timeout"
+            annotate({"elicitation.action": action})
+    except BaseException:
+        if prefetching is not None:
+            prefetching.cancel()
+        raise
+    elicitation_seconds = time.perf_counter() - start
+    metrics.observe("elicitation_seconds", elicitation_seconds, action=action)
     
-    selected_index = result.data.selected_location_id - 1
-    if selected_index < 0 or selected_index >= len(locations[:MAX_LOCATION_ELICITATION_OPTIONS]):
-        raise ValueError("Invalid location selection. Please choose a number from the list.")
+    note = None
+    if result is None:
+        # Nobody answered: go with the best-ranked candidate and say so
+        selected = candidates[0]
+        metrics.inc("elicitation_fallbacks_total")
+        note = _unconfirmed_note(
+            f"No location was chosen within {ELICITATION_TIMEOUT_SECONDS:g}"
+            f" seconds, so the most likely match for '{location_name}' was used",
+            selected, candidates[1:]
+        )
+        record_resolution(ctx.session, location_name, locations, selected,
+                          elicited=False)
+    else:
+        if result.action != "accept" or not result.data:
+            if prefetching is not None:
+                prefetching.cancel()
+            raise ValueError("Location selection was cancelled or invalid.")
+        
+        selected_index = result.data.selected_location_id - 1
+        if selected_index < 0 or selected_index >= len(candidates):
+            if prefetching is not None:
+                prefetching.cancel()
+            raise ValueError(
+                "Invalid location selection. Please choose a number from the list."
+            )
+        
+        selected = candidates[selected_index]
+        record_resolution(ctx.session, location_name, locations, selected,
+                          elicited=True, elicitation_seconds=elicitation_seconds)
+        choice_memo.remember(ctx.session, location_name, selected)
     
-    selected_location = locations[selected_index]
-    return LocationInfo(
-        id=selected_location["id"],
-        name=selected_location["name"],
-        latitude=selected_location["latitude"],
-        longitude=selected_location["longitude"],
-        country=selected_location.get("country", ""),
-        admin1=selected_location.get("admin1"),
-        admin2=selected_location.get("admin2"),
-        timezone=selected_location["timezone"],
-        population=selected_location.get("population"),
-        elevation=selected_location.get("elevation")
-    )
+    if prefetching is not None and not prefetching.done():
+        # Still in flight: waiting for it beats sending the same request again
+        await asyncio.wait([prefetching])
+    if note is None:
+        # A fallback is only a guess: it must not sway the ranking of later
+        # calls, which ask again until the user makes a choice
+        location_ranker.note(ctx.session, location_name, selected)
+    return location_info(selected), note
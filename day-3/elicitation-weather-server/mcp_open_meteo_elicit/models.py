@@ -42,6 +42,8 @@ class CurrentWeather(BaseModel):
     pressure: float
     cloud_cover: int
     timestamp: str
+    # Set when the location was not confirmed by the user
+    location_note: Optional[str] = None
 
 
 class DailyForecast(BaseModel):
@@ -64,6 +66,8 @@ class WeatherForecast(BaseModel):
     location: LocationInfo
     forecast_days: List[DailyForecast]
     generated_at: str
+    # Set when the location was not confirmed by the user
+    location_note: Optional[str] = None
 
 
 class HourlyWeatherPoint(BaseModel):
@@ -87,3 +91,5 @@ class HourlyForecast(BaseModel):
     precipitation_unit: str
     wind_speed_unit: str
     generated_at: str
+    # Set when the location was not confirmed by the user
+    location_note: Optional[str] = None
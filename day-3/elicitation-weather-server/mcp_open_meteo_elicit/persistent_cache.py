@@ -0,0 +1,217 @@
+"""
+Persistent response cache shared by every server process on a host.
+
+Each stdio client spawns its own server process, and every process used to
+start cold and repeat the geocoding and forecast requests its neighbours had
+just made. This module keeps responses in a SQLite database in WAL mode,
+which lets several processes read while one writes and survives restarts,
+so a freshly spawned server answers recently requested places without
+network I/O.
+
+Entries carry a wall-clock expiry and are stored as JSON (see
+``columnar.encode_json``). Expired entries are kept for
+`retain_expired_seconds` as a fallback for when the upstream times out.
+SQLite errors never fail the request: an operation that finds the database
+locked by another process is skipped (a miss, or a write not made), and any
+other error disables the cache for the rest of the process.
+
+Queries run synchronously on the event loop rather than in a thread: they
+are single-row reads and writes by primary key on a local file, which take
+tens of microseconds, less than a hop to a worker thread. Only waiting for
+another process's write lock can take longer, and that is bounded by
+`busy_timeout_ms`, kept short since the operation is then simply skipped.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from .columnar import decode_json, encode_json
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stored value format changes; older databases are reset
+_SCHEMA_VERSION = 1
+# Expired rows are purged every this many writes
+_PURGE_EVERY_WRITES = 100
+# SQLITE_BUSY and SQLITE_LOCKED: another connection holds the lock
+_LOCKED_ERROR_CODES = (5, 6)
+
+
+def _is_locked(exc: Exception) -> bool:
+    """Whether an SQLite error only means the database was locked at the time"""
+    if not isinstance(exc, sqlite3.OperationalError):
+        return False
+    code = getattr(exc, "sqlite_errorcode", None)  # Python 3.11+
+    if code is not None:
+        return code & 0xFF in _LOCKED_ERROR_CODES
+    return "locked" in str(exc) or "busy" in str(exc)
+
+
+class PersistentCache:
+    """
+    SQLite-backed key/value cache with per-entry TTL, safe to share between processes.
+
+    Keys are JSON-serializable tuples grouped by namespace. The database is
+    opened on first use, so importing the module never touches the disk.
+    """
+
+    def __init__(self, path: str, busy_timeout_ms: int = 100,
+                 retain_expired_seconds: float = 0):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.retain_expired_seconds = retain_expired_seconds
+        self._connection: Optional[sqlite3.Connection] = None
+        self._disabled = False
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.locked = 0
+        self.errors = 0
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._connection is not None or self._disabled:
+            return self._connection
+        connection = None
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000,
+                                         isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # WAL with synchronous=NORMAL never corrupts the database; a crash
+            # can only lose the last few cache writes
+            connection.execute("PRAGMA synchronous=NORMAL")
+            # Check and migrate the schema in one write transaction so that
+            # processes starting together do not reset each other's tables
+            connection.execute("BEGIN IMMEDIATE")
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != _SCHEMA_VERSION:
+                connection.execute("DROP TABLE IF EXISTS responses")
+                connection.execute(f"PRAGMA user_version={_SCHEMA_VERSION}")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+                " expires_at REAL NOT NULL, PRIMARY KEY (namespace, key)"
+                ") WITHOUT ROWID"
+            )
+            connection.execute("COMMIT")
+        except (sqlite3.Error, OSError) as exc:
+            if connection is not None:
+                connection.close()
+            self._failed(exc)
+            return None
+        self._connection = connection
+        return connection
+
+    def _failed(self, exc: Exception) -> None:
+        """Skip the operation if the database was locked, else disable the cache"""
+        if _is_locked(exc):
+            self.locked += 1
+            logger.debug("Persistent cache at %s locked, operation skipped: %s",
+                         self.path, exc)
+            return
+        self.errors += 1
+        self._disabled = True
+        logger.warning("Persistent cache at %s disabled: %s", self.path, exc)
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def get(self, namespace: str, key: Hashable,
+            max_stale_seconds: float = 0) -> Optional[Tuple[Any, float]]:
+        """
+        Return (value, remaining TTL in seconds) for a fresh entry, or None.
+
+        With `max_stale_seconds`, entries expired at most that long ago are
+        returned too, with a negative remaining TTL.
+        """
+        connection = self._connect()
+        if connection is None:
+            return None
+        try:
+            row = connection.execute(
+                "SELECT value, expires_at FROM responses"
+                " WHERE namespace = ? AND key = ?",
+                (namespace, json.dumps(key))
+            ).fetchone()
+        except sqlite3.Error as exc:
+            self._failed(exc)
+            return None
+        remaining = row[1] - time.time() if row is not None else -max_stale_seconds
+        if remaining <= -max_stale_seconds:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return decode_json(row[0]), remaining
+
+    def set(self, namespace: str, key: Hashable, value: Any,
+            ttl_seconds: float) -> None:
+        """Store `value` under `key` for `ttl_seconds`"""
+        connection = self._connect()
+        if connection is None:
+            return
+        now = time.time()
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (namespace, key, value, expires_at)"
+                " VALUES (?, ?, ?, ?)",
+                (namespace, json.dumps(key), encode_json(value), now + ttl_seconds)
+            )
+            self._writes += 1
+            if self._writes % _PURGE_EVERY_WRITES == 0:
+                connection.execute("DELETE FROM responses WHERE expires_at <= ?",
+                                   (now - self.retain_expired_seconds,))
+        except sqlite3.Error as exc:
+            self._failed(exc)
+
+    def values(self, namespace: str, limit: int) -> List[Any]:
+        """Return up to `limit` fresh values stored under `namespace`, newest first"""
+        connection = self._connect()
+        if connection is None:
+            return []
+        try:
+            rows = connection.execute(
+                "SELECT value FROM responses WHERE namespace = ? AND expires_at > ?"
+                " ORDER BY expires_at DESC LIMIT ?",
+                (namespace, time.time(), limit)
+            ).fetchall()
+        except sqlite3.Error as exc:
+            self._failed(exc)
+            return []
+        return [decode_json(row[0]) for row in rows]
+
+    def delete(self, namespace: str, key: Optional[Hashable] = None) -> None:
+        """Remove `key`, or with no key every entry, from `namespace`"""
+        connection = self._connect()
+        if connection is None:
+            return
+        try:
+            if key is None:
+                connection.execute("DELETE FROM responses WHERE namespace = ?",
+                                   (namespace,))
+            else:
+                connection.execute(
+                    "DELETE FROM responses WHERE namespace = ? AND key = ?",
+                    (namespace, json.dumps(key))
+                )
+        except sqlite3.Error as exc:
+            self._failed(exc)
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters, skipped operations and whether it is usable"""
+        return {
+            "path": self.path,
+            "enabled": not self._disabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "locked": self.locked,
+            "errors": self.errors
+        }
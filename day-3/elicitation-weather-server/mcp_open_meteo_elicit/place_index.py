@@ -0,0 +1,171 @@
+"""
+Typo-tolerant place search over a trigram index of known place names.
+
+Every place the geocoding API returns is added to the index, and kept in the
+persistent cache so the index survives restarts. With FUZZY_INDEX_GAZETTEER
+the names in the offline gazetteer are indexed too, on first use.
+
+Names are normalized (see ``geocoding.normalize_query``) and split into
+trigrams, padded so that the start and end of a name weigh more. A query is
+scored against every name sharing a trigram with it by the Dice coefficient
+of their trigram sets, so "pittsburg" matches "pittsburgh" with 0.86 and
+"zurich" matches "zürich" exactly. Matches are ranked by similarity, then
+population.
+"""
+
+import logging
+import math
+import time
+from collections import Counter
+from itertools import chain
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from . import gazetteer as gazetteer_module
+from .config import (
+    FUZZY_INDEX_GAZETTEER,
+    FUZZY_INDEX_MAX_NAMES,
+    FUZZY_MIN_SIMILARITY,
+    PLACE_INDEX_TTL_SECONDS,
+)
+from .geocoding import normalize_query
+from .persistent_cache import PersistentCache
+
+logger = logging.getLogger(__name__)
+
+
+def trigrams(name: str) -> Set[str]:
+    """Padded trigrams of a normalized name"""
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PlaceIndex:
+    """
+    Trigram index of place names, mapping each name to its places.
+
+    Places come from geocoding results (stored with the index) or from the
+    gazetteer (looked up there by name when matched). The persistent cache,
+    if any, is read on first use.
+    """
+
+    def __init__(self, persistent_cache: Optional[PersistentCache] = None,
+                 max_names: int = FUZZY_INDEX_MAX_NAMES,
+                 index_gazetteer: bool = FUZZY_INDEX_GAZETTEER):
+        self.persistent_cache = persistent_cache
+        self.max_names = max_names
+        self.index_gazetteer = index_gazetteer
+        self._names: List[str] = []
+        self._sizes: List[int] = []  # Trigram count per name
+        self._name_ids: Dict[str, int] = {}
+        self._postings: Dict[str, List[int]] = {}
+        # By name, then place id
+        self._places: Dict[str, Dict[int, Dict[str, Any]]] = {}
+        self._loaded = False
+        self.searches = 0
+        self.matches = 0
+
+    def _add_name(self, name: str) -> bool:
+        """Index `name`; returns False when it is empty or the index is full"""
+        if name in self._name_ids:
+            return True
+        if not name or len(self._names) >= self.max_names:
+            return False
+        name_id = len(self._names)
+        grams = trigrams(name)
+        self._names.append(name)
+        self._sizes.append(len(grams))
+        self._name_ids[name] = name_id
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(name_id)
+        return True
+
+    def _add_place(self, place: Dict[str, Any]) -> bool:
+        """Index a geocoding result; returns whether it was new"""
+        name = normalize_query(place.get("name") or "")
+        places = self._places.setdefault(name, {})
+        if place["id"] in places or not self._add_name(name):
+            return False
+        places[place["id"]] = place
+        return True
+
+    def _load(self) -> None:
+        self._loaded = True
+        start = time.perf_counter()
+        if self.persistent_cache is not None:
+            for place in self.persistent_cache.values("place", self.max_names):
+                self._add_place(place)
+        if self.index_gazetteer and gazetteer_module.gazetteer is not None:
+            for name in gazetteer_module.gazetteer.names():
+                if not self._add_name(name):
+                    break
+        if self._names:
+            logger.info("Indexed %d place names in %.2fs", len(self._names),
+                        time.perf_counter() - start)
+
+    def add(self, places: List[Dict[str, Any]]) -> None:
+        """Index geocoding results, storing the new ones in the persistent cache"""
+        if not self._loaded:
+            self._load()
+        for place in places:
+            if self._add_place(place) and self.persistent_cache is not None:
+                self.persistent_cache.set("place", place["id"], place,
+                                          PLACE_INDEX_TTL_SECONDS)
+
+    def _places_named(self, name: str, limit: int) -> List[Dict[str, Any]]:
+        """The places indexed under a normalized name"""
+        places = list(self._places.get(name, {}).values())
+        if not places and gazetteer_module.gazetteer is not None:
+            places = gazetteer_module.gazetteer.lookup(name, limit)
+        return places
+
+    def search(self, query: str, limit: int = 10,
+               min_similarity: float = FUZZY_MIN_SIMILARITY
+               ) -> List[Tuple[float, Dict[str, Any]]]:
+        """Known places named at least `min_similarity` like `query`, best first"""
+        if not self._loaded:
+            self._load()
+        self.searches += 1
+        grams = trigrams(normalize_query(query))
+        # A name at least `min_similarity` like the query shares at least
+        # `least` of its trigrams, so it shares one of the query's rarest
+        # len(grams) - least + 1; only their postings are scanned
+        least = max(1, math.ceil(min_similarity * len(grams) / (2 - min_similarity)))
+        ordered = sorted(grams, key=lambda gram: len(self._postings.get(gram, ())))
+        cut = len(ordered) - least + 1
+        probed, rest = ordered[:cut], set(ordered[cut:])
+        shared = Counter(chain.from_iterable(self._postings.get(gram, ())
+                                             for gram in probed))
+        scored = []
+        for name_id, count in shared.items():
+            total = len(grams) + self._sizes[name_id]
+            if 2 * (count + len(rest)) < min_similarity * total:
+                continue
+            if rest:
+                count += len(rest & trigrams(self._names[name_id]))
+            similarity = 2 * count / total
+            if similarity >= min_similarity:
+                scored.append((similarity, name_id))
+        scored.sort(reverse=True)
+
+        results: List[Tuple[float, Dict[str, Any]]] = []
+        for similarity, name_id in scored:
+            if len(results) >= limit:
+                break
+            places = self._places_named(self._names[name_id], limit)
+            results.extend((similarity, place) for place in places)
+        results.sort(key=lambda match: (-match[0], -(match[1].get("population") or 0)))
+        if results:
+            self.matches += 1
+        return results[:limit]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the index size and how many searches found a match"""
+        return {
+            "names": len(self._names),
+            "trigrams": len(self._postings),
+            "searches": self.searches,
+            "matches": self.matches
+        }
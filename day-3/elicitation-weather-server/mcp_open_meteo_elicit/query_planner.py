@@ -0,0 +1,303 @@
+"""
+Query planning for the weather tools.
+
+A query plan names the variables a tool call reads and the time window it
+covers: hourly data from the current hour for `forecast_hours` hours, daily
+data from today for `forecast_days` days. The planner first looks for a
+cached response for the same grid cell that already covers the plan (a
+weather snapshot, or a wider earlier request) and cuts the plan out of it.
+Otherwise it fetches a full snapshot for the location, or only the smallest
+request that answers the call when QUERY_PLAN_FETCH is "minimal". A plan can
+also be prefetched for several candidate locations in one multi-coordinate
+request.
+
+Each upstream request is logged with its estimated and actual response size,
+and the totals are kept in `QueryPlanner.stats`.
+"""
+
+import logging
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .api_client import (
+    cached_weather_data,
+    get_weather_data,
+    get_weather_data_many,
+    note_weather_access,
+)
+from .config import (
+    ALERT_LOOKAHEAD_HOURS,
+    DEFAULT_FORECAST_DAYS,
+    DEFAULT_PRECIPITATION_UNIT,
+    DEFAULT_TEMPERATURE_UNIT,
+    DEFAULT_WIND_SPEED_UNIT,
+    QUERY_PLAN_FETCH,
+    WEATHER_API_FORMAT,
+)
+from .flatbuffers_transport import FLATBUFFERS_AVAILABLE
+from .metrics import metrics
+from .snapshot import (
+    SNAPSHOT_CURRENT_PARAMS,
+    SNAPSHOT_DAILY_PARAMS,
+    SNAPSHOT_HOURLY_PARAMS,
+)
+from .tracing import annotate, traced
+from .units import convert_weather_data, validate_units
+
+logger = logging.getLogger(__name__)
+
+# Variables read by each tool
+CURRENT_WEATHER_PARAMS = (
+    "temperature_2m", "relative_humidity_2m", "weather_code", "wind_speed_10m",
+    "wind_direction_10m", "pressure_msl", "cloud_cover"
+)
+HOURLY_FORECAST_PARAMS = (
+    "temperature_2m", "relative_humidity_2m", "weather_code", "precipitation",
+    "wind_speed_10m", "wind_direction_10m", "cloud_cover"
+)
+DAILY_FORECAST_PARAMS = (
+    "temperature_2m_max", "temperature_2m_min", "weather_code",
+    "precipitation_sum", "wind_speed_10m_max", "wind_direction_10m_dominant"
+)
+ALERT_CURRENT_PARAMS = ("weather_code", "wind_speed_10m")
+ALERT_HOURLY_PARAMS = ("weather_code",)
+
+# Response size model: fixed metadata, per-variable overhead (the name is
+# sent twice in JSON, in the values and units blocks), and per-value cost
+_JSON_BASE_BYTES = 250
+_JSON_VARIABLE_BYTES = 16
+_JSON_VALUE_BYTES = 5  # e.g. `12.3,`
+_JSON_TIME_BYTES = {"hourly": 19, "daily": 13}  # e.g. `"2026-10-16T14:00",`
+_FLATBUFFERS_BASE_BYTES = 100
+_FLATBUFFERS_VARIABLE_BYTES = 40
+_FLATBUFFERS_VALUE_BYTES = 4  # float32
+
+_BLOCKS = ("current", "hourly", "daily")
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """The variables and time window one tool call needs"""
+    current: Tuple[str, ...] = ()
+    hourly: Tuple[str, ...] = ()
+    daily: Tuple[str, ...] = ()
+    forecast_hours: int = 0  # 0 means forecast_days whole days from midnight
+    forecast_days: int = 0
+
+    def covered_by(self, shape: Tuple) -> bool:
+        """Whether a cached request shape includes every variable of the plan"""
+        planned = (self.current, self.hourly, self.daily)
+        return all(set(names) <= set(cached)
+                   for names, cached in zip(planned, shape[:3]))
+
+    def estimated_bytes(self) -> int:
+        """Estimate the size of the upstream response for this plan"""
+        flatbuffers = WEATHER_API_FORMAT == "flatbuffers" and FLATBUFFERS_AVAILABLE
+        hours = self.forecast_hours or self.forecast_days * 24
+        blocks = (("current", self.current, 1), ("hourly", self.hourly, hours),
+                  ("daily", self.daily, self.forecast_days))
+        if flatbuffers:
+            return _FLATBUFFERS_BASE_BYTES + sum(
+                len(names)
+                * (_FLATBUFFERS_VARIABLE_BYTES + count * _FLATBUFFERS_VALUE_BYTES)
+                for _, names, count in blocks
+            )
+        size = _JSON_BASE_BYTES
+        for block, names, count in blocks:
+            if not names:
+                continue
+            size += sum(2 * len(name) + _JSON_VARIABLE_BYTES for name in names)
+            size += len(names) * count * _JSON_VALUE_BYTES
+            size += _JSON_TIME_BYTES.get(block, 0) * count
+        return size
+
+    def select(self, data: Dict[str, Any],
+               partial: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Cut the plan's variables and time window out of a response.
+
+        Returns None if the response does not reach far enough, unless
+        `partial` is set, in which case the series are as long as available.
+        """
+        now = _local_time(data)
+        selected = {key: value for key, value in data.items()
+                    if key not in _BLOCKS and not key.endswith("_units")}
+        if self.current:
+            names = ("time", "interval") + self.current
+            selected["current"] = _pick(data["current"], names)
+            selected["current_units"] = _pick(data["current_units"], names)
+
+        for block, names, count, start in (
+            ("hourly", self.hourly, self.forecast_hours,
+             now.strftime("%Y-%m-%dT%H:00")),
+            ("daily", self.daily, self.forecast_days, now.strftime("%Y-%m-%d")),
+        ):
+            if not names:
+                continue
+            series = data[block]
+            first = bisect_left(series["time"], start)
+            if len(series["time"]) - first < count and not partial:
+                return None
+            selected[block] = {name: series[name][first:first + count]
+                               for name in ("time",) + names}
+            selected[f"{block}_units"] = _pick(data[f"{block}_units"],
+                                               ("time",) + names)
+        return selected
+
+
+def _pick(block: Dict[str, Any], names: Sequence[str]) -> Dict[str, Any]:
+    return {name: block[name] for name in names if name in block}
+
+
+def _local_time(data: Dict[str, Any]) -> datetime:
+    """Current wall-clock time in the timezone of a response"""
+    offset = timedelta(seconds=data.get("utc_offset_seconds") or 0)
+    return datetime.now(timezone.utc).replace(tzinfo=None) + offset
+
+
+def plan_current_weather() -> QueryPlan:
+    return QueryPlan(current=CURRENT_WEATHER_PARAMS)
+
+
+def plan_daily_forecast(forecast_days: int) -> QueryPlan:
+    return QueryPlan(daily=DAILY_FORECAST_PARAMS, forecast_days=forecast_days)
+
+
+def plan_hourly_forecast(forecast_hours: int) -> QueryPlan:
+    return QueryPlan(hourly=HOURLY_FORECAST_PARAMS, forecast_hours=forecast_hours)
+
+
+def plan_weather_alerts() -> QueryPlan:
+    return QueryPlan(current=ALERT_CURRENT_PARAMS, hourly=ALERT_HOURLY_PARAMS,
+                     forecast_hours=ALERT_LOOKAHEAD_HOURS)
+
+
+def _snapshot_plan(plan: QueryPlan) -> QueryPlan:
+    """The snapshot request that covers a plan"""
+    # Snapshot hourly data starts at midnight, so allow for today's elapsed hours
+    days = max(plan.forecast_days, -(-plan.forecast_hours // 24) + 1,
+               DEFAULT_FORECAST_DAYS)
+    return QueryPlan(
+        current=tuple(SNAPSHOT_CURRENT_PARAMS),
+        hourly=tuple(SNAPSHOT_HOURLY_PARAMS),
+        daily=tuple(SNAPSHOT_DAILY_PARAMS),
+        forecast_days=days
+    )
+
+
+class QueryPlanner:
+    """
+    Serves query plans from cached responses or the smallest upstream request.
+
+    Counts plans served from cache and sent upstream, with the estimated and
+    actual size of the upstream responses, and prefetched locations.
+    """
+
+    def __init__(self):
+        self.plans = 0
+        self.served_from_cache = 0
+        self.upstream_requests = 0
+        self.estimated_bytes = 0
+        self.response_bytes = 0
+        self.prefetches = 0
+        self.prefetched_locations = 0
+
+    @traced("query_plan")
+    async def run(self, plan: QueryPlan, latitude: float, longitude: float,
+                  temperature_unit: str = DEFAULT_TEMPERATURE_UNIT,
+                  wind_speed_unit: str = DEFAULT_WIND_SPEED_UNIT,
+                  precipitation_unit: str = DEFAULT_PRECIPITATION_UNIT
+                  ) -> Dict[str, Any]:
+        """Get the data for a plan at a location, converted to the requested units"""
+        validate_units(temperature_unit, wind_speed_unit, precipitation_unit)
+        self.plans += 1
+
+        hit = self._from_cache(plan, latitude, longitude)
+        if hit is not None:
+            shape, selected = hit
+            note_weather_access(latitude, longitude, shape)
+            self.served_from_cache += 1
+            annotate({"query_plan.source": "cached_forecast"})
+            return convert_weather_data(selected, temperature_unit, wind_speed_unit,
+                                        precipitation_unit)
+
+        upstream = _snapshot_plan(plan) if QUERY_PLAN_FETCH == "snapshot" else plan
+        data = await get_weather_data(
+            latitude, longitude,
+            current=list(upstream.current) or None,
+            hourly=list(upstream.hourly) or None,
+            daily=list(upstream.daily) or None,
+            forecast_days=upstream.forecast_days or None,
+            forecast_hours=upstream.forecast_hours or None
+        )
+
+        estimated = upstream.estimated_bytes()
+        actual = data.get("response_bytes", 0)
+        self.upstream_requests += 1
+        self.estimated_bytes += estimated
+        self.response_bytes += actual
+        logger.debug("Query plan %s: estimated %d bytes, received %d bytes",
+                     upstream, estimated, actual)
+        annotate({"query_plan.source": "fetch", "query_plan.estimated_bytes": estimated,
+                  "query_plan.response_bytes": actual})
+
+        selected = plan.select(data, partial=True)
+        return convert_weather_data(selected, temperature_unit, wind_speed_unit,
+                                    precipitation_unit)
+
+    @staticmethod
+    def _from_cache(plan: QueryPlan, latitude: float,
+                    longitude: float) -> Optional[Tuple[Tuple, Dict[str, Any]]]:
+        """(shape, selected data) from a cached response covering the plan, or None"""
+        for shape, cached in cached_weather_data(latitude, longitude):
+            if plan.covered_by(shape):
+                selected = plan.select(cached)
+                if selected is not None:
+                    return shape, selected
+        return None
+
+    @traced("query_prefetch")
+    async def prefetch(self, plan: QueryPlan,
+                       coordinates: List[Tuple[float, float]]) -> None:
+        """
+        Fetch a plan for several locations in one multi-coordinate request, so
+        that a later `run` for any of them is served from cache. Locations
+        whose data is already cached are skipped.
+        """
+        missing = [(latitude, longitude) for latitude, longitude in coordinates
+                   if self._from_cache(plan, latitude, longitude) is None]
+        annotate({"query_prefetch.locations": len(coordinates),
+                  "query_prefetch.fetched": len(missing)})
+        if not missing:
+            return
+        upstream = _snapshot_plan(plan) if QUERY_PLAN_FETCH == "snapshot" else plan
+        await get_weather_data_many(
+            missing,
+            current=list(upstream.current) or None,
+            hourly=list(upstream.hourly) or None,
+            daily=list(upstream.daily) or None,
+            forecast_days=upstream.forecast_days or None,
+            forecast_hours=upstream.forecast_hours or None
+        )
+        self.prefetches += 1
+        self.prefetched_locations += len(missing)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return plan counters and estimated versus actual upstream response bytes"""
+        estimated = self.estimated_bytes
+        return {
+            "plans": self.plans,
+            "served_from_cache": self.served_from_cache,
+            "upstream_requests": self.upstream_requests,
+            "estimated_bytes": self.estimated_bytes,
+            "response_bytes": self.response_bytes,
+            "estimate_ratio": self.response_bytes / estimated if estimated else 0.0,
+            "prefetches": self.prefetches,
+            "prefetched_locations": self.prefetched_locations
+        }
+
+
+query_planner = QueryPlanner()
+metrics.register("query_planner", query_planner.stats)
@@ -0,0 +1,186 @@
+"""
+Background refresh of hot forecasts.
+
+The API client counts how often each forecast is requested (see
+``api_client.forecast_access``). While the server runs, this module wakes up
+every REFRESH_INTERVAL_SECONDS, takes the REFRESH_TOP_N most requested
+forecasts and re-fetches those that expire within REFRESH_AHEAD_SECONDS (or
+are no longer cached) in batched multi-coordinate requests. Hot locations
+are thus always answered from cache.
+
+Refreshes are limited to REFRESH_MAX_REQUESTS_PER_MINUTE upstream requests.
+`RefreshScheduler.stats` reports the budget in use and the refresh lag: how
+late, relative to REFRESH_AHEAD_SECONDS before expiry, entries were
+refreshed.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from .api_client import forecast_access, refresh_weather_data, weather_expires_in
+from .config import (
+    FORECAST_BATCH_MAX_POINTS,
+    REFRESH_ACTIVE_HOURS,
+    REFRESH_AHEAD_SECONDS,
+    REFRESH_ENABLED,
+    REFRESH_INTERVAL_SECONDS,
+    REFRESH_MAX_REQUESTS_PER_MINUTE,
+    REFRESH_MIN_ACCESSES,
+    REFRESH_TOP_N,
+)
+from .metrics import metrics
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshScheduler:
+    """Periodically re-fetches the hottest forecasts before they expire"""
+
+    def __init__(self, interval_seconds: float = REFRESH_INTERVAL_SECONDS,
+                 ahead_seconds: float = REFRESH_AHEAD_SECONDS,
+                 top_n: int = REFRESH_TOP_N,
+                 max_requests_per_minute: int = REFRESH_MAX_REQUESTS_PER_MINUTE):
+        self.interval_seconds = interval_seconds
+        self.ahead_seconds = ahead_seconds
+        self.top_n = top_n
+        self.max_requests_per_minute = max_requests_per_minute
+        self._sent_at: Deque[float] = deque()
+        self.cycles = 0
+        self.refreshed = 0
+        self.cold_refreshes = 0
+        self.deferred = 0
+        self.requests_sent = 0
+        self.requests_failed = 0
+        self.last_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+
+    def _budget_left(self, now: float) -> int:
+        while self._sent_at and now - self._sent_at[0] >= 60:
+            self._sent_at.popleft()
+        return self.max_requests_per_minute - len(self._sent_at)
+
+    def due(self) -> List[Tuple[Tuple, Optional[float]]]:
+        """Hot forecasts to refresh now, with their TTL left (None if not cached)"""
+        due = []
+        hot = forecast_access.top(self.top_n, REFRESH_MIN_ACCESSES)
+        for request_key, _count in hot:
+            expires_in = weather_expires_in(request_key)
+            if expires_in is None or expires_in <= self.ahead_seconds:
+                due.append((request_key, expires_in))
+        return due
+
+    async def refresh_due(self) -> int:
+        """Refresh the forecasts due within the request budget; returns how many"""
+        self.cycles += 1
+        due = self.due()
+        if not due:
+            self.last_lag_seconds = 0.0
+            return 0
+
+        # Each request carries up to FORECAST_BATCH_MAX_POINTS points of one
+        # variable set; conservatively assume one request per distinct set
+        now = time.monotonic()
+        budget = self._budget_left(now)
+        selected: List[Tuple[Tuple, Optional[float]]] = []
+        groups: Dict[Tuple, int] = {}
+        for request_key, expires_in in due:
+            group = request_key[2:]
+            points = groups.get(group, 0)
+            if points % FORECAST_BATCH_MAX_POINTS == 0:
+                if budget <= 0:
+                    self.deferred += 1
+                    continue
+                budget -= 1
+            groups[group] = points + 1
+            selected.append((request_key, expires_in))
+        if not selected:
+            return 0
+
+        # Lag: how far past the planned refresh time (ahead_seconds before
+        # expiry) each entry is; entries no longer cached are counted as cold
+        lags = [self.ahead_seconds - expires_in
+                for _, expires_in in selected if expires_in is not None]
+        self.cold_refreshes += sum(1 for _, expires_in in selected
+                                   if expires_in is None)
+        self.last_lag_seconds = max([0.0] + lags)
+        self.max_lag_seconds = max(self.max_lag_seconds, self.last_lag_seconds)
+
+        with span("refresh_forecasts", {"refresh.forecasts": len(selected)}):
+            sent, failed = await refresh_weather_data(
+                [request_key for request_key, _ in selected]
+            )
+        self._sent_at.extend([now] * sent)
+        self.requests_sent += sent
+        self.requests_failed += failed
+        self.refreshed += len(selected)
+        return len(selected)
+
+    async def run(self) -> None:
+        """Refresh due forecasts every `interval_seconds` until cancelled"""
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            if not _within_active_hours():
+                continue
+            try:
+                await self.refresh_due()
+            except Exception:
+                logger.warning("Background refresh cycle failed", exc_info=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return refresh counters, the request budget and the refresh lag"""
+        return {
+            "tracked_forecasts": len(forecast_access),
+            "cycles": self.cycles,
+            "refreshed": self.refreshed,
+            "cold_refreshes": self.cold_refreshes,
+            "deferred_for_budget": self.deferred,
+            "requests_sent": self.requests_sent,
+            "requests_failed": self.requests_failed,
+            "budget_per_minute": self.max_requests_per_minute,
+            "budget_used_last_minute": (
+                self.max_requests_per_minute - self._budget_left(time.monotonic())
+            ),
+            "last_lag_seconds": round(self.last_lag_seconds, 3),
+            "max_lag_seconds": round(self.max_lag_seconds, 3)
+        }
+
+
+def _within_active_hours() -> bool:
+    if REFRESH_ACTIVE_HOURS is None:
+        return True
+    start, end = REFRESH_ACTIVE_HOURS
+    return start <= datetime.now().hour < end
+
+
+refresh_scheduler = RefreshScheduler()
+metrics.register("refresh_scheduler", refresh_scheduler.stats)
+
+# The refresh task and the number of lifespans using it (one per MCP session)
+_refresh_task: Optional["asyncio.Task[None]"] = None
+_refresh_users = 0
+
+
+@asynccontextmanager
+async def refresh_scheduler_lifespan() -> AsyncIterator[RefreshScheduler]:
+    """Run the background refresher while any server lifespan is active"""
+    global _refresh_task, _refresh_users
+    if REFRESH_ENABLED and _refresh_task is None:
+        _refresh_task = asyncio.create_task(refresh_scheduler.run())
+    _refresh_users += 1
+    try:
+        yield refresh_scheduler
+    finally:
+        _refresh_users -= 1
+        if _refresh_users == 0 and _refresh_task is not None:
+            task, _refresh_task = _refresh_task, None
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
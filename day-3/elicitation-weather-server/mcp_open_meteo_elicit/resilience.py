@@ -0,0 +1,306 @@
+"""
+Retries and circuit breaking for upstream Open-Meteo requests.
+
+Transient failures (connection errors, timeouts, 429 and 5xx responses) are
+retried with jittered exponential backoff, honouring Retry-After. Each
+endpoint has a circuit breaker: after repeated failures it fails calls fast
+for a while instead of piling more requests onto a struggling upstream, then
+lets a single trial request through to probe for recovery.
+
+Tool calls run under a latency budget (see `within_budget`). The deadline
+it sets is a context variable, so it follows the call down to every upstream
+request made on its behalf: each attempt is cut off when the budget runs out,
+and no retry is started or backed off for that cannot finish in time.
+
+Errors are raised as `UpstreamError`, a ValueError, with the reason taken
+from the API's JSON error body when there is one. Timeouts are raised as
+`UpstreamTimeoutError`, so callers can fall back to cached data.
+"""
+
+import asyncio
+import functools
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+import httpx
+
+from .columnar import decode_json
+from .config import (
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_RESET_SECONDS,
+    UPSTREAM_RETRY_ATTEMPTS,
+    UPSTREAM_RETRY_BASE_DELAY_SECONDS,
+    UPSTREAM_RETRY_MAX_DELAY_SECONDS,
+    UPSTREAM_RETRY_STATUS_CODES,
+)
+from .metrics import SIZE_BUCKETS_BYTES, metrics
+from .tracing import annotate, span
+
+
+class UpstreamError(ValueError):
+    """An Open-Meteo request failed; `status_code` is None for transport errors"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class CircuitOpenError(UpstreamError):
+    """The endpoint's circuit breaker is open and the request was not sent"""
+
+
+class UpstreamTimeoutError(UpstreamError):
+    """An Open-Meteo request timed out"""
+
+
+class DeadlineExceededError(UpstreamTimeoutError):
+    """The latency budget of the call ran out before the request completed"""
+
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+# Monotonic time by which the current call must finish; None when unbounded
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+def time_left() -> Optional[float]:
+    """Seconds left in the current call's budget, or None without a deadline"""
+    deadline = _deadline.get()
+    return deadline - time.monotonic() if deadline is not None else None
+
+
+@contextmanager
+def deadline(seconds: float, detached: bool = False) -> Iterator[None]:
+    """
+    Give the block at most `seconds`; an enclosing earlier deadline still
+    applies unless `detached`, for background work the caller does not wait for.
+    """
+    expires_at = time.monotonic() + seconds
+    current = None if detached else _deadline.get()
+    token = _deadline.set(expires_at if current is None else min(current, expires_at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def deadline_paused() -> Iterator[None]:
+    """Stop the clock during the block, e.g. while waiting for the user"""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        current = _deadline.get()
+        if current is not None:
+            _deadline.set(current + time.monotonic() - start)
+
+
+def within_budget(seconds: float) -> Callable[[F], F]:
+    """Decorate an async function to run under a deadline of `seconds`"""
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with deadline(seconds):
+                return await fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one upstream endpoint.
+
+    Closed: requests flow and failures are counted. Open: requests are
+    rejected until `reset_seconds` have passed. Half-open: one trial request
+    is let through; success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, name: str,
+                 failure_threshold: int = CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds: float = CIRCUIT_BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self.opened = 0
+        self.rejected = 0
+        self.retries = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_seconds:
+            return "open"
+        return "half_open"
+
+    def before_request(self) -> None:
+        """Raise CircuitOpenError unless a request may be sent now"""
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+        self.rejected += 1
+        retry_in = max(0.0, self._opened_at + self.reset_seconds - time.monotonic())  # type: ignore[operator]
+        raise CircuitOpenError(
+            f"{self.name} API is unavailable after repeated failures;"
+            f" retry in {retry_in:.0f}s"
+        )
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_in_flight or (
+            self._opened_at is None and self.failures >= self.failure_threshold
+        ):
+            self.opened += 1
+            self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def release(self) -> None:
+        """Forget a trial request that ended without a verdict (e.g. cancelled)"""
+        self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "retries": self.retries
+        }
+
+
+def error_reason(response: httpx.Response) -> str:
+    """The `reason` of an Open-Meteo JSON error body, or a short description"""
+    try:
+        reason = decode_json(response.content).get("reason")
+    except (ValueError, AttributeError):
+        reason = None
+    if reason:
+        return str(reason)
+    return f"HTTP {response.status_code} {response.reason_phrase}".strip()
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given retry (0-based)"""
+    ceiling = min(
+        UPSTREAM_RETRY_MAX_DELAY_SECONDS,
+        UPSTREAM_RETRY_BASE_DELAY_SECONDS * 2 ** attempt
+    )
+    return random.uniform(0, ceiling)
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None  # HTTP-date form; fall back to our own backoff
+
+
+async def request_with_retry(send: Callable[[], Awaitable[httpx.Response]],
+                             breaker: CircuitBreaker) -> httpx.Response:
+    """
+    Send a request through `breaker`, retrying transient failures.
+
+    Returns the first 200 response. Other 4xx responses are not retried and
+    do not count against the breaker. Under a deadline (see `within_budget`)
+    each attempt is cut off when it passes; being cut off does not count
+    against the breaker either, as the endpoint may be fine.
+    """
+    attempt = 0
+    endpoint = breaker.name.lower()
+    while True:
+        left = time_left()
+        if left is not None and left <= 0:
+            raise DeadlineExceededError(
+                f"{breaker.name} API request ran out of time for this call"
+            )
+        breaker.before_request()
+        retry_after = None
+        start = time.perf_counter()
+        with span(f"GET {endpoint}",
+                  {"http.request.method": "GET", "open_meteo.attempt": attempt + 1}):
+            try:
+                response = await (
+                    send() if left is None else asyncio.wait_for(send(), left)
+                )
+            except asyncio.TimeoutError:
+                # Only raised by wait_for: the deadline passed mid-request
+                annotate({"error.type": "deadline"})
+                metrics.inc("upstream_requests_total", endpoint=endpoint,
+                            status="deadline")
+                metrics.observe("upstream_request_seconds", time.perf_counter() - start,
+                                endpoint=endpoint)
+                breaker.release()
+                raise DeadlineExceededError(
+                    f"{breaker.name} API did not answer within the time budget"
+                    " of this call"
+                ) from None
+            except httpx.TransportError as exc:
+                annotate({"error.type": type(exc).__name__})
+                metrics.inc("upstream_requests_total", endpoint=endpoint,
+                            status="error")
+                metrics.observe("upstream_request_seconds", time.perf_counter() - start,
+                                endpoint=endpoint)
+                breaker.record_failure()
+                error_type = (UpstreamTimeoutError
+                              if isinstance(exc, httpx.TimeoutException)
+                              else UpstreamError)
+                error = error_type(
+                    f"{breaker.name} API error: {type(exc).__name__}: {exc}"
+                )
+            except BaseException:
+                breaker.release()
+                raise
+            else:
+                status = response.status_code
+                annotate({"http.response.status_code": status,
+                          "http.response.body.size": len(response.content),
+                          "error.type": str(status) if status >= 400 else None})
+                metrics.inc("upstream_requests_total", endpoint=endpoint,
+                            status=str(status))
+                metrics.observe("upstream_request_seconds", time.perf_counter() - start,
+                                endpoint=endpoint)
+                if response.status_code == 200:
+                    metrics.observe("upstream_response_bytes", len(response.content),
+                                    SIZE_BUCKETS_BYTES, endpoint=endpoint)
+                    breaker.record_success()
+                    return response
+                error = UpstreamError(
+                    f"{breaker.name} API error: {error_reason(response)}",
+                    response.status_code
+                )
+                if response.status_code not in UPSTREAM_RETRY_STATUS_CODES:
+                    breaker.record_success()  # The endpoint is up, the request was bad
+                    raise error
+                breaker.record_failure()
+                retry_after = _retry_after(response)
+
+        attempt += 1
+        if attempt >= UPSTREAM_RETRY_ATTEMPTS or breaker.state != "closed":
+            # Out of attempts, or this failure tripped the breaker
+            raise error
+        delay = _backoff_delay(attempt - 1)
+        if retry_after is not None:
+            if retry_after > UPSTREAM_RETRY_MAX_DELAY_SECONDS:
+                raise error
+            delay = max(delay, retry_after)
+        left = time_left()
+        if left is not None and delay >= left:
+            raise error  # The retry could not finish within the budget
+        breaker.retries += 1
+        await asyncio.sleep(delay)
@@ -7,23 +7,49 @@ This example demonstrates clean MCP server development.
 """
 
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import AsyncIterator
+
 from mcp.server.fastmcp import FastMCP
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
 
 # Support both package imports and direct execution
 try:
     from .tools import register_tools
     from .resources import register_resources
     from .prompts import register_prompts
+    from .api_client import http_client_lifespan
+    from .refresh_scheduler import refresh_scheduler_lifespan
+    from .metrics import metrics
 except ImportError:
     # When run directly (e.g., uv run mcp dev mcp_open_meteo_elicit/server.py)
     sys.path.insert(0, str(Path(__file__).parent.parent))
     from mcp_open_meteo_elicit.tools import register_tools
     from mcp_open_meteo_elicit.resources import register_resources
     from mcp_open_meteo_elicit.prompts import register_prompts
+    from mcp_open_meteo_elicit.api_client import http_client_lifespan
+    from mcp_open_meteo_elicit.refresh_scheduler import refresh_scheduler_lifespan
+    from mcp_open_meteo_elicit.metrics import metrics
+
+
+@asynccontextmanager
+async def app_lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """
+    Open the pooled Open-Meteo HTTP client and start the background refresh
+    of hot forecasts on startup; stop both on shutdown.
+
+    The client is installed in `api_client` rather than handed to the tools
+    through the lifespan context: the background refresh, batched requests
+    and prefetches also use it, and they run outside any request.
+    """
+    async with http_client_lifespan(), refresh_scheduler_lifespan():
+        yield
+
 
 # Create the MCP server
-mcp = FastMCP("Open-Meteo Weather")
+mcp = FastMCP("Open-Meteo Weather", lifespan=app_lifespan)
 
 # Register tools and resources
 register_tools(mcp)
@@ -31,6 +57,13 @@ register_resources(mcp)
 register_prompts(mcp)
 
 
+@mcp.custom_route("/metrics", methods=["GET"])
+async def prometheus_metrics(request: Request) -> PlainTextResponse:
+    """Prometheus scrape endpoint, served by the SSE and streamable HTTP transports"""
+    return PlainTextResponse(metrics.prometheus(),
+                             media_type="text/plain; version=0.0.4")
+
+
 def main():
     """Main entry point for the MCP server"""
     mcp.run()
@@ -0,0 +1,54 @@
+"""
+Per-location weather snapshots shared by all weather tools and resources.
+
+Each tool used to request its own, overlapping subset of variables for the
+same coordinates, so analysing one city took one upstream request per tool.
+A snapshot fetches the union of the current, hourly and daily variables the
+tools need in a single request. The resources read from it directly, and the
+query planner serves tool calls from a cached snapshot when there is one.
+"""
+
+from typing import Any, Dict, List
+
+from .api_client import get_weather_data
+from .config import DEFAULT_FORECAST_DAYS, DEFAULT_TEMPERATURE_UNIT
+
+# Union of the variables read by the weather tools and resources
+SNAPSHOT_CURRENT_PARAMS = [
+    "temperature_2m", "relative_humidity_2m", "weather_code", "precipitation",
+    "wind_speed_10m", "wind_direction_10m", "pressure_msl", "cloud_cover"
+]
+SNAPSHOT_HOURLY_PARAMS = [
+    "temperature_2m", "relative_humidity_2m", "weather_code", "precipitation",
+    "wind_speed_10m", "wind_direction_10m", "cloud_cover"
+]
+SNAPSHOT_DAILY_PARAMS = [
+    "temperature_2m_max", "temperature_2m_min", "weather_code",
+    "precipitation_sum", "wind_speed_10m_max", "wind_direction_10m_dominant"
+]
+
+
+async def get_weather_snapshot(latitude: float, longitude: float,
+                               forecast_days: int = DEFAULT_FORECAST_DAYS,
+                               temperature_unit: str = DEFAULT_TEMPERATURE_UNIT
+                               ) -> Dict[str, Any]:
+    """
+    Get current, hourly and daily data for a location in one request.
+
+    At least DEFAULT_FORECAST_DAYS days are always fetched so that tools asking
+    for shorter ranges share the same cached snapshot; callers trim the
+    hourly/daily series to the length they need with `take`.
+    """
+    return await get_weather_data(
+        latitude, longitude,
+        current=SNAPSHOT_CURRENT_PARAMS,
+        hourly=SNAPSHOT_HOURLY_PARAMS,
+        daily=SNAPSHOT_DAILY_PARAMS,
+        forecast_days=max(forecast_days, DEFAULT_FORECAST_DAYS),
+        temperature_unit=temperature_unit
+    )
+
+
+def take(series: Dict[str, List[Any]], count: int) -> Dict[str, List[Any]]:
+    """Return the first `count` entries of every array in an hourly/daily block"""
+    return {name: values[:count] for name, values in series.items()}
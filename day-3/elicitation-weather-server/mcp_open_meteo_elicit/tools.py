@@ -5,7 +5,7 @@ This module contains all the tool functions that are exposed via the MCP server,
 including weather forecasting, current conditions, and location search capabilities.
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 from mcp.server.fastmcp import FastMCP, Context
 
@@ -13,12 +13,22 @@ from .models import (
     LocationInfo, CurrentWeather, WeatherForecast, DailyForecast,
     HourlyForecast, HourlyWeatherPoint
 )
-from .api_client import search_locations, get_weather_data
+from .api_client import search_locations
+from .choice_memo import choice_memo
+from .query_planner import (
+    query_planner, plan_current_weather, plan_daily_forecast, plan_hourly_forecast,
+    plan_weather_alerts
+)
+from .geocoding import location_info
+from .location_ranking import location_ranker
 from .location_resolver import resolve_location
+from .metrics import metrics
+from .resilience import within_budget
+from .tracing import span, traced
 from .constants import weather_code_to_description
 from .config import (
     MAX_FORECAST_DAYS, MAX_FORECAST_HOURS, HIGH_WIND_THRESHOLD_KMH,
-    SEVERE_WEATHER_CODES, FREEZING_RAIN_CODES, SNOW_CODES
+    SEVERE_WEATHER_CODES, FREEZING_RAIN_CODES, SNOW_CODES, TOOL_BUDGETS_SECONDS
 )
 
 
@@ -26,10 +36,16 @@ def register_tools(mcp: FastMCP):
     """Register all weather tools with the MCP server"""
     
     @mcp.tool()
+    @metrics.timed("tool_seconds", tool="search_locations_tool")
+    @traced("tool search_locations_tool")
+    @within_budget(TOOL_BUDGETS_SECONDS["search_locations_tool"])
     async def search_locations_tool(location_name: str, limit: int = 5) -> List[LocationInfo]:
         """
         Search for locations by name or postal code.
         
+        Misspelled names are matched to the closest known places, so there
+        is no need to retry with spelling variants.
+        
         Args:
             location_name: Name of city, region, or postal code to search for
             limit: Maximum number of results to return (1-10, default 5)
@@ -40,24 +56,16 @@ def register_tools(mcp: FastMCP):
         limit = max(1, min(limit, 10))  # Clamp between 1 and 10
         locations = await search_locations(location_name, limit)
         
-        result = []
-        for loc in locations:
-            result.append(LocationInfo(
-                id=loc["id"],
-                name=loc["name"],
-                latitude=loc["latitude"],
-                longitude=loc["longitude"],
-                country=loc.get("country", ""),
-                admin1=loc.get("admin1"),
-                admin2=loc.get("admin2"),
-                timezone=loc["timezone"],
-                population=loc.get("population"),
-                elevation=loc.get("elevation")
-            ))
+        with metrics.timer("model_build_seconds", tool="search_locations_tool"), \
+                span("build_models"):
+            result = [location_info(loc) for loc in locations]
         
         return result
 
     @mcp.tool()
+    @metrics.timed("tool_seconds", tool="get_current_weather")
+    @traced("tool get_current_weather")
+    @within_budget(TOOL_BUDGETS_SECONDS["get_current_weather"])
     async def get_current_weather(location_name: str, ctx: Context,
                                 temperature_unit: str = "celsius") -> CurrentWeather:
         """
@@ -67,37 +75,40 @@ def register_tools(mcp: FastMCP):
             location_name: Name of the location (city, region, etc.)
             temperature_unit: Temperature unit ("celsius" or "fahrenheit")
         """
-        location = await resolve_location(location_name, ctx)
+        plan = plan_current_weather()
+        location, location_note = await resolve_location(location_name, ctx,
+                                                         prefetch=plan)
         
-        current_params = [
-            "temperature_2m", "relative_humidity_2m", "weather_code",
-            "wind_speed_10m", "wind_direction_10m", "pressure_msl", "cloud_cover"
-        ]
-        
-        weather_data = await get_weather_data(
-            location.latitude, location.longitude,
-            current=current_params,
+        weather_data = await query_planner.run(
+            plan, location.latitude, location.longitude,
             temperature_unit=temperature_unit
         )
         
         current = weather_data["current"]
         
-        return CurrentWeather(
-            location=location,
-            temperature=current["temperature_2m"],
-            temperature_unit=weather_data["current_units"]["temperature_2m"],
-            humidity=current["relative_humidity_2m"],
-            weather_description=weather_code_to_description(current["weather_code"]),
-            weather_code=current["weather_code"],
-            wind_speed=current["wind_speed_10m"],
-            wind_direction=current["wind_direction_10m"],
-            wind_speed_unit=weather_data["current_units"]["wind_speed_10m"],
-            pressure=current["pressure_msl"],
-            cloud_cover=current["cloud_cover"],
-            timestamp=current["time"]
-        )
+        with metrics.timer("model_build_seconds", tool="get_current_weather"), \
+                span("build_models"):
+            current_weather = CurrentWeather(
+                location=location,
+                temperature=current["temperature_2m"],
+                temperature_unit=weather_data["current_units"]["temperature_2m"],
+                humidity=current["relative_humidity_2m"],
+                weather_description=weather_code_to_description(current["weather_code"]),
+                weather_code=current["weather_code"],
+                wind_speed=current["wind_speed_10m"],
+                wind_direction=current["wind_direction_10m"],
+                wind_speed_unit=weather_data["current_units"]["wind_speed_10m"],
+                pressure=current["pressure_msl"],
+                cloud_cover=current["cloud_cover"],
+                timestamp=current["time"],
+                location_note=location_note
+            )
+        return current_weather
 
     @mcp.tool()
+    @metrics.timed("tool_seconds", tool="get_weather_forecast")
+    @traced("tool get_weather_forecast")
+    @within_budget(TOOL_BUDGETS_SECONDS["get_weather_forecast"])
     async def get_weather_forecast(location_name: str, ctx: Context,
                                  forecast_days: int = 7,
                                  temperature_unit: str = "celsius") -> WeatherForecast:
@@ -109,47 +120,54 @@ def register_tools(mcp: FastMCP):
             forecast_days: Number of forecast days (1-16, default 7)
             temperature_unit: Temperature unit ("celsius" or "fahrenheit")
         """
-        location = await resolve_location(location_name, ctx)
         forecast_days = max(1, min(forecast_days, MAX_FORECAST_DAYS))
+        plan = plan_daily_forecast(forecast_days)
+        location, location_note = await resolve_location(location_name, ctx,
+                                                         prefetch=plan)
         
-        daily_params = [
-            "temperature_2m_max", "temperature_2m_min", "weather_code",
-            "precipitation_sum", "wind_speed_10m_max", "wind_direction_10m_dominant"
-        ]
-        
-        weather_data = await get_weather_data(
-            location.latitude, location.longitude,
-            daily=daily_params,
-            forecast_days=forecast_days,
+        weather_data = await query_planner.run(
+            plan, location.latitude, location.longitude,
             temperature_unit=temperature_unit
         )
         
         daily = weather_data["daily"]
         daily_units = weather_data["daily_units"]
         
-        forecast_days_list = []
-        for i in range(len(daily["time"])):
-            forecast_days_list.append(DailyForecast(
-                date=daily["time"][i],
-                temperature_max=daily["temperature_2m_max"][i],
-                temperature_min=daily["temperature_2m_min"][i],
-                temperature_unit=daily_units["temperature_2m_max"],
-                weather_description=weather_code_to_description(daily["weather_code"][i]),
-                weather_code=daily["weather_code"][i],
-                precipitation_sum=daily["precipitation_sum"][i],
-                precipitation_unit=daily_units["precipitation_sum"],
-                wind_speed_max=daily["wind_speed_10m_max"][i],
-                wind_direction_dominant=daily["wind_direction_10m_dominant"][i],
-                wind_speed_unit=daily_units["wind_speed_10m_max"]
-            ))
+        with metrics.timer("model_build_seconds", tool="get_weather_forecast"), \
+                span("build_models"):
+            # Walk the daily columns in step rather than indexing each one per day
+            forecast_days_list = []
+            for date, temp_max, temp_min, code, precip, wind_max, wind_dir in zip(
+                daily["time"], daily["temperature_2m_max"], daily["temperature_2m_min"],
+                daily["weather_code"], daily["precipitation_sum"],
+                daily["wind_speed_10m_max"], daily["wind_direction_10m_dominant"]
+            ):
+                forecast_days_list.append(DailyForecast(
+                    date=date,
+                    temperature_max=temp_max,
+                    temperature_min=temp_min,
+                    temperature_unit=daily_units["temperature_2m_max"],
+                    weather_description=weather_code_to_description(code),
+                    weather_code=code,
+                    precipitation_sum=precip,
+                    precipitation_unit=daily_units["precipitation_sum"],
+                    wind_speed_max=wind_max,
+                    wind_direction_dominant=wind_dir,
+                    wind_speed_unit=daily_units["wind_speed_10m_max"]
+                ))
         
-        return WeatherForecast(
-            location=location,
-            forecast_days=forecast_days_list,
-            generated_at=datetime.now().isoformat()
-        )
+            forecast = WeatherForecast(
+                location=location,
+                forecast_days=forecast_days_list,
+                generated_at=datetime.now().isoformat(),
+                location_note=location_note
+            )
+        return forecast
 
     @mcp.tool()
+    @metrics.timed("tool_seconds", tool="get_hourly_forecast")
+    @traced("tool get_hourly_forecast")
+    @within_budget(TOOL_BUDGETS_SECONDS["get_hourly_forecast"])
     async def get_hourly_forecast(location_name: str, ctx: Context,
                                 forecast_hours: int = 24,
                                 temperature_unit: str = "celsius") -> HourlyForecast:
@@ -161,48 +179,59 @@ def register_tools(mcp: FastMCP):
             forecast_hours: Number of forecast hours (1-168, default 24)
             temperature_unit: Temperature unit ("celsius" or "fahrenheit")
         """
-        location = await resolve_location(location_name, ctx)
         forecast_hours = max(1, min(forecast_hours, MAX_FORECAST_HOURS))
+        plan = plan_hourly_forecast(forecast_hours)
+        location, location_note = await resolve_location(location_name, ctx,
+                                                         prefetch=plan)
         
-        hourly_params = [
-            "temperature_2m", "relative_humidity_2m", "weather_code",
-            "precipitation", "wind_speed_10m", "wind_direction_10m", "cloud_cover"
-        ]
-        
-        weather_data = await get_weather_data(
-            location.latitude, location.longitude,
-            hourly=hourly_params,
+        # Hourly data starts at the current hour
+        weather_data = await query_planner.run(
+            plan, location.latitude, location.longitude,
             temperature_unit=temperature_unit
         )
         
+        # Walk the hourly columns in step
         hourly = weather_data["hourly"]
         hourly_units = weather_data["hourly_units"]
         
-        # Limit to requested hours
-        hourly_data = []
-        for i in range(min(forecast_hours, len(hourly["time"]))):
-            hourly_data.append(HourlyWeatherPoint(
-                time=hourly["time"][i],
-                temperature=hourly["temperature_2m"][i],
-                humidity=hourly["relative_humidity_2m"][i],
-                weather_code=hourly["weather_code"][i],
-                weather_description=weather_code_to_description(hourly["weather_code"][i]),
-                precipitation=hourly["precipitation"][i],
-                wind_speed=hourly["wind_speed_10m"][i],
-                wind_direction=hourly["wind_direction_10m"][i],
-                cloud_cover=hourly["cloud_cover"][i]
-            ))
+        with metrics.timer("model_build_seconds", tool="get_hourly_forecast"), \
+                span("build_models"):
+            hourly_data = []
+            columns = zip(
+                hourly["time"], hourly["temperature_2m"],
+                hourly["relative_humidity_2m"], hourly["weather_code"],
+                hourly["precipitation"], hourly["wind_speed_10m"],
+                hourly["wind_direction_10m"], hourly["cloud_cover"]
+            )
+            for (time, temperature, humidity, code, precip,
+                 wind_speed, wind_dir, clouds) in columns:
+                hourly_data.append(HourlyWeatherPoint(
+                    time=time,
+                    temperature=temperature,
+                    humidity=humidity,
+                    weather_code=code,
+                    weather_description=weather_code_to_description(code),
+                    precipitation=precip,
+                    wind_speed=wind_speed,
+                    wind_direction=wind_dir,
+                    cloud_cover=clouds
+                ))
         
-        return HourlyForecast(
-            location=location,
-            hourly_data=hourly_data,
-            temperature_unit=hourly_units["temperature_2m"],
-            precipitation_unit=hourly_units["precipitation"],
-            wind_speed_unit=hourly_units["wind_speed_10m"],
-            generated_at=datetime.now().isoformat()
-        )
+            hourly_forecast = HourlyForecast(
+                location=location,
+                hourly_data=hourly_data,
+                temperature_unit=hourly_units["temperature_2m"],
+                precipitation_unit=hourly_units["precipitation"],
+                wind_speed_unit=hourly_units["wind_speed_10m"],
+                generated_at=datetime.now().isoformat(),
+                location_note=location_note
+            )
+        return hourly_forecast
 
     @mcp.tool()
+    @metrics.timed("tool_seconds", tool="get_weather_alerts")
+    @traced("tool get_weather_alerts")
+    @within_budget(TOOL_BUDGETS_SECONDS["get_weather_alerts"])
     async def get_weather_alerts(location_name: str, ctx: Context) -> Dict[str, Any]:
         """
         Check for severe weather conditions and alerts for a location.
@@ -210,17 +239,13 @@ def register_tools(mcp: FastMCP):
         Args:
             location_name: Name of the location (city, region, etc.)
         """
-        location = await resolve_location(location_name, ctx)
+        # Current conditions plus the next ALERT_LOOKAHEAD_HOURS hours
+        plan = plan_weather_alerts()
+        location, location_note = await resolve_location(location_name, ctx,
+                                                         prefetch=plan)
         
-        # Get current and near-term forecast for alert analysis
-        current_params = ["temperature_2m", "weather_code", "wind_speed_10m", "precipitation"]
-        hourly_params = ["temperature_2m", "weather_code", "wind_speed_10m", "precipitation", "wind_gusts_10m"]
-        
-        weather_data = await get_weather_data(
-            location.latitude, location.longitude,
-            current=current_params,
-            hourly=hourly_params,
-            forecast_days=2  # Check next 48 hours
+        weather_data = await query_planner.run(
+            plan, location.latitude, location.longitude
         )
         
         alerts = []
@@ -265,8 +290,8 @@ def register_tools(mcp: FastMCP):
                 "time": "current"
             })
         
-        # Check for upcoming severe weather in next 24 hours
-        for i in range(min(24, len(hourly["time"]))):
+        # Check for upcoming severe weather in the next ALERT_LOOKAHEAD_HOURS hours
+        for i in range(len(hourly["time"])):
             weather_code = hourly["weather_code"][i]
             if weather_code in SEVERE_WEATHER_CODES and not any(alert["type"] == "severe_weather" for alert in alerts):
                 alerts.append({
@@ -278,9 +303,31 @@ def register_tools(mcp: FastMCP):
                 })
                 break
         
-        return {
+        result = {
             "location": location,
             "alerts": alerts,
             "alert_count": len(alerts),
             "checked_at": datetime.now().isoformat()
         }
+        if location_note:
+            result["location_note"] = location_note
+        return result
+
+    @mcp.tool()
+    @metrics.timed("tool_seconds", tool="forget_location_choices")
+    @traced("tool forget_location_choices")
+    async def forget_location_choices(ctx: Context,
+                                      location_name: Optional[str] = None
+                                      ) -> Dict[str, Any]:
+        """
+        Forget which place the user picked for ambiguous location names, so the
+        next request for them asks again. Use when the user meant a different
+        place than the one remembered.
+        
+        Args:
+            location_name: Only forget the choice for this name (default: all choices)
+        """
+        forgotten = choice_memo.forget(ctx.session, location_name)
+        # Places resolved for the name also favour nearby candidates
+        location_ranker.forget(ctx.session, location_name)
+        return {"location_name": location_name, "forgotten": forgotten}
@@ -0,0 +1,116 @@
+"""
+Optional OpenTelemetry tracing of tool calls.
+
+With TRACING_EXPORTER set to "console" or "otlp" (and the optional `tracing`
+extra installed), each tool call produces a trace whose spans separate its
+stages: location resolution (geocoding, and in the elicitation server the
+wait for the user), the forecast query and its upstream attempts, response
+decoding and model building. Spans carry cache results and payload sizes as
+attributes.
+
+Tracing uses its own tracer provider, so an application embedding the server
+keeps control of the global one. Console output goes to stderr because stdout
+carries the stdio transport. When tracing is off, `span` returns a shared
+no-op context manager and `annotate` returns at once.
+"""
+
+import functools
+import logging
+import sys
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from .config import TRACING_EXPORTER, TRACING_OTLP_ENDPOINT, TRACING_SERVICE_NAME
+
+logger = logging.getLogger(__name__)
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    OPENTELEMETRY_AVAILABLE = True
+except ImportError:
+    OPENTELEMETRY_AVAILABLE = False
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+# Set by `configure_tracing`; None while tracing is off
+_tracer: Optional[Any] = None
+
+
+class _NoSpan:
+    """Context manager standing in for a span while tracing is off"""
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def configure_tracing(exporter: Optional[str] = TRACING_EXPORTER) -> bool:
+    """Start exporting spans ("console" or "otlp"); returns whether tracing is on"""
+    global _tracer
+    if not exporter:
+        return False
+    if not OPENTELEMETRY_AVAILABLE:
+        logger.warning("Tracing needs the optional `tracing` extra"
+                       " (opentelemetry-sdk); disabled")
+        return False
+    if exporter == "console":
+        span_exporter = ConsoleSpanExporter(out=sys.stderr)
+    elif exporter == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                OTLPSpanExporter,
+            )
+        except ImportError:
+            logger.warning("OTLP tracing needs opentelemetry-exporter-otlp-proto-http;"
+                           " disabled")
+            return False
+        span_exporter = OTLPSpanExporter(endpoint=TRACING_OTLP_ENDPOINT)
+    else:
+        logger.warning("Unknown tracing exporter '%s' (use 'console' or 'otlp');"
+                       " disabled", exporter)
+        return False
+
+    resource = Resource.create({"service.name": TRACING_SERVICE_NAME})
+    provider = TracerProvider(resource=resource)
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    _tracer = provider.get_tracer(__name__)
+    return True
+
+
+def span(name: str, attributes: Optional[Dict[str, Any]] = None):
+    """Context manager for a child of the current span (a no-op while tracing is off)"""
+    if _tracer is None:
+        return _NO_SPAN
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+def annotate(attributes: Dict[str, Any]) -> None:
+    """Set attributes on the current span; None values are skipped"""
+    if _tracer is None:
+        return
+    trace.get_current_span().set_attributes(
+        {key: value for key, value in attributes.items() if value is not None}
+    )
+
+
+def traced(name: str, attributes: Optional[Dict[str, Any]] = None) -> Callable[[F], F]:
+    """Decorate an async function to run in its own span"""
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _tracer is None:
+                return await fn(*args, **kwargs)
+            with _tracer.start_as_current_span(name, attributes=attributes):
+                return await fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+configure_tracing()
@@ -0,0 +1,124 @@
+"""
+Local unit conversion for Open-Meteo weather data.
+
+Forecasts are always fetched and cached in canonical metric units (°C, km/h,
+mm) and converted here to whatever units the caller asked for, so users of
+different locales share the same upstream requests and cache entries.
+"""
+
+from array import array
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from .columnar import is_series
+
+# Requested unit -> (unit label, scale, offset) for each canonical unit label.
+# A value converts as `value * scale + offset`.
+TEMPERATURE_UNITS: Dict[str, Tuple[str, float, float]] = {
+    "celsius": ("°C", 1.0, 0.0),
+    "fahrenheit": ("°F", 1.8, 32.0),
+}
+WIND_SPEED_UNITS: Dict[str, Tuple[str, float, float]] = {
+    "kmh": ("km/h", 1.0, 0.0),
+    "ms": ("m/s", 1 / 3.6, 0.0),
+    "mph": ("mp/h", 1 / 1.609344, 0.0),
+    "kn": ("kn", 1 / 1.852, 0.0),
+}
+PRECIPITATION_UNITS: Dict[str, Tuple[str, float, float]] = {
+    "mm": ("mm", 1.0, 0.0),
+    "inch": ("inch", 1 / 25.4, 0.0),
+}
+SNOWFALL_UNITS: Dict[str, Tuple[str, float, float]] = {
+    "mm": ("cm", 1.0, 0.0),  # Open-Meteo reports snowfall in cm for metric requests
+    "inch": ("inch", 1 / 2.54, 0.0),
+}
+
+# Canonical unit label -> which requested unit applies to it
+_CANONICAL_LABELS = {
+    "°C": ("temperature_unit", TEMPERATURE_UNITS),
+    "km/h": ("wind_speed_unit", WIND_SPEED_UNITS),
+    "mm": ("precipitation_unit", PRECIPITATION_UNITS),
+    "cm": ("precipitation_unit", SNOWFALL_UNITS),
+}
+
+# Open-Meteo reports values with one decimal place
+_DECIMALS = 1
+
+
+def validate_units(temperature_unit: str, wind_speed_unit: str,
+                   precipitation_unit: str) -> None:
+    """Raise ValueError for units the forecast API would reject"""
+    for kind, unit, supported in (
+        ("temperature", temperature_unit, TEMPERATURE_UNITS),
+        ("wind speed", wind_speed_unit, WIND_SPEED_UNITS),
+        ("precipitation", precipitation_unit, PRECIPITATION_UNITS),
+    ):
+        if unit not in supported:
+            raise ValueError(
+                f"Unsupported {kind} unit '{unit}'. Use one of: {', '.join(supported)}"
+            )
+
+
+def _convert_value(value: Optional[float], scale: float,
+                   offset: float) -> Optional[float]:
+    return None if value is None else round(value * scale + offset, _DECIMALS)
+
+
+def _convert_series(series: Sequence[Any], scale: float,
+                    offset: float) -> Sequence[Any]:
+    """Convert a whole series; typed columns stay float64 columns (NaN stays NaN)"""
+    if hasattr(series, "__array_interface__"):
+        # NumPy column: one vectorised expression
+        return (series * scale + offset).round(_DECIMALS)
+    if isinstance(series, array):
+        return array("d", [round(v * scale + offset, _DECIMALS) for v in series])
+    return [_convert_value(v, scale, offset) for v in series]
+
+
+def convert_weather_data(data: Dict[str, Any],
+                         temperature_unit: str = "celsius",
+                         wind_speed_unit: str = "kmh",
+                         precipitation_unit: str = "mm") -> Dict[str, Any]:
+    """
+    Convert a metric forecast response to the requested units.
+
+    Variables are recognised by their unit label in the `*_units` blocks, so
+    any temperature, wind speed or precipitation variable is handled. Whole
+    hourly/daily series are converted at once and the labels are updated to
+    match. The input is not modified; if no conversion is needed it is
+    returned as is.
+    """
+    requested = {
+        "temperature_unit": temperature_unit,
+        "wind_speed_unit": wind_speed_unit,
+        "precipitation_unit": precipitation_unit,
+    }
+    conversions = {}
+    for label, (unit_kind, table) in _CANONICAL_LABELS.items():
+        target = table[requested[unit_kind]]
+        if target[0] != label:
+            conversions[label] = target
+    if not conversions:
+        return data
+    
+    converted = dict(data)
+    for block in ("current", "hourly", "daily"):
+        units = data.get(f"{block}_units")
+        values = data.get(block)
+        if not units or values is None:
+            continue
+        
+        new_units = dict(units)
+        new_values = dict(values)
+        for name, label in units.items():
+            if label not in conversions or name not in values:
+                continue
+            new_label, scale, offset = conversions[label]
+            new_units[name] = new_label
+            series = values[name]
+            if is_series(series):
+                new_values[name] = _convert_series(series, scale, offset)
+            else:
+                new_values[name] = _convert_value(series, scale, offset)
+        converted[f"{block}_units"] = new_units
+        converted[block] = new_values
+    return converted